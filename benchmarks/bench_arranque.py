@@ -0,0 +1,107 @@
+"""
+bench_arranque.py
+
+Benchmark del arranque en frío de SistemaBlockchain. Genera una carpeta de datos con una cadena de N
+bloques y un conjunto UTXO, y compara el tiempo de cargarla:
+
+- desde la instantánea binaria (cabeceras + UTXOs, transacciones perezosas), y
+- leyendo todos los bloques del almacenamiento y los UTXOs de utxos.json, como se hacía antes.
+
+Uso:
+    python -m benchmarks.bench_arranque [N ...]
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from blockchain.encoding import transaction_id
+from blockchain.system import SistemaBlockchain
+
+
+def generar_carpeta(carpeta, bloques, txs_por_bloque=20):
+    """
+    Crea una carpeta de datos con una cadena de bloques de transacciones sintéticas y sus UTXOs.
+
+    Args:
+        carpeta (str): Directorio de datos.
+        bloques (int): Número de bloques después del génesis.
+        txs_por_bloque (int): Transacciones por bloque.
+    """
+    sistema = SistemaBlockchain()
+    for altura in range(1, bloques + 1):
+        txs = []
+        for i in range(txs_por_bloque):
+            direccion = f"addr{(altura * txs_por_bloque + i) % 1000}"
+            tx = {
+                "inputs": [{"txid": f"{altura:064x}", "index": i}],
+                "outputs": [{"direccion": direccion, "cantidad": 1.0}],
+                "fee": 0.0
+            }
+            tx["txid"] = transaction_id(tx)
+            txs.append(tx)
+            sistema.utxo_manager.add_utxo(tx["txid"], 0, direccion, 1.0)
+        sistema.blockchain.add_block(txs)
+    sistema.guardar_estado(carpeta)
+    sistema.cerrar_block_stores()
+    with open(os.path.join(carpeta, "utxos.json"), "w") as f:
+        json.dump(sistema.utxo_manager.utxos, f)
+
+
+def medir_carga(carpeta, usar_instantanea):
+    """
+    Mide el tiempo de crear un sistema a partir de una carpeta de datos.
+
+    Args:
+        carpeta (str): Directorio de datos.
+        usar_instantanea (bool): Si es False, la instantánea se aparta durante la medición.
+
+    Returns:
+        float: Tiempo en segundos.
+    """
+    snapshot = os.path.join(carpeta, "snapshot.bin")
+    apartada = snapshot + ".aparte"
+    if not usar_instantanea:
+        os.replace(snapshot, apartada)
+    try:
+        inicio = time.perf_counter()
+        sistema = SistemaBlockchain.desde_carpeta(carpeta)
+        duracion = time.perf_counter() - inicio
+        sistema.cerrar_block_stores()
+    finally:
+        if not usar_instantanea:
+            os.replace(apartada, snapshot)
+    return duracion
+
+
+def bench_arranque(bloques):
+    """
+    Compara el arranque con y sin instantánea para una cadena de n bloques.
+
+    Args:
+        bloques (int): Número de bloques.
+
+    Returns:
+        dict: Tiempos en segundos de cada forma de arranque.
+    """
+    carpeta = tempfile.mkdtemp(prefix="bench_arranque_")
+    try:
+        generar_carpeta(carpeta, bloques)
+        return {
+            "bloques": bloques,
+            "instantanea": medir_carga(carpeta, True),
+            "completo": medir_carga(carpeta, False),
+        }
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    tamanos = [int(x) for x in sys.argv[1:]] or [100, 1000, 5000]
+    for n in tamanos:
+        r = bench_arranque(n)
+        print(f"{n:>6} bloques | instantánea: {r['instantanea'] * 1e3:8.1f} ms | "
+              f"completo: {r['completo'] * 1e3:8.1f} ms | x{r['completo'] / r['instantanea']:.1f}")
@@ -0,0 +1,77 @@
+"""
+bench_coin_selection.py
+
+Benchmark de las estrategias de selección de monedas. Simula una wallet con muchos UTXOs pequeños que
+realiza una serie de pagos; tras cada pago se eliminan las entradas usadas y se agrega el cambio como
+UTXO nuevo. Para cada estrategia informa el promedio de entradas por transacción (costo de firma y
+verificación), las salidas de cambio creadas y el tamaño final del conjunto UTXO de la wallet.
+
+Uso:
+    python -m benchmarks.bench_coin_selection [utxos] [pagos]
+"""
+
+import random
+import sys
+import time
+
+from blockchain.coin_selection import STRATEGIES, select_coins
+from blockchain.transaction import UTXOManager
+
+
+def bench_estrategia(estrategia, utxos=2000, pagos=300, semilla=7):
+    """
+    Ejecuta la simulación de pagos con una estrategia.
+
+    Args:
+        estrategia (str): Nombre de la estrategia.
+        utxos (int): UTXOs iniciales de la wallet.
+        pagos (int): Número de pagos a simular.
+        semilla (int): Semilla del generador aleatorio (misma carga para todas las estrategias).
+
+    Returns:
+        dict: Métricas de la simulación.
+    """
+    rng = random.Random(semilla)
+    manager = UTXOManager()
+    direccion = "wallet"
+    for i in range(utxos):
+        manager.add_utxo(f"init{i}", 0, direccion, round(rng.uniform(0.1, 5.0), 2))
+
+    entradas = 0
+    cambios = 0
+    realizados = 0
+    tiempo = 0.0
+    for n in range(pagos):
+        monto = round(rng.uniform(1.0, 20.0), 2)
+        inicio = time.perf_counter()
+        seleccion = select_coins(manager, direccion, monto + 0.1, strategy=estrategia)
+        tiempo += time.perf_counter() - inicio
+        if seleccion is None:
+            break
+        for outpoint, _ in seleccion.inputs:
+            txid, index = outpoint.rsplit(":", 1)
+            manager.remove_utxo(txid, int(index))
+        if seleccion.creates_change:
+            manager.add_utxo(f"pago{n}", 1, direccion, seleccion.change)
+            cambios += 1
+        entradas += seleccion.num_inputs
+        realizados += 1
+
+    return {
+        "estrategia": estrategia,
+        "pagos": realizados,
+        "entradas_promedio": entradas / max(1, realizados),
+        "cambios_creados": cambios,
+        "utxos_finales": len(manager.get_sorted_utxos(direccion)),
+        "seleccion_us": tiempo / max(1, realizados) * 1e6,
+    }
+
+
+if __name__ == "__main__":
+    utxos = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    pagos = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    for estrategia in STRATEGIES:
+        r = bench_estrategia(estrategia, utxos, pagos)
+        print(f"{estrategia:>20} | pagos: {r['pagos']:4} | entradas/tx: {r['entradas_promedio']:6.2f} | "
+              f"cambios: {r['cambios_creados']:4} | UTXOs finales: {r['utxos_finales']:5} | "
+              f"selección: {r['seleccion_us']:8.1f} us")
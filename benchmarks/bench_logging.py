@@ -0,0 +1,108 @@
+"""
+bench_logging.py
+
+Benchmark del costo del registro de eventos.
+
+1. Costo por llamada, en el hilo que registra: escritura síncrona a archivo con el mensaje armado
+   con f-string (como antes) frente a log_info con la cola y formato diferido, y frente a una
+   categoría cuyo nivel descarta el mensaje.
+2. Costo en la ruta de transacciones: N llamadas a enviar_transaccion con el registro activo (a
+   archivo, con la cola) y con el registro desactivado; la diferencia es el costo del registro.
+
+Uso:
+    python -m benchmarks.bench_logging [N]
+"""
+
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from blockchain.system import SistemaBlockchain
+from utils import logger
+
+
+def medir(funcion, repeticiones):
+    """
+    Mide el tiempo promedio de una función en segundos.
+    """
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones
+
+
+def bench_llamada(directorio, repeticiones=20_000):
+    """
+    Segundos por llamada de cada forma de registrar un mensaje con dos argumentos.
+
+    Returns:
+        dict: {"forma": segundos por llamada}.
+    """
+    txid, altura = "ab" * 32, 1234
+
+    sincrono = logging.getLogger("bench_logging_sincrono")
+    sincrono.propagate = False
+    handler = logging.FileHandler(os.path.join(directorio, "sincrono.log"))
+    handler.setFormatter(logging.Formatter(logger.FORMATO))
+    sincrono.addHandler(handler)
+    sincrono.setLevel(logging.INFO)
+
+    logger.configurar(archivo=os.path.join(directorio, "cola.log"), consola=False, limites={},
+                      niveles={"silenciada": "WARNING"})
+    resultados = {
+        "síncrono + f-string": medir(lambda: sincrono.info(f"Transacción {txid} en el bloque #{altura}"),
+                                     repeticiones),
+        "cola + diferido": medir(lambda: logger.log_info("Transacción %s en el bloque #%d", txid, altura,
+                                                         categoria="transacciones"), repeticiones),
+        "categoría silenciada": medir(lambda: logger.log_info("Transacción %s en el bloque #%d", txid, altura,
+                                                              categoria="silenciada"), repeticiones),
+    }
+    inicio = time.perf_counter()
+    logger.detener()
+    resultados["vaciado de la cola (total)"] = time.perf_counter() - inicio
+    handler.close()
+    return resultados
+
+
+def _enviar(n):
+    sistema = SistemaBlockchain()
+    for i in range(n):
+        sistema.crear_usuario(f"u{i}")
+        sistema.fund_usuario(f"u{i}", 100)
+    inicio = time.perf_counter()
+    for i in range(n):
+        sistema.enviar_transaccion(f"u{i}", f"u{(i + 1) % n}", 1, fee=0.1)
+    return (time.perf_counter() - inicio) / n
+
+
+def bench_transacciones(directorio, n=500):
+    """
+    Segundos por enviar_transaccion con el registro activo y desactivado.
+
+    Returns:
+        dict: {"modo": segundos por transacción}.
+    """
+    logger.configurar(nivel="CRITICAL", archivo=None, consola=False)
+    desactivado = _enviar(n)
+    logger.configurar(archivo=os.path.join(directorio, "transacciones.log"), consola=False, limites={})
+    activo = _enviar(n)
+    logger.detener()
+    return {"registro desactivado": desactivado, "registro activo": activo}
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    directorio = tempfile.mkdtemp(prefix="bench_logging_")
+    try:
+        for forma, segundos in bench_llamada(directorio).items():
+            print(f"{forma:<28} {segundos * 1e6:9.2f} µs")
+        r = bench_transacciones(directorio, n)
+        costo = r["registro activo"] - r["registro desactivado"]
+        print(f"enviar_transaccion ({n}): desactivado {r['registro desactivado'] * 1e6:.0f} µs, "
+              f"activo {r['registro activo'] * 1e6:.0f} µs por transacción "
+              f"(registro: {costo * 1e6:+.1f} µs, {costo / r['registro desactivado']:+.2%})")
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
@@ -0,0 +1,97 @@
+"""
+bench_metricas.py
+
+Benchmark del costo de la instrumentación. Mide cada operación de utils.metrics con las métricas
+desactivadas y activadas, y el costo de firmar y verificar una entrada (rutas instrumentadas) en
+ambos modos. Al final muestra un extracto de la exportación en formato Prometheus.
+
+Uso:
+    python -m benchmarks.bench_metricas [N]
+"""
+
+import sys
+import time
+
+from benchmarks.bench_serializacion import crear_bloque
+from blockchain.verification import signature_cache
+from blockchain.wallet import Wallet
+from utils import metrics
+
+
+def medir(funcion, repeticiones):
+    """
+    Mide el tiempo promedio de una función en segundos.
+    """
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones
+
+
+def bench_primitivas(repeticiones=200_000):
+    """
+    Costo por llamada de inc, observe y de un span vacío, con las métricas desactivadas y activadas.
+
+    Returns:
+        dict: {"operación": (segundos desactivadas, segundos activadas)}.
+    """
+    contador = metrics.counter("bench_contador_total", "Contador de prueba")
+    histograma = metrics.histogram("bench_seconds", "Histograma de prueba")
+
+    def span():
+        with histograma.time():
+            pass
+
+    operaciones = {"counter.inc": contador.inc, "histogram.observe": lambda: histograma.observe(0.001),
+                   "histogram.time": span, "llamada vacía": lambda: None}
+    resultados = {}
+    for nombre, funcion in operaciones.items():
+        metrics.disable()
+        apagado = medir(funcion, repeticiones)
+        metrics.enable()
+        encendido = medir(funcion, repeticiones)
+        resultados[nombre] = (apagado, encendido)
+    metrics.disable()
+    return resultados
+
+
+def bench_firmas(n=200):
+    """
+    Segundos por sign_input y verify_input (sin caché de firmas) con las métricas desactivadas y activadas.
+
+    Returns:
+        dict: {"operación": (segundos desactivadas, segundos activadas)}.
+    """
+    wallet = Wallet()
+    public_key = wallet.get_keys()["public_key"]
+    _, transacciones = crear_bloque(n)
+
+    def firmar():
+        for tx in transacciones:
+            tx.sign_input(0, wallet.private_key)
+
+    def verificar():
+        signature_cache.clear()
+        for tx in transacciones:
+            tx.verify_input(0, public_key)
+
+    resultados = {}
+    for nombre, funcion in (("sign_input", firmar), ("verify_input", verificar)):
+        tiempos = []
+        for activar in (metrics.disable, metrics.enable):
+            activar()
+            tiempos.append(medir(funcion, 3) / n)
+        resultados[nombre] = tuple(tiempos)
+    metrics.disable()
+    return resultados
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    for nombre, (apagado, encendido) in bench_primitivas().items():
+        print(f"{nombre:<18} desactivadas {apagado * 1e9:7.0f} ns | activadas {encendido * 1e9:7.0f} ns")
+    for nombre, (apagado, encendido) in bench_firmas(n).items():
+        print(f"{nombre:<18} desactivadas {apagado * 1e6:7.1f} µs | activadas {encendido * 1e6:7.1f} µs "
+              f"({encendido / apagado - 1:+.1%})")
+    print()
+    print("\n".join(l for l in metrics.render().splitlines() if l.startswith("transaction_")))
@@ -0,0 +1,70 @@
+"""
+bench_pagos.py
+
+Benchmark de pagos masivos: un remitente paga a N receptores con N llamadas a enviar_transaccion
+(una transacción, una selección de monedas y al menos una firma por receptor) frente a una sola
+llamada a enviar_pagos (una transacción con N salidas). Se informan los pagos por segundo, las
+transacciones y los bytes que quedan en el mempool y el tiempo de minar el bloque que los confirma.
+
+El remitente tiene N UTXOs, porque cada transacción de enviar_transaccion necesita monedas que no
+gaste otra transacción pendiente.
+
+Uso:
+    python -m benchmarks.bench_pagos [N ...]
+"""
+
+import sys
+import time
+
+from blockchain.system import SistemaBlockchain
+from utils import logger
+
+
+def crear_sistema(receptores):
+    """
+    Crea un sistema con un remitente que tiene `receptores` UTXOs de 10 monedas y los receptores.
+    """
+    sistema = SistemaBlockchain()
+    sistema.crear_usuario("pagador")
+    direccion = sistema.usuarios["pagador"].address
+    for i in range(receptores):
+        sistema.crear_usuario(f"r{i}")
+        sistema.utxo_manager.add_utxo(f"saldo{i}", 0, direccion, 10)
+    return sistema
+
+
+def bench(receptores, modo):
+    """
+    Paga 1 moneda a cada receptor con el modo indicado ("bucle" o "lote") y mina el bloque.
+
+    Returns:
+        dict: Pagos por segundo, transacciones y bytes del mempool y segundos de minado.
+    """
+    sistema = crear_sistema(receptores)
+    pagos = [(f"r{i}", 1) for i in range(receptores)]
+    inicio = time.perf_counter()
+    if modo == "bucle":
+        aceptados = sum(sistema.enviar_transaccion("pagador", r, monto, fee=0.01) is not None for r, monto in pagos)
+    else:
+        resultados = sistema.enviar_pagos("pagador", pagos, fee=0.01 * receptores)
+        aceptados = sum(r["error"] is None for r in resultados)
+    segundos = time.perf_counter() - inicio
+    transacciones, tamano = len(sistema.mempool), sistema.mempool.size_bytes
+
+    inicio = time.perf_counter()
+    sistema.minar_bloque()
+    minado = time.perf_counter() - inicio
+    assert aceptados == receptores and not len(sistema.mempool)
+    return {"pagos/s": receptores / segundos, "segundos": segundos, "transacciones": transacciones,
+            "bytes": tamano, "minado": minado}
+
+
+if __name__ == "__main__":
+    logger.configurar(nivel="WARNING", archivo=None)
+    for n in [int(a) for a in sys.argv[1:]] or [100, 1000]:
+        print(f"{n} receptores:")
+        r = {modo: bench(n, modo) for modo in ("bucle", "lote")}
+        for modo, m in r.items():
+            print(f"  {modo:<6} {m['pagos/s']:10.0f} pagos/s ({m['segundos'] * 1e3:8.1f} ms) | "
+                  f"{m['transacciones']:5d} tx, {m['bytes']:8d} bytes en el mempool | minado {m['minado'] * 1e3:7.1f} ms")
+        print(f"  aceleración: {r['bucle']['segundos'] / r['lote']['segundos']:.1f}x")
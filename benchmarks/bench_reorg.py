@@ -0,0 +1,75 @@
+"""
+bench_reorg.py
+
+Benchmark de la reorganización de la cadena. Para cadenas de distinta longitud mide cuánto tarda
+cambiar a una rama competidora de profundidad k: con los datos para deshacer de cada bloque el costo
+depende de k y no de la longitud de la cadena.
+
+Uso:
+    python -m benchmarks.bench_reorg [N ...]
+"""
+
+import sys
+import time
+
+from blockchain.block import Block
+from blockchain.system import SistemaBlockchain
+
+
+def crear_sistema(bloques):
+    """
+    Crea un sistema con dos usuarios y una cadena de n bloques de una transferencia cada uno.
+
+    Args:
+        bloques (int): Número de bloques después del génesis.
+
+    Returns:
+        SistemaBlockchain: Sistema con la cadena minada.
+    """
+    sistema = SistemaBlockchain()
+    sistema.crear_usuario("ana")
+    sistema.crear_usuario("beto")
+    sistema.fund_usuario("ana", 10 * bloques)
+    for _ in range(bloques):
+        sistema.enviar_transaccion("ana", "beto", 1, fee=0.5)
+        sistema.minar_bloque()
+    return sistema
+
+
+def bench_reorg(bloques, profundidad=3):
+    """
+    Mide una reorganización de la profundidad indicada sobre una cadena de n bloques.
+
+    La rama competidora se mina en la misma cadena tras desconectar sus últimos bloques, y después
+    se restaura la rama original, que queda con menos trabajo que la competidora.
+
+    Args:
+        bloques (int): Longitud de la cadena.
+        profundidad (int): Bloques desconectados por la reorganización.
+
+    Returns:
+        dict: Tiempo de la reorganización en segundos.
+    """
+    sistema = crear_sistema(bloques)
+    original = [Block.from_bytes(b.to_bytes()) for b in sistema.blockchain.chain[-profundidad:]]
+    for _ in range(profundidad):
+        sistema.desconectar_bloque()
+    for _ in range(profundidad + 1):
+        sistema.enviar_transaccion("ana", "beto", 2, fee=0.5)
+        sistema.minar_bloque()
+    competidora = [Block.from_bytes(b.to_bytes()) for b in sistema.blockchain.chain[-(profundidad + 1):]]
+    for _ in range(profundidad + 1):
+        sistema.desconectar_bloque()
+    for bloque in original:
+        sistema.conectar_bloque(bloque)
+
+    inicio = time.perf_counter()
+    assert sistema.reorganizar(competidora)
+    return {"bloques": bloques, "profundidad": profundidad, "reorganizacion": time.perf_counter() - inicio}
+
+
+if __name__ == "__main__":
+    tamanos = [int(x) for x in sys.argv[1:]] or [50, 200, 800]
+    for n in tamanos:
+        r = bench_reorg(n)
+        print(f"{n:>6} bloques | reorganización de {r['profundidad']}: {r['reorganizacion'] * 1e3:8.2f} ms")
@@ -0,0 +1,106 @@
+"""
+bench_serializacion.py
+
+Benchmark de la serialización binaria de bloques y transacciones frente al JSON que se usaba antes.
+Construye un bloque con N transacciones firmadas, comprueba que to_bytes/from_bytes lo reconstruyen
+sin cambios y compara el tamaño y el tiempo de serializar y deserializar en ambos formatos.
+
+Uso:
+    python -m benchmarks.bench_serializacion [N ...]
+"""
+
+import json
+import sys
+import time
+
+from blockchain.block import Block
+from blockchain.transaction import Transaction
+from blockchain.wallet import Wallet
+
+
+def crear_bloque(n):
+    """
+    Crea un bloque con n transacciones firmadas de dos entradas y dos salidas.
+
+    Args:
+        n (int): Número de transacciones.
+
+    Returns:
+        tuple: (Block, lista de Transaction).
+    """
+    remitente, receptor = Wallet(), Wallet()
+    transacciones = []
+    for i in range(n):
+        inputs = [{"txid": f"{i:064x}", "index": 0}, {"txid": f"{i:064x}", "index": 1}]
+        outputs = [
+            {"direccion": receptor.address, "cantidad": 1.5},
+            {"direccion": remitente.address, "cantidad": 0.25 + i}
+        ]
+        tx = Transaction(inputs, outputs, fee=0.25)
+        tx.sign_input(0, remitente.private_key)
+        tx.sign_input(1, remitente.private_key)
+        transacciones.append(tx)
+    bloque = Block(1, [tx.to_dict() for tx in transacciones], "0" * 64)
+    return bloque, transacciones
+
+
+def medir(funcion, repeticiones):
+    """
+    Mide el tiempo promedio de una función en segundos.
+    """
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones
+
+
+def comprobar_ida_y_vuelta(bloque, transacciones):
+    """
+    Comprueba que serializar y deserializar en binario no altera bloques ni transacciones.
+
+    Raises:
+        AssertionError: Si algún objeto cambia al reconstruirlo.
+    """
+    for tx in transacciones:
+        copia = Transaction.from_bytes(tx.to_bytes())
+        assert copia.to_dict() == tx.to_dict(), tx.txid
+    copia = Block.from_bytes(bloque.to_bytes())
+    assert copia.to_dict() == bloque.to_dict(), bloque.hash
+    assert copia.calculate_hash() == bloque.hash
+
+
+def bench_serializacion(n, repeticiones=20):
+    """
+    Compara tamaño y velocidad de la serialización JSON y binaria de un bloque con n transacciones.
+
+    Args:
+        n (int): Número de transacciones del bloque.
+        repeticiones (int): Repeticiones de cada medición.
+
+    Returns:
+        dict: Tamaños en bytes y tiempos promedio en segundos.
+    """
+    bloque, transacciones = crear_bloque(n)
+    comprobar_ida_y_vuelta(bloque, transacciones)
+
+    como_json = json.dumps(bloque.to_dict(), separators=(",", ":")).encode()
+    como_binario = bloque.to_bytes()
+    return {
+        "transacciones": n,
+        "bytes_json": len(como_json),
+        "bytes_binario": len(como_binario),
+        "codificar_json": medir(lambda: json.dumps(bloque.to_dict(), separators=(",", ":")).encode(), repeticiones),
+        "codificar_binario": medir(bloque.to_bytes, repeticiones),
+        "decodificar_json": medir(lambda: json.loads(como_json), repeticiones),
+        "decodificar_binario": medir(lambda: Block.from_bytes(como_binario), repeticiones),
+    }
+
+
+if __name__ == "__main__":
+    tamanos = [int(x) for x in sys.argv[1:]] or [10, 100, 1000]
+    for n in tamanos:
+        r = bench_serializacion(n)
+        print(f"{n:>5} tx | tamaño JSON {r['bytes_json']:>9} B, binario {r['bytes_binario']:>9} B "
+              f"({r['bytes_binario'] / r['bytes_json']:.0%}) | "
+              f"codificar {r['codificar_json'] * 1e3:7.2f} / {r['codificar_binario'] * 1e3:7.2f} ms | "
+              f"decodificar {r['decodificar_json'] * 1e3:7.2f} / {r['decodificar_binario'] * 1e3:7.2f} ms")
@@ -0,0 +1,132 @@
+"""
+bench_sesiones.py
+
+Benchmark de muchas sesiones concurrentes de la interfaz.
+
+1. Memoria: un sistema cargado por sesión (como antes, en st.session_state) frente a un único
+   sistema compartido por todas las sesiones. Se mide con tracemalloc la memoria que queda
+   asignada después de cargar el estado desde disco.
+2. Rendimiento: S hilos (sesiones) usan el sistema compartido durante unos segundos con una mezcla
+   de consultas de saldos e historial y de transferencias, con y sin un bloque minándose en segundo
+   plano. Se informan las operaciones por segundo y la latencia p95 de las consultas.
+
+Uso:
+    python -m benchmarks.bench_sesiones [SEGUNDOS]
+"""
+
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from blockchain.mining import MiningProgress
+from blockchain.system import SistemaBlockchain
+from utils import logger
+
+SESIONES = [1, 10, 50]
+USUARIOS = 50
+BLOQUES = 20
+PROPORCION_ESCRITURAS = 0.1  # fracción de operaciones que son transferencias
+
+
+def crear_estado(carpeta):
+    """
+    Crea y guarda en una carpeta un sistema con USUARIOS usuarios y BLOQUES bloques con transferencias.
+    """
+    sistema = SistemaBlockchain()
+    for i in range(USUARIOS):
+        sistema.crear_usuario(f"u{i}")
+        sistema.fund_usuario(f"u{i}", 1_000)
+    for b in range(BLOQUES):
+        for i in range(USUARIOS):
+            sistema.enviar_transaccion(f"u{i}", f"u{(i + b + 1) % USUARIOS}", 1, fee=0.1)
+        sistema.minar_bloque()
+    sistema.guardar_estado(carpeta)
+
+
+def memoria_cargada(carpeta, copias):
+    """
+    Bytes asignados tras cargar `copias` sistemas desde la carpeta.
+    """
+    tracemalloc.start()
+    sistemas = [SistemaBlockchain.desde_carpeta(carpeta) for _ in range(copias)]
+    actual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    for sistema in sistemas:
+        sistema.cerrar_block_stores()
+    return actual
+
+
+def _sesion(sistema, semilla, fin, latencias, contador):
+    rng = random.Random(semilla)
+    nombres = [f"u{i}" for i in range(USUARIOS)]
+    operaciones = 0
+    while time.perf_counter() < fin:
+        nombre = rng.choice(nombres)
+        if rng.random() < PROPORCION_ESCRITURAS:
+            sistema.enviar_transaccion(nombre, rng.choice(nombres), 0.01, fee=0.01)
+        else:
+            inicio = time.perf_counter()
+            direccion = sistema.usuarios[nombre].address
+            sistema.obtener_saldo(direccion)
+            sistema.historial_movimientos(direccion)
+            latencias.append(time.perf_counter() - inicio)
+        operaciones += 1
+    contador.append(operaciones)
+
+
+def rendimiento(carpeta, sesiones, segundos, minando=False):
+    """
+    Ejecuta `sesiones` hilos sobre un sistema compartido durante `segundos`.
+
+    Returns:
+        tuple: (operaciones por segundo, latencia p95 de las consultas en segundos).
+    """
+    sistema = SistemaBlockchain.desde_carpeta(carpeta)
+    progreso = None
+    minero = None
+    if minando:
+        progreso = MiningProgress()
+        sistema.blockchain.difficulty = "0" * 8  # no termina durante la medición
+        minero = threading.Thread(target=sistema.minar_bloque, kwargs={"progreso": progreso})
+        minero.start()
+
+    latencias, contador = [], []
+    fin = time.perf_counter() + segundos
+    hilos = [threading.Thread(target=_sesion, args=(sistema, i, fin, latencias, contador))
+             for i in range(sesiones)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    if minero is not None:
+        progreso.cancel()
+        minero.join()
+    sistema.cerrar_block_stores()
+    latencias.sort()
+    p95 = latencias[int(len(latencias) * 0.95)] if latencias else 0.0
+    return sum(contador) / segundos, p95
+
+
+if __name__ == "__main__":
+    segundos = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    logger.configurar(nivel="CRITICAL", archivo=None, consola=False)
+    carpeta = tempfile.mkdtemp(prefix="bench_sesiones_")
+    try:
+        crear_estado(carpeta)
+        por_sistema = memoria_cargada(carpeta, 1)
+        print(f"Estado: {USUARIOS} usuarios, {BLOQUES + 1} bloques | un sistema cargado: {por_sistema / 1e6:.2f} MB")
+        for s in SESIONES:
+            copias = memoria_cargada(carpeta, s)
+            print(f"{s:>3} sesiones: un sistema por sesión {copias / 1e6:8.2f} MB | compartido {por_sistema / 1e6:.2f} MB")
+        for minando in (False, True):
+            print("Con un bloque minándose en segundo plano:" if minando else "Sin minería:")
+            for s in SESIONES:
+                ops, p95 = rendimiento(carpeta, s, segundos, minando)
+                print(f"  {s:>3} sesiones: {ops:9.0f} op/s | consultas p95 {p95 * 1e3:7.2f} ms")
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
@@ -0,0 +1,75 @@
+"""
+bench_utxo.py
+
+Benchmark del índice por dirección de UTXOManager. Llena el conjunto con N UTXOs repartidos entre
+varias direcciones y compara la consulta indexada (get_utxos_for_address y get_balance) contra el
+recorrido completo del conjunto que se hacía antes del índice.
+
+Uso:
+    python -m benchmarks.bench_utxo [N ...]
+"""
+
+import sys
+import time
+
+from blockchain.transaction import UTXOManager
+
+
+def llenar_utxos(n, direcciones=1000):
+    """
+    Crea un UTXOManager con n UTXOs repartidos entre un número fijo de direcciones.
+
+    Args:
+        n (int): Número de UTXOs.
+        direcciones (int): Número de direcciones distintas.
+
+    Returns:
+        UTXOManager: Gestor con los UTXOs cargados.
+    """
+    manager = UTXOManager()
+    for i in range(n):
+        manager.add_utxo(f"{i:064x}", 0, f"addr{i % direcciones}", 1.0)
+    return manager
+
+
+def medir(funcion, repeticiones):
+    """
+    Mide el tiempo promedio de una función en segundos.
+    """
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones
+
+
+def bench_utxo(n, repeticiones=200):
+    """
+    Compara la consulta indexada con el recorrido completo para un conjunto de n UTXOs.
+
+    Args:
+        n (int): Número de UTXOs.
+        repeticiones (int): Repeticiones de las consultas indexadas.
+
+    Returns:
+        dict: Tiempos promedio en segundos de cada operación.
+    """
+    manager = llenar_utxos(n)
+    direccion = "addr7"
+
+    def recorrido_completo():
+        return {k: v for k, v in manager.utxos.items() if v["direccion"] == direccion}
+
+    return {
+        "utxos": n,
+        "get_utxos_for_address": medir(lambda: manager.get_utxos_for_address(direccion), repeticiones),
+        "get_balance": medir(lambda: manager.get_balance(direccion), repeticiones),
+        "recorrido_completo": medir(recorrido_completo, max(1, repeticiones // 100)),
+    }
+
+
+if __name__ == "__main__":
+    tamanos = [int(x) for x in sys.argv[1:]] or [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]
+    for n in tamanos:
+        r = bench_utxo(n)
+        print(f"{n:>9} UTXOs | indexado: {r['get_utxos_for_address'] * 1e6:9.1f} us | "
+              f"saldo: {r['get_balance'] * 1e6:6.2f} us | recorrido: {r['recorrido_completo'] * 1e3:9.2f} ms")
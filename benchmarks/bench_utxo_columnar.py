@@ -0,0 +1,104 @@
+"""
+bench_utxo_columnar.py
+
+Benchmark del backend columnar del conjunto UTXO (requiere NumPy) frente al backend en memoria:
+
+1. Memoria por UTXO, medida con tracemalloc tras agregar N UTXOs con add_utxo.
+2. Tiempo de las consultas agregadas: saldos de todas las direcciones, oferta total y las 10
+   direcciones más ricas (vectorizadas en el columnar; recorriendo el conjunto en el de memoria).
+3. Tiempo de las consultas por UTXO que usa el sistema: get_utxo, add_utxo + remove_utxo y saldo y
+   UTXOs ordenados de una dirección.
+4. Deriva de redondeo: suma de N cantidades de 0.1 con floats frente a enteros de punto fijo.
+
+Uso:
+    python -m benchmarks.bench_utxo_columnar [N ...]
+"""
+
+import gc
+import sys
+import tracemalloc
+
+from benchmarks.bench_utxo import medir
+from blockchain.transaction import UTXOManager
+from blockchain.utxo_columnar import ColumnarUTXOBackend
+from blockchain.utxo_store import MemoryUTXOBackend
+
+DIRECCIONES = 10_000
+
+
+def llenar(backend, n):
+    """
+    Crea un UTXOManager con el backend indicado y n UTXOs repartidos entre DIRECCIONES direcciones.
+    """
+    manager = UTXOManager(backend)
+    for i in range(n):
+        manager.add_utxo(f"{i:064x}", i % 4, f"addr{i % DIRECCIONES:060x}", round(0.1 + (i % 997) * 0.37, 2))
+    return manager
+
+
+def memoria(crear_backend, n):
+    """
+    Bytes asignados por un UTXOManager con n UTXOs.
+    """
+    gc.collect()
+    tracemalloc.start()
+    manager = llenar(crear_backend(), n)
+    actual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return actual, manager
+
+
+def consultas(manager, n):
+    """
+    Segundos por llamada de cada consulta.
+
+    Returns:
+        dict: {"consulta": segundos}.
+    """
+    direccion = f"addr{7:060x}"
+    outpoint = f"{n // 2:064x}:{(n // 2) % 4}"
+    repeticiones = 3
+    return {
+        "saldos de todas las direcciones": medir(manager.get_balances, repeticiones),
+        "oferta total": medir(manager.total_supply, repeticiones),
+        "10 más ricas": medir(lambda: manager.richest(10), repeticiones),
+        "get_utxo": medir(lambda: manager.get_utxo(outpoint), 10_000),
+        "add_utxo + remove_utxo": medir(lambda: (manager.add_utxo("nuevo", 0, direccion, 1.5),
+                                                 manager.remove_utxo("nuevo", 0)), 10_000),
+        "saldo de una dirección": medir(lambda: manager.get_balance(direccion), 10_000),
+        "UTXOs ordenados de una dirección": medir(lambda: manager.get_sorted_utxos(direccion), 100),
+    }
+
+
+def deriva(n):
+    """
+    Error acumulado al sumar n veces 0.1 con floats y con enteros de punto fijo.
+
+    Returns:
+        tuple: (error con floats, error con punto fijo), en monedas.
+    """
+    total_float = 0.0
+    for _ in range(n):
+        total_float += 0.1
+    manager = UTXOManager(ColumnarUTXOBackend())
+    manager.load_utxos({f"{i}:0": {"direccion": "a", "cantidad": 0.1} for i in range(n)})
+    return abs(total_float - n / 10), abs(manager.get_balance("a") - n / 10)
+
+
+if __name__ == "__main__":
+    for n in [int(a) for a in sys.argv[1:]] or [100_000, 1_000_000]:
+        print(f"{n:,} UTXOs en {DIRECCIONES:,} direcciones:")
+        bytes_memoria, en_memoria = memoria(MemoryUTXOBackend, n)
+        bytes_columnar, columnar = memoria(ColumnarUTXOBackend, n)
+        print(f"  memoria   {bytes_memoria / n:7.0f} bytes/UTXO ({bytes_memoria / 1e6:7.1f} MB)")
+        print(f"  columnar  {bytes_columnar / n:7.0f} bytes/UTXO ({bytes_columnar / 1e6:7.1f} MB, "
+              f"{columnar.backend.nbytes() / 1e6:.1f} MB en columnas)")
+        assert round(en_memoria.total_supply(), 2) == round(columnar.total_supply(), 2)
+        t_memoria, t_columnar = consultas(en_memoria, n), consultas(columnar, n)
+        for consulta in t_memoria:
+            print(f"  {consulta:<34} memoria {t_memoria[consulta] * 1e6:11.1f} µs | "
+                  f"columnar {t_columnar[consulta] * 1e6:11.1f} µs")
+        del en_memoria, columnar
+
+    error_float, error_fijo = deriva(1_000_000)
+    print(f"Suma de 10^6 × 0.1: error {error_float:.2e} con floats, {error_fijo:.2e} con punto fijo")
@@ -0,0 +1,311 @@
+"""
+carga.py
+
+Generador de carga sintética para SistemaBlockchain, sin la interfaz:
+
+1. Crea N usuarios (claves generadas en paralelo) y los financia con pagos masivos (enviar_pagos)
+   desde un usuario "banco": cada usuario recibe varios UTXOs de montos aleatorios, para poder tener
+   varias transferencias pendientes a la vez.
+2. Envía un flujo de transferencias aleatorias: los remitentes se eligen al azar, los receptores con
+   una popularidad tipo Zipf (pocos usuarios reciben la mayoría de los pagos), los montos siguen una
+   distribución log-normal y las comisiones una exponencial. Con --tasa se limita el ritmo de envío.
+3. Mientras tanto, un hilo mina un bloque cada --intervalo-bloque segundos con el mempool; al terminar
+   el envío se minan los bloques necesarios para vaciarlo.
+
+Informa las transacciones por segundo creadas y confirmadas, los percentiles de latencia de crear una
+transacción, de minar un bloque y de confirmar una transacción (desde que se crea hasta que su bloque
+se conecta) y el crecimiento de memoria del proceso.
+
+Uso:
+    python -m benchmarks.carga [--usuarios 1000] [--utxos-por-usuario 4] [--transacciones 5000]
+                               [--tasa 0] [--intervalo-bloque 1.0] [--workers N] [--semilla 7]
+                               [--tracemalloc] [--json ARCHIVO]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from itertools import accumulate
+
+from blockchain.system import SistemaBlockchain
+from utils import logger
+
+PAGOS_POR_FONDEO = 2000  # salidas por transacción de fondeo (una transacción debe caber en un bloque)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def memoria_rss():
+    """
+    Memoria residente del proceso en bytes, o None si no se puede medir en esta plataforma.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is None:
+        return None
+    # Sin /proc se usa el máximo (no el actual): ru_maxrss está en kilobytes, o en bytes en macOS.
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def percentiles(valores):
+    """
+    Devuelve p50, p95, p99 y máximo de una lista de valores.
+
+    Returns:
+        dict: {"p50": ..., "p95": ..., "p99": ..., "max": ...}, o ceros si la lista está vacía.
+    """
+    if not valores:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    ordenados = sorted(valores)
+    return {
+        "p50": ordenados[int(len(ordenados) * 0.50)],
+        "p95": ordenados[min(len(ordenados) - 1, int(len(ordenados) * 0.95))],
+        "p99": ordenados[min(len(ordenados) - 1, int(len(ordenados) * 0.99))],
+        "max": ordenados[-1],
+    }
+
+
+class Minero:
+    """
+    Hilo que mina un bloque del mempool cada `intervalo` segundos y registra cuándo se conectó cada bloque.
+
+    Atributos:
+        bloques (list): Pares (bloque, instante en que se conectó) de los bloques minados.
+        duraciones (list): Segundos de cada llamada a minar_bloque que produjo un bloque.
+    """
+
+    def __init__(self, sistema, intervalo):
+        self.sistema = sistema
+        self.intervalo = intervalo
+        self.bloques = []
+        self.duraciones = []
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._ejecutar, name="minero", daemon=True)
+
+    def iniciar(self):
+        self._hilo.start()
+        return self
+
+    def minar(self):
+        """
+        Mina un bloque con el mempool actual.
+
+        Returns:
+            Block | None: Bloque minado, o None si el mempool estaba vacío.
+        """
+        inicio = time.perf_counter()
+        bloque = self.sistema.minar_bloque()
+        if bloque is not None:
+            fin = time.perf_counter()
+            self.duraciones.append(fin - inicio)
+            self.bloques.append((bloque, fin))
+        return bloque
+
+    def _ejecutar(self):
+        while not self._detener.wait(self.intervalo):
+            self.minar()
+
+    def detener(self):
+        self._detener.set()
+        self._hilo.join()
+
+
+def financiar(sistema, nombres, utxos_por_usuario, rng):
+    """
+    Financia a los usuarios con pagos masivos desde un usuario "banco", minando cada lote de pagos.
+
+    Args:
+        sistema (SistemaBlockchain): Sistema con los usuarios ya creados.
+        nombres (list): Nombres de los usuarios.
+        utxos_por_usuario (int): UTXOs que recibe cada usuario.
+        rng (random.Random): Generador aleatorio.
+    """
+    pagos = [(nombre, round(rng.uniform(10, 100), 2)) for nombre in nombres for _ in range(utxos_por_usuario)]
+    rng.shuffle(pagos)
+    sistema.crear_usuario("banco")
+    sistema.fund_usuario("banco", sum(monto for _, monto in pagos) + len(pagos))
+    for i in range(0, len(pagos), PAGOS_POR_FONDEO):
+        lote = pagos[i:i + PAGOS_POR_FONDEO]
+        resultados = sistema.enviar_pagos("banco", lote, fee=0.001 * len(lote))
+        if any(r["error"] for r in resultados):
+            raise RuntimeError(f"Fondeo fallido: {resultados[0]['error']}")
+        sistema.minar_bloque()
+
+
+def ejecutar(usuarios=1000, transacciones=5000, tasa=0.0, intervalo_bloque=1.0, workers=None, semilla=7,
+             trazar_memoria=False, utxos_por_usuario=4):
+    """
+    Ejecuta la carga completa y devuelve sus métricas.
+
+    Args:
+        usuarios (int): Número de usuarios.
+        transacciones (int): Transferencias a intentar.
+        tasa (float): Transferencias por segundo a intentar (0 = tan rápido como sea posible).
+        intervalo_bloque (float): Segundos entre bloques.
+        workers (int, opcional): Procesos para generar claves. Por defecto, el número de CPUs.
+        semilla (int): Semilla del generador aleatorio.
+        trazar_memoria (bool): Si es True, mide además con tracemalloc la memoria asignada por Python
+            (más precisa que la memoria residente, pero hace más lenta la carga).
+        utxos_por_usuario (int): UTXOs iniciales de cada usuario.
+
+    Returns:
+        dict: Métricas de la ejecución.
+    """
+    rng = random.Random(semilla)
+    if trazar_memoria:
+        tracemalloc.start()
+    memoria = {"inicio": memoria_rss()}
+
+    sistema = SistemaBlockchain()
+    nombres = [f"u{i}" for i in range(usuarios)]
+    inicio = time.perf_counter()
+    sistema.crear_usuarios(nombres, workers)
+    segundos_usuarios = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    financiar(sistema, nombres, utxos_por_usuario, rng)
+    segundos_fondeo = time.perf_counter() - inicio
+    memoria["usuarios"] = memoria_rss()
+    if trazar_memoria:
+        asignada_base = tracemalloc.get_traced_memory()[0]
+
+    # Popularidad de los receptores tipo Zipf (s = 1): el usuario i recibe con peso 1 / (i + 1).
+    pesos = list(accumulate(1 / (i + 1) for i in range(usuarios)))
+    creadas = {}  # {txid: instante de creación}
+    latencias_creacion = []
+    rechazadas = 0
+
+    minero = Minero(sistema, intervalo_bloque).iniciar()
+    inicio_envio = time.perf_counter()
+    for n in range(transacciones):
+        if tasa:
+            espera = inicio_envio + n / tasa - time.perf_counter()
+            if espera > 0:
+                time.sleep(espera)
+        remitente = rng.choice(nombres)
+        receptor = rng.choices(nombres, cum_weights=pesos)[0]
+        if receptor == remitente:
+            receptor = nombres[(nombres.index(remitente) + 1) % usuarios]
+        monto = round(min(rng.lognormvariate(1.0, 1.0), 200), 2) or 0.01
+        fee = round(min(rng.expovariate(1 / 0.2), 5), 2) or 0.01
+
+        t0 = time.perf_counter()
+        tx = sistema.enviar_transaccion(remitente, receptor, monto, fee)
+        t1 = time.perf_counter()
+        latencias_creacion.append(t1 - t0)
+        if tx is None:
+            rechazadas += 1
+        else:
+            creadas[tx.txid] = t1
+    fin_envio = time.perf_counter()
+    minero.detener()
+    memoria["envio"] = memoria_rss()
+
+    # Se vacía el mempool (las transacciones que no caben en un bloque esperan al siguiente).
+    while len(sistema.mempool) and minero.minar() is not None:
+        pass
+    memoria["fin"] = memoria_rss()
+    if trazar_memoria:
+        asignada_fin, asignada_pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    confirmaciones = []
+    ultima_confirmacion = inicio_envio
+    for bloque, conectado in minero.bloques:
+        for tx in bloque.transactions:
+            creada = creadas.get(tx["txid"])
+            if creada is not None:
+                # Si el bloque se conectó antes de registrar la creación (mismo instante), la latencia es 0.
+                confirmaciones.append(max(0.0, conectado - creada))
+                ultima_confirmacion = max(ultima_confirmacion, conectado)
+
+    duracion_envio = fin_envio - inicio_envio
+    resultado = {
+        "usuarios": usuarios,
+        "segundos_usuarios": segundos_usuarios,
+        "segundos_fondeo": segundos_fondeo,
+        "intentadas": transacciones,
+        "aceptadas": len(creadas),
+        "rechazadas": rechazadas,
+        "confirmadas": len(confirmaciones),
+        "bloques": len(minero.bloques),
+        "tps_creacion": len(creadas) / duracion_envio if duracion_envio else 0.0,
+        "tps_confirmacion": len(confirmaciones) / (ultima_confirmacion - inicio_envio)
+        if ultima_confirmacion > inicio_envio else 0.0,
+        "latencia_creacion": percentiles(latencias_creacion),
+        "latencia_mineria": percentiles(minero.duraciones),
+        "latencia_confirmacion": percentiles(confirmaciones),
+        "memoria_rss": memoria,
+        "cadena_valida": sistema.blockchain.validate_chain().valid,
+    }
+    if trazar_memoria:
+        resultado["memoria_asignada"] = {
+            "crecimiento": asignada_fin - asignada_base,
+            "pico": asignada_pico,
+            "por_transaccion": (asignada_fin - asignada_base) / max(1, len(creadas)),
+        }
+    return resultado
+
+
+def _ms(p):
+    return " ".join(f"{k} {v * 1e3:8.2f}" for k, v in p.items()) + " ms"
+
+
+def imprimir(r):
+    """
+    Muestra un resumen legible de las métricas de ejecutar.
+    """
+    print(f"{r['usuarios']} usuarios creados en {r['segundos_usuarios']:.2f} s y financiados en "
+          f"{r['segundos_fondeo']:.2f} s")
+    print(f"Transacciones: {r['aceptadas']} aceptadas, {r['rechazadas']} rechazadas "
+          f"(sin UTXOs libres), {r['confirmadas']} confirmadas en {r['bloques']} bloques")
+    print(f"TPS: {r['tps_creacion']:.0f} creadas/s, {r['tps_confirmacion']:.0f} confirmadas/s")
+    print(f"  creación      {_ms(r['latencia_creacion'])}")
+    print(f"  minado        {_ms(r['latencia_mineria'])}")
+    print(f"  confirmación  {_ms(r['latencia_confirmacion'])}")
+    m = r["memoria_rss"]
+    if m["fin"] is not None:
+        print("Memoria residente: " + ", ".join(f"{fase} {v / 1e6:.1f} MB" for fase, v in m.items())
+              + f" (crecimiento durante la carga: {(m['fin'] - m['usuarios']) / 1e6:+.1f} MB)")
+    if "memoria_asignada" in r:
+        a = r["memoria_asignada"]
+        print(f"Memoria asignada (tracemalloc): {a['crecimiento'] / 1e6:+.1f} MB, pico {a['pico'] / 1e6:.1f} MB, "
+              f"{a['por_transaccion']:.0f} bytes por transacción")
+    print(f"Cadena válida: {r['cadena_valida']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga de extremo a extremo de SistemaBlockchain.")
+    parser.add_argument("--usuarios", type=int, default=1000)
+    parser.add_argument("--utxos-por-usuario", type=int, default=4)
+    parser.add_argument("--transacciones", type=int, default=5000)
+    parser.add_argument("--tasa", type=float, default=0.0, help="transferencias por segundo (0 = sin límite)")
+    parser.add_argument("--intervalo-bloque", type=float, default=1.0, help="segundos entre bloques")
+    parser.add_argument("--workers", type=int, default=None, help="procesos para generar claves")
+    parser.add_argument("--semilla", type=int, default=7)
+    parser.add_argument("--tracemalloc", action="store_true", help="medir también la memoria asignada por Python")
+    parser.add_argument("--json", help="archivo donde guardar las métricas")
+    args = parser.parse_args(argv)
+
+    logger.configurar(nivel="WARNING", archivo=None)
+    r = ejecutar(args.usuarios, args.transacciones, args.tasa, args.intervalo_bloque, args.workers,
+                 args.semilla, args.tracemalloc, args.utxos_por_usuario)
+    imprimir(r)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(r, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+p2p_harness.py
+
+Levanta N nodos P2P en localhost dentro de un mismo bucle de eventos y mide:
+
+- Propagación de transacciones: tiempo desde que un nodo crea cada transacción hasta que el último
+  nodo la acepta (percentiles) y transacciones por segundo hasta que todas llegaron a todos.
+- Propagación de un bloque minado hasta el último nodo.
+- Sincronización de un nodo que se conecta tarde con solo el bloque génesis.
+
+Todos los nodos parten de una copia del mismo estado (fondeos y génesis), pero solo el primero tiene
+las wallets (usuarios.json, con las claves privadas): los demás verifican las firmas con la clave
+pública que lleva cada entrada.
+
+Uso:
+    python -m benchmarks.p2p_harness [nodos] [transacciones] [grado]
+"""
+
+import asyncio
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from blockchain.p2p import Nodo
+from blockchain.system import SistemaBlockchain
+
+
+def percentil(valores, p):
+    """
+    Percentil p (0-100) de una lista de valores por el método del rango más cercano.
+    """
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p / 100))]
+
+
+def crear_estado_base(carpeta, usuarios):
+    """
+    Crea y guarda un sistema con usuarios financiados que pueden enviarse transacciones.
+
+    Args:
+        carpeta (str): Directorio donde guardar el estado.
+        usuarios (int): Número de usuarios.
+    """
+    sistema = SistemaBlockchain()
+    for i in range(usuarios):
+        sistema.crear_usuario(f"u{i}")
+        sistema.fund_usuario(f"u{i}", 100)
+    os.makedirs(carpeta, exist_ok=True)
+    sistema.guardar_estado(carpeta)
+    sistema.cerrar_block_stores()
+
+
+async def esperar(condicion, timeout=30.0):
+    """
+    Espera hasta que condicion() sea verdadera.
+
+    Raises:
+        TimeoutError: Si no se cumple antes del tiempo límite.
+    """
+    limite = time.perf_counter() + timeout
+    while not condicion():
+        if time.perf_counter() > limite:
+            raise TimeoutError("La red no convergió a tiempo")
+        await asyncio.sleep(0.002)
+
+
+async def ejecutar(nodos=5, transacciones=100, grado=2, semilla=0):
+    """
+    Ejecuta la medición completa sobre una red de nodos en localhost.
+
+    Cada nodo nuevo se conecta a `grado` nodos anteriores elegidos al azar, de modo que la red es
+    conexa y los mensajes atraviesan varios saltos.
+
+    Args:
+        nodos (int): Número de nodos.
+        transacciones (int): Transacciones creadas en el primer nodo.
+        grado (int): Conexiones salientes de cada nodo.
+        semilla (int): Semilla de la topología.
+
+    Returns:
+        dict: Latencias en segundos y throughput en transacciones por segundo.
+    """
+    rng = random.Random(semilla)
+    directorio = tempfile.mkdtemp(prefix="p2p_")
+    red = []
+    try:
+        base = os.path.join(directorio, "base")
+        crear_estado_base(base, transacciones)
+
+        def nuevo_nodo(nombre, con_wallets=False):
+            carpeta = os.path.join(directorio, nombre)
+            shutil.copytree(base, carpeta)
+            if not con_wallets:
+                os.remove(os.path.join(carpeta, "usuarios.json"))
+            return Nodo(SistemaBlockchain.desde_carpeta(carpeta))
+
+        for i in range(nodos):
+            nodo = nuevo_nodo(f"nodo{i}", con_wallets=i == 0)
+            await nodo.start()
+            for vecino in rng.sample(red, min(grado, len(red))):
+                await nodo.connect(vecino.host, vecino.port)
+            red.append(nodo)
+        await esperar(lambda: all(n.peers for n in red))
+
+        # Transacciones: cada usuario le envía a otro desde el primer nodo.
+        origen = red[0]
+        enviadas = {}
+        inicio = time.perf_counter()
+        for i in range(transacciones):
+            tx = await origen.enviar_transaccion(f"u{i}", f"u{(i + 1) % transacciones}", 1, fee=0.1)
+            enviadas[tx.txid] = origen.seen[tx.txid]
+        await esperar(lambda: all(txid in n.seen for n in red for txid in enviadas))
+        llegadas = {txid: max(n.seen[txid] for n in red) for txid in enviadas}
+        latencias_tx = [llegadas[txid] - enviadas[txid] for txid in enviadas]
+        duracion = max(llegadas.values()) - inicio
+
+        # Bloque: se mina en el último nodo, el más alejado del origen de las transacciones.
+        bloque = await red[-1].minar_bloque()
+        await esperar(lambda: all(bloque.hash in n.seen for n in red))
+        latencia_bloque = max(n.seen[bloque.hash] for n in red) - red[-1].seen[bloque.hash]
+
+        # Sincronización: un nodo con solo el génesis se conecta al primero.
+        tardio = nuevo_nodo("tardio")
+        await tardio.start()
+        inicio_sync = time.perf_counter()
+        await tardio.connect(origen.host, origen.port)
+        await esperar(lambda: tardio.height == origen.height)
+        sincronizacion = time.perf_counter() - inicio_sync
+        red.append(tardio)
+
+        return {
+            "nodos": nodos,
+            "transacciones": transacciones,
+            "tx_p50": percentil(latencias_tx, 50),
+            "tx_p95": percentil(latencias_tx, 95),
+            "tx_max": max(latencias_tx),
+            "tx_por_segundo": transacciones / duracion,
+            "bloque": latencia_bloque,
+            "bloque_transacciones": len(bloque.transactions),
+            "sincronizacion": sincronizacion,
+        }
+    finally:
+        for nodo in red:
+            await nodo.close()
+            nodo.sistema.cerrar_block_stores()
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    args = [int(x) for x in sys.argv[1:]]
+    r = asyncio.run(ejecutar(*args))
+    print(f"{r['nodos']} nodos, {r['transacciones']} transacciones")
+    print(f"  Transacciones: p50 {r['tx_p50'] * 1e3:.1f} ms, p95 {r['tx_p95'] * 1e3:.1f} ms, "
+          f"máx {r['tx_max'] * 1e3:.1f} ms | {r['tx_por_segundo']:,.0f} tx/s")
+    print(f"  Bloque de {r['bloque_transacciones']} transacciones: {r['bloque'] * 1e3:.1f} ms hasta el último nodo")
+    print(f"  Sincronización de un nodo nuevo: {r['sincronizacion'] * 1e3:.1f} ms")
@@ -0,0 +1,280 @@
+"""
+suite.py
+
+Suite de benchmarks de las rutas críticas del núcleo de la blockchain:
+
+- Block.calculate_hash y mine_block (hashes por segundo) con bloques de distinto tamaño.
+- Transaction.sign_input y verify_input (operaciones por segundo, sin caché de firmas).
+- UTXOManager.get_utxos_for_address con 10^3 a 10^6 UTXOs.
+- SistemaBlockchain.guardar_estado y cargar_estado con cadenas de distinta longitud.
+- Blockchain.is_valid_chain (revalidación completa).
+
+Los resultados se escriben en un archivo JSON y se comparan con una línea base guardada: cada
+métrica que empeora más que la tolerancia se marca como regresión y el comando termina con código 1.
+Si no hay línea base (o no comparte ninguna métrica con los resultados, por ejemplo una base completa
+frente a --rapido), no se puede afirmar que no haya regresiones y el comando termina con código 2;
+la línea base depende de la máquina, así que se registra en cada equipo con --guardar-base.
+
+Uso:
+    python -m benchmarks.suite [--rapido] [--salida ARCHIVO] [--base ARCHIVO] [--guardar-base]
+                               [--tolerancia 0.25] [--solo GRUPO ...]
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_reorg import crear_sistema
+from benchmarks.bench_serializacion import crear_bloque
+from benchmarks.bench_utxo import llenar_utxos
+from blockchain.system import SistemaBlockchain
+from blockchain.verification import signature_cache
+from blockchain.wallet import Wallet
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+SALIDA = os.path.join(DIRECTORIO, "resultados.json")
+BASE = os.path.join(DIRECTORIO, "base.json")
+
+TAMANOS = {
+    "bloque": ([1, 100, 1000], [1, 100]),
+    "utxos": ([10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6], [10 ** 3, 10 ** 4]),
+    "cadena": ([10, 100, 500], [10, 50]),
+}
+
+
+def medir(funcion, tiempo_min=0.2, rondas=3):
+    """
+    Mide el tiempo por llamada de una función. En cada ronda se repite la función hasta acumular
+    tiempo_min segundos y se devuelve la mejor ronda, que es la menos afectada por ruido externo.
+
+    Returns:
+        float: Segundos por llamada.
+    """
+    mejor = float("inf")
+    for _ in range(rondas):
+        repeticiones = 0
+        inicio = time.perf_counter()
+        while True:
+            funcion()
+            repeticiones += 1
+            transcurrido = time.perf_counter() - inicio
+            if transcurrido >= tiempo_min:
+                break
+        mejor = min(mejor, transcurrido / repeticiones)
+    return mejor
+
+
+def resultado(valor, unidad, mayor_es_mejor=True):
+    return {"valor": valor, "unidad": unidad, "mayor_es_mejor": mayor_es_mejor}
+
+
+def bench_hash(rapido):
+    """
+    Hashes por segundo de calculate_hash y de mine_block para bloques de distinto tamaño.
+    """
+    resultados = {}
+    for n in TAMANOS["bloque"][rapido]:
+        bloque, _ = crear_bloque(n)
+        bloque.timestamp = "2024-01-01 00:00:00"
+        resultados[f"hash/calculate_hash/{n}tx"] = resultado(1 / medir(bloque.calculate_hash), "hashes/s")
+
+        # Con timestamp y nonce inicial fijos, la minería recorre siempre los mismos nonces.
+        bloque.nonce = 0
+        inicio = time.perf_counter()
+        bloque.mine_block("0000")
+        segundos = time.perf_counter() - inicio
+        resultados[f"hash/mine_block/{n}tx"] = resultado((bloque.nonce + 1) / segundos, "hashes/s")
+    return resultados
+
+
+def bench_firmas(rapido, n=200):
+    """
+    Operaciones por segundo de sign_input y verify_input. La caché de firmas se vacía antes de
+    verificar para medir la verificación criptográfica completa.
+    """
+    wallet = Wallet()
+    public_key = wallet.get_keys()["public_key"]
+    _, transacciones = crear_bloque(n // 2 if rapido else n)
+
+    inicio = time.perf_counter()
+    for tx in transacciones:
+        tx.sign_input(0, wallet.private_key)
+    firmar = (time.perf_counter() - inicio) / len(transacciones)
+
+    signature_cache.clear()
+    inicio = time.perf_counter()
+    for tx in transacciones:
+        assert tx.verify_input(0, public_key)
+    verificar = (time.perf_counter() - inicio) / len(transacciones)
+    signature_cache.clear()
+    return {
+        "firmas/sign_input": resultado(1 / firmar, "ops/s"),
+        "firmas/verify_input": resultado(1 / verificar, "ops/s"),
+    }
+
+
+def bench_utxos(rapido):
+    """
+    Consultas por segundo de get_utxos_for_address con conjuntos UTXO de distinto tamaño.
+    """
+    resultados = {}
+    for n in TAMANOS["utxos"][rapido]:
+        manager = llenar_utxos(n)
+        consulta = medir(lambda: manager.get_utxos_for_address("addr7"))
+        resultados[f"utxos/get_utxos_for_address/{n}"] = resultado(1 / consulta, "ops/s")
+    return resultados
+
+
+def bench_cadena(rapido):
+    """
+    Segundos de guardar_estado (en una carpeta vacía) y de cargar_estado, y de is_valid_chain con
+    revalidación completa en un solo proceso, para cadenas de distinta longitud.
+    """
+    resultados = {}
+    for n in TAMANOS["cadena"][rapido]:
+        sistema = crear_sistema(n)
+        directorio = tempfile.mkdtemp(prefix="bench_cadena_")
+        try:
+            guardar, cargar = [], []
+            for i in range(3):
+                carpeta = os.path.join(directorio, str(i))
+                os.makedirs(carpeta)
+                inicio = time.perf_counter()
+                sistema.guardar_estado(carpeta)
+                guardar.append(time.perf_counter() - inicio)
+                sistema.cerrar_block_stores()
+
+                inicio = time.perf_counter()
+                cargado = SistemaBlockchain.desde_carpeta(carpeta)
+                cargar.append(time.perf_counter() - inicio)
+                cargado.cerrar_block_stores()
+        finally:
+            shutil.rmtree(directorio, ignore_errors=True)
+
+        validar = medir(lambda: sistema.blockchain.is_valid_chain(full=True, workers=1), rondas=1)
+        resultados[f"cadena/guardar_estado/{n}"] = resultado(min(guardar), "s", mayor_es_mejor=False)
+        resultados[f"cadena/cargar_estado/{n}"] = resultado(min(cargar), "s", mayor_es_mejor=False)
+        resultados[f"cadena/is_valid_chain/{n}"] = resultado(validar, "s", mayor_es_mejor=False)
+    return resultados
+
+
+BENCHMARKS = {"hash": bench_hash, "firmas": bench_firmas, "utxos": bench_utxos, "cadena": bench_cadena}
+
+
+def ejecutar(rapido=False, solo=None):
+    """
+    Ejecuta la suite.
+
+    Args:
+        rapido (bool): Si es True, usa tamaños reducidos.
+        solo (list, opcional): Grupos a ejecutar (claves de BENCHMARKS). Por defecto, todos.
+
+    Returns:
+        dict: Métricas por nombre ("grupo/operación/tamaño").
+    """
+    resultados = {}
+    for grupo, bench in BENCHMARKS.items():
+        if not solo or grupo in solo:
+            resultados.update(bench(rapido))
+    return resultados
+
+
+def comparar(resultados, base, tolerancia):
+    """
+    Compara los resultados con la línea base.
+
+    Args:
+        resultados (dict): Métricas actuales.
+        base (dict): Métricas de la línea base.
+        tolerancia (float): Empeoramiento relativo admitido (0.25 = 25 %).
+
+    Returns:
+        list: Tuplas (nombre, valor base, valor actual, cambio relativo, es_regresión). El cambio es
+        positivo cuando la métrica mejora.
+    """
+    filas = []
+    for nombre, actual in resultados.items():
+        if nombre not in base:
+            continue
+        anterior = base[nombre]["valor"]
+        if actual["mayor_es_mejor"]:
+            cambio = actual["valor"] / anterior - 1
+        else:
+            cambio = anterior / actual["valor"] - 1
+        filas.append((nombre, anterior, actual["valor"], cambio, cambio < -tolerancia))
+    return filas
+
+
+def _leer(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _escribir(path, datos):
+    with open(path, "w") as f:
+        json.dump(datos, f, indent=4, sort_keys=True)
+
+
+def main(argv=None):
+    """
+    Punto de entrada de la línea de comandos.
+
+    Returns:
+        int: 0 si no hay regresiones, 1 si alguna métrica empeoró más que la tolerancia y 2 si no hubo
+        línea base con que comparar.
+    """
+    parser = argparse.ArgumentParser(description="Suite de benchmarks del núcleo de la blockchain.")
+    parser.add_argument("--rapido", action="store_true", help="Usa tamaños reducidos")
+    parser.add_argument("--salida", default=SALIDA, help="Archivo JSON de resultados")
+    parser.add_argument("--base", default=BASE, help="Archivo JSON de la línea base")
+    parser.add_argument("--guardar-base", action="store_true", help="Guarda los resultados como nueva línea base")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="Empeoramiento admitido (por defecto 0.25)")
+    parser.add_argument("--solo", nargs="*", choices=list(BENCHMARKS), help="Grupos a ejecutar")
+    args = parser.parse_args(argv)
+
+    resultados = ejecutar(rapido=args.rapido, solo=args.solo)
+    informe = {
+        "fecha": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "procesador": platform.processor() or platform.machine(),
+        "rapido": args.rapido,
+        "resultados": resultados,
+    }
+    _escribir(args.salida, informe)
+    print(f"Resultados guardados en {args.salida}")
+
+    base = _leer(args.base)["resultados"] if os.path.exists(args.base) else {}
+    filas = comparar(resultados, base, args.tolerancia)
+    comparados = {fila[0] for fila in filas}
+    for nombre, actual in sorted(resultados.items()):
+        if nombre not in comparados:
+            print(f"{nombre:<40} {actual['valor']:>14,.4g} {actual['unidad']}")
+    for nombre, anterior, valor, cambio, regresion in sorted(filas):
+        marca = "  REGRESIÓN" if regresion else ""
+        print(f"{nombre:<40} {valor:>14,.4g} {resultados[nombre]['unidad']:<9} "
+              f"(base {anterior:,.4g}, {cambio:+.1%}){marca}")
+
+    if args.guardar_base:
+        _escribir(args.base, informe)
+        print(f"Línea base guardada en {args.base}")
+        return 0
+    if not filas:
+        motivo = "no existe" if not base else "no comparte ninguna métrica con estos resultados"
+        print(f"Sin comparación: la línea base {args.base} {motivo}. Regístrala en este equipo con "
+              f"--guardar-base{' --rapido' if args.rapido else ''}.", file=sys.stderr)
+        return 2
+    regresiones = [fila[0] for fila in filas if fila[4]]
+    if regresiones:
+        print(f"{len(regresiones)} regresiones con tolerancia {args.tolerancia:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,12 +4,78 @@ block.py
 Este módulo define la clase Block, que representa un bloque individual en la cadena de bloques.
 Cada bloque contiene una lista de transacciones, un hash del bloque anterior, un nonce, y su propio hash,
 calculado mediante SHA-256. También incluye un mecanismo de minería basado en Prueba de Trabajo (PoW).
+
+El hash del bloque se calcula sobre una cabecera canónica de tamaño fijo:
+
+    index (8 bytes) | timestamp (19 bytes) | prev_hash (32 bytes) | merkle_root (32 bytes) | nonce (8 bytes)
+
+La raíz de Merkle compromete a todas las transacciones del bloque (ver blockchain.merkle) y permite
+demostrar que una transacción pertenece al bloque con una prueba de tamaño logarítmico.
+Todo lo anterior al nonce se serializa una sola vez por búsqueda, por lo que el costo de cada intento de
+PoW es constante sin importar cuántas transacciones tenga el bloque.
 """
 
 import hashlib
-import json
+import struct
 import time
 
+from blockchain.merkle import MerkleTree, txid_of, verify_proof
+from utils import metrics
+
+HEADER_PREFIX = struct.Struct(">Q19s32s32s")
+NONCE = struct.Struct(">Q")
+HEADER_SIZE = HEADER_PREFIX.size + NONCE.size
+PROGRESS_BATCH = 4096  # nonces entre actualizaciones del progreso en la minería de un solo hilo
+
+MINE_SECONDS = metrics.histogram("blockchain_mine_block_seconds", "Duración de la búsqueda del nonce de un bloque")
+HASHES = metrics.counter("blockchain_hashes_total", "Hashes calculados al minar")
+HASHRATE = metrics.gauge("blockchain_hashes_per_second", "Hashes por segundo del último bloque minado")
+
+
+def _observe_mining(hashes, seconds):
+    """
+    Registra las métricas de una búsqueda de nonce terminada.
+    """
+    MINE_SECONDS.observe(seconds)
+    HASHES.inc(hashes)
+    if seconds > 0:
+        HASHRATE.set(hashes / seconds)
+
+
+def difficulty_target(difficulty_prefix):
+    """
+    Convierte un prefijo de dificultad hexadecimal (e.g. '000') en el objetivo equivalente sobre el digest crudo.
+
+    Un digest cumple la dificultad si, comparado como bytes big-endian, es menor que el objetivo.
+
+    Args:
+        difficulty_prefix (str): Prefijo de ceros que el hash hexadecimal debe cumplir.
+
+    Returns:
+        bytes: Objetivo de 32 bytes.
+
+    Raises:
+        ValueError: Si el prefijo contiene caracteres distintos de '0' o es más largo que el hash.
+    """
+    if difficulty_prefix.strip("0") or len(difficulty_prefix) > 64:
+        raise ValueError(f"Prefijo de dificultad no soportado: {difficulty_prefix!r}")
+    if not difficulty_prefix:
+        return b"\xff" * 32 + b"\x00"
+    return (16 ** (64 - len(difficulty_prefix))).to_bytes(32, "big")
+
+
+def hash_to_bytes(hash_hex):
+    """
+    Convierte un hash hexadecimal en sus 32 bytes, rellenando con ceros a la izquierda (e.g. el prev_hash '0' del génesis).
+
+    Args:
+        hash_hex (str): Hash en formato hexadecimal.
+
+    Returns:
+        bytes: Hash de 32 bytes.
+    """
+    return bytes.fromhex(hash_hex.rjust(64, "0"))
+
 class Block:
     """
     Representa un bloque en una blockchain.
@@ -20,51 +86,268 @@ class Block:
         transactions (list): Lista de transacciones incluidas en el bloque.
         prev_hash (str): Hash del bloque anterior.
         nonce (int): Número utilizado para PoW. Se ajusta hasta cumplir la dificultad.
+        merkle_root (str): Raíz de Merkle de los identificadores de las transacciones.
         hash (str): Hash SHA-256 del contenido del bloque.
+
+    Un bloque reconstruido desde disco puede crearse solo con su cabecera (hash y raíz de Merkle
+    conocidos) y una función que carga sus transacciones la primera vez que se accede a ellas.
     """
 
-    def __init__(self, index, transactions, prev_hash, nonce=0, timestamp=None):
+    __slots__ = ("index", "timestamp", "_transactions", "_loader", "prev_hash", "nonce",
+                 "_merkle", "_merkle_root", "hash")
+
+    def __init__(self, index, transactions, prev_hash, nonce=0, timestamp=None,
+                 hash=None, merkle_root=None, loader=None):
         """
         Inicializa un nuevo bloque.
 
         Args:
             index (int): Índice del bloque.
-            transactions (list): Lista de transacciones (dicts) a incluir en el bloque.
+            transactions (list | None): Lista de transacciones (dicts) a incluir en el bloque.
+                Puede ser None si se indica loader.
             prev_hash (str): Hash del bloque anterior.
             nonce (int, opcional): Valor inicial del nonce. Por defecto es 0.
             timestamp (str, opcional): Timestamp del bloque. Si no se proporciona, se genera automáticamente.
+            hash (str, opcional): Hash ya conocido del bloque (al cargarlo desde disco); evita recalcularlo.
+            merkle_root (str, opcional): Raíz de Merkle ya conocida; evita reconstruir el árbol al cargar.
+            loader (callable, opcional): Función sin argumentos que devuelve las transacciones del bloque.
         """
         self.index = index
         self.timestamp = timestamp or time.strftime("%Y-%m-%d %H:%M:%S")
-        self.transactions = transactions
+        self._transactions = transactions
+        self._loader = loader
         self.prev_hash = prev_hash
         self.nonce = nonce
+        self._merkle = None
+        self._merkle_root = merkle_root
+        self.hash = hash if hash is not None else self.calculate_hash()
+
+    @property
+    def transactions(self):
+        """
+        list: Transacciones del bloque, cargadas desde disco en el primer acceso si el bloque es perezoso.
+        """
+        if self._transactions is None and self._loader is not None:
+            self._transactions = self._loader()
+            self._loader = None
+        return self._transactions
+
+    @transactions.setter
+    def transactions(self, transactions):
+        self._transactions = transactions
+        self._loader = None
+        self._merkle = None
+
+    @property
+    def is_loaded(self):
+        """
+        bool: True si las transacciones del bloque ya están en memoria.
+        """
+        return self._transactions is not None
+
+    def _tree(self):
+        """
+        Devuelve el árbol de Merkle del bloque, construyéndolo la primera vez que se necesita.
+        """
+        if self._merkle is None:
+            self._merkle = MerkleTree(txid_of(tx) for tx in self.transactions)
+            self._merkle_root = None
+        return self._merkle
+
+    @property
+    def merkle_root(self):
+        """
+        str: Raíz de Merkle de las transacciones del bloque.
+        """
+        if self._merkle_root is not None:
+            return self._merkle_root
+        return self._tree().root
+
+    def add_transaction(self, tx):
+        """
+        Agrega una transacción serializada al bloque actualizando el árbol de Merkle de forma incremental.
+
+        Args:
+            tx (dict): Transacción serializada.
+        """
+        tree = self._tree()
+        self.transactions.append(tx)
+        tree.append(txid_of(tx))
         self.hash = self.calculate_hash()
 
-    def calculate_hash(self):
+    def merkle_proof(self, txid):
         """
-        Calcula el hash SHA-256 del bloque a partir de su contenido.
+        Genera la prueba de inclusión de una transacción del bloque.
+
+        Args:
+            txid (str): Identificador de la transacción.
 
         Returns:
-            str: Hash SHA-256 del bloque como string hexadecimal.
+            list | None: Prueba de inclusión, o None si la transacción no está en el bloque.
+        """
+        return self._tree().proof(txid)
+
+    @staticmethod
+    def verify_merkle_proof(txid, proof, merkle_root):
         """
-        block_content = {
+        Verifica una prueba de inclusión sin necesitar las transacciones del bloque.
+
+        Args:
+            txid (str): Identificador de la transacción.
+            proof (list): Prueba generada por merkle_proof.
+            merkle_root (str): Raíz de Merkle del bloque (presente en su cabecera).
+
+        Returns:
+            bool: True si la prueba es válida.
+        """
+        return verify_proof(txid, proof, merkle_root)
+
+    def has_valid_merkle_root(self):
+        """
+        Comprueba que la raíz de Merkle corresponde a la lista actual de transacciones.
+
+        Returns:
+            bool: True si las transacciones no fueron alteradas desde que se construyó el árbol.
+        """
+        return MerkleTree(txid_of(tx) for tx in self.transactions).root == self.merkle_root
+
+    def to_dict(self):
+        """
+        Serializa el bloque como diccionario (usado para persistencia en JSON).
+
+        Returns:
+            dict: Datos del bloque, incluyendo la raíz de Merkle y su hash.
+        """
+        return {
             "index": self.index,
             "timestamp": self.timestamp,
             "transactions": self.transactions,
             "prev_hash": self.prev_hash,
-            "nonce": self.nonce
+            "merkle_root": self.merkle_root,
+            "nonce": self.nonce,
+            "hash": self.hash
         }
-        block_string = json.dumps(block_content, sort_keys=True)
-        return hashlib.sha256(block_string.encode()).hexdigest()
 
-    def mine_block(self, difficulty_prefix="000"):
+    def to_bytes(self):
+        """
+        Serializa el bloque en el formato binario canónico (ver blockchain.encoding).
+
+        Returns:
+            bytes: Cabecera y transacciones del bloque.
+
+        Raises:
+            ValueError: Si alguna transacción es anterior al formato binario.
+        """
+        from blockchain.encoding import encode_block  # encoding depende de este módulo
+        return encode_block(self)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Reconstruye un bloque desde su formato binario canónico.
+
+        Args:
+            data (bytes): Bloque serializado con to_bytes.
+
+        Returns:
+            Block: Bloque con su hash calculado sobre la cabecera.
+        """
+        from blockchain.encoding import decode_block_dict
+        d = decode_block_dict(data)
+        return cls(
+            index=d["index"],
+            transactions=d["transactions"],
+            prev_hash=d["prev_hash"],
+            nonce=d["nonce"],
+            timestamp=d["timestamp"],
+            hash=d["hash"],
+            merkle_root=d["merkle_root"]
+        )
+
+    def header_prefix(self):
+        """
+        Serializa la parte de la cabecera que no depende del nonce.
+
+        Returns:
+            bytes: index, timestamp, prev_hash y raíz de Merkle en formato fijo.
+        """
+        return HEADER_PREFIX.pack(
+            self.index,
+            self.timestamp.encode(),
+            hash_to_bytes(self.prev_hash),
+            bytes.fromhex(self.merkle_root)
+        )
+
+    def header(self):
+        """
+        Serializa la cabecera completa del bloque, incluyendo el nonce.
+
+        Returns:
+            bytes: Cabecera canónica de tamaño fijo (HEADER_SIZE bytes).
+        """
+        return self.header_prefix() + NONCE.pack(self.nonce)
+
+    def calculate_hash(self):
+        """
+        Calcula el hash SHA-256 del bloque a partir de su cabecera.
+
+        Returns:
+            str: Hash SHA-256 del bloque como string hexadecimal.
+        """
+        return hashlib.sha256(self.header()).hexdigest()
+
+    def mine_block(self, difficulty_prefix="000", miner=None, progress=None):
         """
         Ejecuta Prueba de Trabajo (PoW) buscando un nonce tal que el hash comience con un prefijo determinado.
 
         Args:
             difficulty_prefix (str): Prefijo que el hash debe cumplir (por defecto "000").
+            miner (ParallelMiner, opcional): Motor de minería paralela. Si no se indica, se mina en un solo hilo.
+            progress (MiningProgress, opcional): Progreso que se actualiza cada PROGRESS_BATCH nonces y
+                permite cancelar la búsqueda desde otro hilo.
+
+        Returns:
+            bool: True si se encontró un nonce válido, False si la minería fue cancelada.
         """
-        while not self.hash.startswith(difficulty_prefix):
-            self.nonce += 1
-            self.hash = self.calculate_hash()
+        start_nonce, start = self.nonce, time.perf_counter()
+        if miner is not None:
+            result = miner.mine(self, difficulty_prefix, progress)
+            if result is None:
+                return False
+            self.nonce = result.nonce
+            self.hash = result.hash
+            if metrics.enabled():
+                _observe_mining(result.hashes, result.duration)
+            return True
+
+        target = difficulty_target(difficulty_prefix)
+        base = hashlib.sha256(self.header_prefix())
+        pack_nonce = NONCE.pack
+        nonce = self.nonce
+        if progress is not None:
+            progress.start(nonce)
+        while True:
+            for _ in range(PROGRESS_BATCH):
+                h = base.copy()
+                h.update(pack_nonce(nonce))
+                digest = h.digest()
+                if digest < target:
+                    break
+                nonce += 1
+            else:
+                if progress is not None:
+                    progress.update(nonce - start_nonce, nonce)
+                    if progress.cancelled:
+                        progress.finish()
+                        return False
+                continue
+            break
+
+        self.nonce = nonce
+        self.hash = digest.hex()
+        if progress is not None:
+            progress.update(nonce - start_nonce + 1, nonce)
+            progress.finish()
+        if metrics.enabled():
+            _observe_mining(nonce - start_nonce + 1, time.perf_counter() - start)
+        return True
@@ -4,38 +4,412 @@ blockchain.py
 Este módulo define la clase Blockchain, responsable de mantener la cadena de bloques.
 Incluye la creación del bloque génesis, validación de la cadena, adición de nuevos bloques
 y mecanismos de minería basados en dificultad por prefijo.
+
+La validación es incremental: la cadena recuerda la altura que ya validó y solo revisa los bloques
+nuevos. La revalidación completa calcula los hashes en paralelo, por fragmentos, en varios procesos
+y después comprueba los enlaces prev_hash en una sola pasada.
+
+La cadena mantiene índices hash -> altura, txid -> (altura, posición) y dirección -> txids, que se
+actualizan al agregar bloques y se reconstruyen al asignar una cadena nueva (por ejemplo, al cargarla).
+Los índices de transacciones se completan en la primera consulta, para no cargar desde disco las
+transacciones de los bloques perezosos al arrancar.
+
+La elección entre ramas se hace por trabajo acumulado (el número esperado de hashes para minar cada
+bloque), no por longitud. connect_block y disconnect_block agregan y quitan el último bloque con sus
+entradas de los índices, de modo que una reorganización de profundidad k cuesta O(k) bloques.
 """
 
-from blockchain.block import Block
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from blockchain.block import Block, HEADER_PREFIX
+from blockchain.encoding import transaction_id
+from blockchain.merkle import MerkleTree, txid_of
+from blockchain.mining import ParallelMiner
+from utils import metrics
+from utils.procesos import contexto_procesos
+
+VALIDATE_SECONDS = metrics.histogram("blockchain_validate_chain_seconds", "Duración de la validación de la cadena")
+BLOCKS_VALIDATED = metrics.counter("blockchain_blocks_validated_total", "Bloques revisados al validar la cadena")
+
+
+class ValidationResult:
+    """
+    Resultado de validar la cadena.
+
+    Atributos:
+        valid (bool): True si la cadena es válida.
+        invalid_height (int | None): Altura del primer bloque inválido, o None si la cadena es válida.
+        reason (str | None): Motivo por el que el bloque es inválido.
+        checked (int): Número de bloques revisados.
+    """
+
+    def __init__(self, valid, invalid_height=None, reason=None, checked=0):
+        self.valid = valid
+        self.invalid_height = invalid_height
+        self.reason = reason
+        self.checked = checked
+
+    def __bool__(self):
+        return self.valid
+
+    def __repr__(self):
+        if self.valid:
+            return f"ValidationResult(valid=True, checked={self.checked})"
+        return f"ValidationResult(valid=False, invalid_height={self.invalid_height}, reason={self.reason!r})"
+
+
+def _hash_blocks(items):
+    """
+    Recalcula la raíz de Merkle y el hash de un fragmento de bloques. Se ejecuta en un proceso worker.
+
+    Args:
+        items (list): Pares (transacciones, cabecera serializada).
+
+    Returns:
+        list: Pares (la raíz de Merkle coincide con la cabecera, hash hexadecimal de la cabecera).
+    """
+    results = []
+    for transactions, header in items:
+        merkle_root = HEADER_PREFIX.unpack(header[:HEADER_PREFIX.size])[3]
+        root = MerkleTree(txid_of(tx) for tx in transactions).root
+        results.append((root == merkle_root.hex(), hashlib.sha256(header).hexdigest()))
+    return results
+
 
 class Blockchain:
     """
     Representa una cadena de bloques.
 
     Atributos:
-        chain (list): Lista de bloques en la cadena.
+        chain (list): Lista de bloques en la cadena. Asignarla reconstruye los índices; los bloques
+            nuevos deben agregarse con add_block.
         difficulty (str): Prefijo de dificultad para minería (e.g. '000').
+        workers (int): Número de procesos usados para minar (1 = minería en un solo hilo).
     """
 
-    def __init__(self):
+    def __init__(self, workers=1, create_genesis=True):
         """
         Inicializa la blockchain con un bloque génesis.
+
+        Args:
+            workers (int): Número de procesos para la minería paralela. Por defecto 1.
+            create_genesis (bool): Si es False, la cadena empieza vacía (por ejemplo, cuando se va a
+                cargar desde disco) y no se mina un génesis que luego se descartaría.
         """
-        self.chain = []
         self.difficulty = "000"
-        self.create_genesis_block()
+        self.workers = workers
+        self._miner = None
+        self._validated_height = 0
+        self._validated_hash = None
+        self._index_lock = threading.Lock()  # dos lecturas pueden completar los índices a la vez
+        self.chain = []
+        if create_genesis:
+            self.create_genesis_block()
+
+    @property
+    def chain(self):
+        return self._chain
+
+    @chain.setter
+    def chain(self, chain):
+        self._chain = chain
+        self._heights = {block.hash: height for height, block in enumerate(chain)}
+        self._tx_index = {}        # {"txid": (altura, posición)}
+        self._address_index = {}   # {"direccion": ["txid", ...]} en orden de la cadena
+        self._tx_indexed = 0       # bloques ya incluidos en los índices de transacciones
+        self._work = []            # trabajo acumulado hasta cada altura
+        for block in chain:
+            self._work.append(self.chain_work() + self.block_work(block))
+
+    def _append_block(self, block):
+        """
+        Agrega un bloque al final de la cadena y a los índices. Los índices de transacciones solo se
+        actualizan si ya estaban completos; si no, se completan en la próxima consulta.
+        """
+        self._work.append(self.chain_work() + self.block_work(block))
+        self._chain.append(block)
+        self._heights[block.hash] = block.index
+        if self._tx_indexed == block.index:
+            self._index_transactions()
+
+    def _addresses_of(self, tx):
+        """
+        Devuelve las direcciones que toca una transacción: las que reciben sus salidas y las dueñas
+        de las salidas que gasta (si están en la cadena).
+        """
+        addresses = {o["direccion"] for o in tx.get("outputs", [])}
+        if "direccion" in tx:
+            addresses.add(tx["direccion"])
+        for inp in tx.get("inputs", []):
+            owner = self.output_owner(inp["txid"], inp["index"])
+            if owner is not None:
+                addresses.add(owner)
+        return addresses
+
+    def _index_transactions(self):
+        """
+        Agrega a los índices de transacciones los bloques que aún no están en ellos.
+        """
+        with self._index_lock:
+            while self._tx_indexed < len(self._chain):
+                height = self._tx_indexed
+                for position, tx in enumerate(self._chain[height].transactions):
+                    txid = txid_of(tx)
+                    self._tx_index[txid] = (height, position)
+                    for address in self._addresses_of(tx):
+                        self._address_index.setdefault(address, []).append(txid)
+                self._tx_indexed += 1
+
+    def block_work(self, block):
+        """
+        Devuelve el trabajo de un bloque: el número esperado de hashes para cumplir la dificultad.
+
+        Los bloques no guardan su dificultad: es un parámetro fijo de la cadena (self.difficulty) que
+        todos los bloques cumplen, así que todos tienen el mismo trabajo y el bloque no se consulta.
+        Si la dificultad cambiara entre bloques, el trabajo debería calcularse a partir del objetivo
+        con el que se minó cada uno (block.difficulty_target) y guardarse en el bloque.
+
+        Args:
+            block (Block): Bloque (no se usa; la dificultad es la de la cadena).
+
+        Returns:
+            int: Trabajo del bloque.
+        """
+        return 16 ** len(self.difficulty)
+
+    def chain_work(self, height=None):
+        """
+        Devuelve el trabajo acumulado de la cadena hasta una altura. Como todos los bloques tienen el
+        mismo trabajo (ver block_work), es proporcional a la altura: (altura + 1) × block_work.
+
+        Args:
+            height (int, opcional): Altura (inclusive). Por defecto, la del último bloque.
+
+        Returns:
+            int: Trabajo acumulado, 0 si la cadena está vacía.
+        """
+        if not self._work:
+            return 0
+        return self._work[-1 if height is None else height]
+
+    def branch_work(self, blocks):
+        """
+        Calcula el trabajo acumulado que tendría la cadena al reemplazar sus bloques por una rama.
+        Con la dificultad fija de la cadena, una rama tiene más trabajo exactamente cuando es más larga.
+
+        Args:
+            blocks (list): Bloques de la rama, en orden; el primero debe enlazar con un bloque de la cadena.
+
+        Returns:
+            int | None: Trabajo acumulado de la rama, o None si no enlaza con la cadena.
+        """
+        fork = self._heights.get(blocks[0].prev_hash) if blocks else None
+        if fork is None:
+            return None
+        return self.chain_work(fork) + sum(self.block_work(b) for b in blocks)
+
+    def check_block(self, block, prev):
+        """
+        Comprueba un bloque contra su predecesor: raíz de Merkle, hash, enlace y dificultad.
+
+        Args:
+            block (Block): Bloque a comprobar.
+            prev (Block): Bloque anterior.
+
+        Returns:
+            str | None: Motivo por el que el bloque es inválido, o None si es válido.
+        """
+        if block.index != prev.index + 1 or block.prev_hash != prev.hash:
+            return "prev_hash no enlaza con el bloque anterior"
+        if not block.has_valid_merkle_root():
+            return "las transacciones no corresponden a la raíz de Merkle"
+        if block.hash != block.calculate_hash():
+            return "el hash almacenado no corresponde al contenido del bloque"
+        if not block.hash.startswith(self.difficulty):
+            return "el hash no cumple la dificultad"
+        return None
+
+    def connect_block(self, block):
+        """
+        Agrega al final de la cadena un bloque ya minado (por ejemplo, recibido de otro nodo).
+
+        Args:
+            block (Block): Bloque cuyo prev_hash es el hash del último bloque.
+
+        Raises:
+            ValueError: Si el bloque no es válido como sucesor del último bloque.
+        """
+        reason = self.check_block(block, self.get_last_block())
+        if reason is not None:
+            raise ValueError(f"Bloque #{block.index} rechazado: {reason}")
+        self._append_block(block)
+
+    def disconnect_block(self):
+        """
+        Quita el último bloque de la cadena y sus entradas de los índices, en O(tamaño del bloque).
+
+        Returns:
+            Block: Bloque desconectado.
+
+        Raises:
+            ValueError: Si el último bloque es el génesis.
+        """
+        if len(self._chain) <= 1:
+            raise ValueError("No se puede desconectar el bloque génesis")
+        block = self._chain[-1]
+        height = len(self._chain) - 1
+
+        if self._tx_indexed > height:
+            txids = []
+            addresses = set()
+            for tx in block.transactions:
+                txids.append(txid_of(tx))
+                addresses |= self._addresses_of(tx)
+            removed = set(txids)
+            for address in addresses:
+                listed = self._address_index.get(address, [])
+                while listed and listed[-1] in removed:
+                    listed.pop()
+                if not listed:
+                    self._address_index.pop(address, None)
+            for txid in txids:
+                self._tx_index.pop(txid, None)
+            self._tx_indexed = height
+
+        self._chain.pop()
+        self._work.pop()
+        self._heights.pop(block.hash, None)
+        if self._validated_height >= height:
+            self._validated_height = height - 1
+            self._validated_hash = self._chain[-1].hash
+        return block
+
+    def height_of(self, block_hash):
+        """
+        Devuelve la altura de un bloque a partir de su hash.
+
+        Args:
+            block_hash (str): Hash del bloque.
+
+        Returns:
+            int | None: Altura, o None si el bloque no está en la cadena.
+        """
+        return self._heights.get(block_hash)
+
+    def get_block_by_hash(self, block_hash):
+        """
+        Recupera un bloque por su hash.
+
+        Args:
+            block_hash (str): Hash del bloque.
+
+        Returns:
+            Block | None: Bloque, o None si no está en la cadena.
+        """
+        height = self._heights.get(block_hash)
+        return None if height is None else self._chain[height]
+
+    def locate_transaction(self, txid):
+        """
+        Devuelve la ubicación de una transacción confirmada.
+
+        Args:
+            txid (str): Identificador de la transacción.
+
+        Returns:
+            tuple | None: (altura del bloque, posición dentro del bloque), o None si no está en la cadena.
+        """
+        self._index_transactions()
+        return self._tx_index.get(txid)
+
+    def get_transaction(self, txid):
+        """
+        Recupera una transacción confirmada por su txid.
+
+        Args:
+            txid (str): Identificador de la transacción.
+
+        Returns:
+            dict | None: Transacción serializada, o None si no está en la cadena.
+        """
+        location = self.locate_transaction(txid)
+        if location is None:
+            return None
+        height, position = location
+        return self._chain[height].transactions[position]
+
+    def output_owner(self, txid, index):
+        """
+        Devuelve la dirección dueña de una salida confirmada (esté gastada o no).
+
+        Args:
+            txid (str): Transacción que creó la salida.
+            index (int): Índice de la salida.
+
+        Returns:
+            str | None: Dirección, o None si la salida no está en la cadena.
+        """
+        location = self._tx_index.get(txid)
+        if location is None:
+            return None
+        outputs = self._chain[location[0]].transactions[location[1]].get("outputs", [])
+        return outputs[index]["direccion"] if 0 <= index < len(outputs) else None
+
+    def transactions_for_address(self, address):
+        """
+        Devuelve los txids de las transacciones confirmadas que pagan a una dirección o gastan sus salidas.
+        Las entradas que gastan salidas creadas fuera de la cadena (por ejemplo, fondeos) no se atribuyen.
+
+        Args:
+            address (str): Dirección a consultar.
+
+        Returns:
+            list: Txids en orden de la cadena.
+        """
+        self._index_transactions()
+        return list(self._address_index.get(address, []))
+
+    def _get_miner(self, workers=None):
+        """
+        Devuelve el motor de minería paralela para el número de workers indicado.
+
+        Args:
+            workers (int, opcional): Número de procesos. Si no se indica, se usa self.workers.
+
+        Returns:
+            ParallelMiner | None: Motor de minería, o None si se mina en un solo hilo.
+        """
+        workers = workers or self.workers
+        if workers <= 1:
+            self._miner = None
+        elif self._miner is None or self._miner.workers != workers:
+            self._miner = ParallelMiner(workers)
+        return self._miner
+
+    def cancel_mining(self):
+        """
+        Cancela la minería paralela en curso, si existe.
+        """
+        if self._miner is not None:
+            self._miner.cancel()
 
     def create_genesis_block(self):
         """
         Crea el bloque génesis con una transacción coinbase inicial.
         """
+        coinbase = {"tipo": "coinbase", "direccion": "GENESIS", "cantidad": 1000, "altura": 0}
+        coinbase["txid"] = transaction_id(coinbase)
         genesis_block = Block(
             index=0,
-            transactions=[{"tipo": "coinbase", "direccion": "GENESIS", "cantidad": 1000}],
+            transactions=[coinbase],
             prev_hash="0"
         )
-        genesis_block.mine_block(self.difficulty)
-        self.chain.append(genesis_block)
+        genesis_block.mine_block(self.difficulty, self._get_miner())
+        self._append_block(genesis_block)
 
     def get_last_block(self):
         """
@@ -46,49 +420,135 @@ class Blockchain:
         """
         return self.chain[-1]
 
-    def add_block(self, transactions):
+    def add_block(self, transactions, workers=None, progress=None):
         """
         Agrega un nuevo bloque a la cadena con las transacciones proporcionadas.
 
         Args:
             transactions (list): Lista de transacciones a incluir en el nuevo bloque.
+            workers (int, opcional): Número de procesos para minar este bloque. Si no se indica, se usa self.workers.
+            progress (MiningProgress, opcional): Progreso de la búsqueda del nonce, que también permite cancelarla.
+
+        Returns:
+            Block | None: Bloque agregado, o None si la minería fue cancelada.
+        """
+        new_block = self.new_block(transactions)
+        if not self.mine(new_block, workers, progress):
+            return None
+        self._append_block(new_block)
+        return new_block
+
+    def new_block(self, transactions):
+        """
+        Crea, sin minarlo, un bloque con las transacciones que enlaza con el último bloque de la cadena.
+
+        Args:
+            transactions (list): Lista de transacciones (dicts).
+
+        Returns:
+            Block: Bloque sin Prueba de Trabajo.
         """
         prev_block = self.get_last_block()
-        new_block = Block(
+        return Block(
             index=prev_block.index + 1,
             transactions=transactions,
             prev_hash=prev_block.hash
         )
-        new_block.mine_block(self.difficulty)
-        self.chain.append(new_block)
 
-    def is_valid_chain(self):
+    def mine(self, block, workers=None, progress=None):
+        """
+        Busca el nonce de un bloque con la dificultad de la cadena, sin agregarlo. No lee ni modifica
+        la cadena, así que puede ejecutarse mientras otros hilos la consultan.
+
+        Args:
+            block (Block): Bloque a minar.
+            workers (int, opcional): Número de procesos. Si no se indica, se usa self.workers.
+            progress (MiningProgress, opcional): Progreso de la búsqueda, que también permite cancelarla.
+
+        Returns:
+            bool: True si se encontró el nonce, False si la minería fue cancelada.
+        """
+        return block.mine_block(self.difficulty, self._get_miner(workers), progress)
+
+    def is_valid_chain(self, full=False, workers=None):
         """
-        Verifica la validez de toda la cadena.
+        Verifica la validez de la cadena.
+
+        Args:
+            full (bool): Si es True, revalida desde el génesis aunque ya se hubieran validado bloques.
+            workers (int, opcional): Procesos para la revalidación completa.
 
         Returns:
             bool: True si la cadena es válida, False si hay una inconsistencia.
         """
-        for i in range(1, len(self.chain)):
-            curr = self.chain[i]
-            prev = self.chain[i - 1]
+        return self.validate_chain(full=full, workers=workers).valid
+
+    def validate_chain(self, full=False, workers=None, min_parallel=256):
+        """
+        Valida la cadena e informa cuál es el primer bloque inválido.
+
+        Por defecto solo revisa los bloques agregados desde la última validación exitosa. Si la cadena
+        cambió por debajo de esa altura (por ejemplo, al recargarla), o si full es True, revalida
+        todo: los hashes se calculan en paralelo por fragmentos y los enlaces se comprueban después.
+
+        Args:
+            full (bool): Si es True, fuerza la revalidación completa.
+            workers (int, opcional): Procesos para calcular hashes. Por defecto, el número de CPUs.
+            min_parallel (int): Mínimo de bloques a revisar para usar el pool de procesos.
+
+        Returns:
+            ValidationResult: Resultado con la altura y el motivo del primer bloque inválido.
+        """
+        started = time.perf_counter()
+        start = 1
+        if not full and self._validated_hash is not None and self._validated_height < len(self.chain) \
+                and self.chain[self._validated_height].hash == self._validated_hash:
+            start = self._validated_height + 1
+
+        blocks = self.chain[start:]
+        workers = max(1, workers or os.cpu_count() or 1)
+        items = [(b.transactions, b.header()) for b in blocks]
+        if workers > 1 and len(items) >= min_parallel:
+            chunk = -(-len(items) // (workers * 4))
+            chunks = [items[i:i + chunk] for i in range(0, len(items), chunk)]
+            with ProcessPoolExecutor(max_workers=workers, mp_context=contexto_procesos()) as executor:
+                computed = [r for part in executor.map(_hash_blocks, chunks) for r in part]
+        else:
+            computed = _hash_blocks(items)
 
-            # Verificar hash actual
-            if curr.hash != curr.calculate_hash():
-                return False
-            # Verificar enlace con bloque anterior
-            if curr.prev_hash != prev.hash:
-                return False
-            # Verificar cumplimiento de PoW
-            if not curr.hash.startswith(self.difficulty):
-                return False
+        result = None
+        for offset, (block, (merkle_ok, block_hash)) in enumerate(zip(blocks, computed)):
+            prev = self.chain[start + offset - 1]
+            if not merkle_ok:
+                reason = "las transacciones no corresponden a la raíz de Merkle"
+            elif block.hash != block_hash:
+                reason = "el hash almacenado no corresponde al contenido del bloque"
+            elif block.prev_hash != prev.hash:
+                reason = "prev_hash no enlaza con el bloque anterior"
+            elif not block.hash.startswith(self.difficulty):
+                reason = "el hash no cumple la dificultad"
+            else:
+                continue
+            result = ValidationResult(False, start + offset, reason, offset + 1)
+            break
 
-        return True
+        if result is None:
+            result = ValidationResult(True, checked=len(blocks))
+            last_valid = len(self.chain) - 1
+        else:
+            last_valid = result.invalid_height - 1
+        self._validated_height = last_valid
+        self._validated_hash = self.chain[last_valid].hash
+        VALIDATE_SECONDS.observe(time.perf_counter() - started)
+        BLOCKS_VALIDATED.inc(result.checked)
+        return result
 
     @staticmethod
     def crear_bloque_desde_dict(data):
         """
         Crea un objeto Block a partir de un diccionario serializado (usado en carga desde JSON).
+        El hash y la raíz de Merkle guardados se reutilizan en lugar de recalcularse; la validación
+        de la cadena los contrasta con el contenido del bloque.
 
         Args:
             data (dict): Diccionario con los datos del bloque.
@@ -96,13 +556,12 @@ class Blockchain:
         Returns:
             Block: Objeto de tipo Block recreado con sus atributos.
         """
-        from blockchain.block import Block
-        b = Block(
+        return Block(
             index=data["index"],
             transactions=data["transactions"],
             prev_hash=data["prev_hash"],
             nonce=data["nonce"],
-            timestamp=data["timestamp"]
+            timestamp=data["timestamp"],
+            hash=data["hash"],
+            merkle_root=data.get("merkle_root")
         )
-        b.hash = data["hash"]
-        return b
@@ -0,0 +1,215 @@
+"""
+coin_selection.py
+
+Este módulo define las estrategias de selección de monedas (UTXOs) usadas al construir una transacción.
+Todas trabajan sobre la lista por dirección ordenada por cantidad que mantiene UTXOManager:
+
+- largest_first: toma los UTXOs de mayor a menor cantidad hasta cubrir el objetivo (mínimo de entradas).
+- branch_and_bound: busca un subconjunto cuya suma coincida con el objetivo sin generar cambio;
+  si no lo encuentra dentro del límite de intentos, recurre a largest_first.
+- smallest_sufficient: toma el UTXO individual más pequeño que cubre el objetivo (búsqueda por bisección);
+  si ninguno alcanza, recurre a largest_first.
+
+Cada estrategia devuelve un SelectionResult con las entradas usadas y el cambio generado, lo que permite
+medir su efecto en el costo de firma (número de entradas) y en el crecimiento del conjunto UTXO (salidas de cambio).
+"""
+
+import bisect
+
+EPSILON = 1e-9
+
+
+class SelectionResult:
+    """
+    Resultado de una selección de monedas.
+
+    Atributos:
+        strategy (str): Estrategia que produjo la selección.
+        inputs (list): Pares ('txid:index', utxo) seleccionados.
+        total (float): Suma de las cantidades seleccionadas.
+        target (float): Cantidad que debía cubrirse (monto + comisión).
+        change (float): Cambio que se devolverá al remitente.
+    """
+
+    def __init__(self, strategy, inputs, total, target):
+        self.strategy = strategy
+        self.inputs = inputs
+        self.total = total
+        self.target = target
+        self.change = max(0.0, total - target)
+        if self.change < EPSILON:
+            self.change = 0.0
+
+    @property
+    def num_inputs(self):
+        """
+        int: Número de entradas que habrá que firmar y verificar.
+        """
+        return len(self.inputs)
+
+    @property
+    def creates_change(self):
+        """
+        bool: True si la transacción necesitará una salida de cambio (un UTXO nuevo para el remitente).
+        """
+        return self.change > 0
+
+    def __repr__(self):
+        return (f"SelectionResult(strategy={self.strategy!r}, inputs={self.num_inputs}, "
+                f"total={self.total}, change={self.change})")
+
+
+def _available(utxo_manager, direccion, exclude):
+    """
+    Devuelve la lista ordenada de (cantidad, outpoint) de la dirección sin los outpoints excluidos.
+    """
+    ordered = utxo_manager.get_sorted_utxos(direccion)
+    if not exclude:
+        return ordered
+    return [entry for entry in ordered if entry[1] not in exclude]
+
+
+def _result(strategy, utxo_manager, direccion, entries, target):
+    inputs = [(outpoint, utxo_manager.get_utxo(outpoint)) for _, outpoint in entries]
+    return SelectionResult(strategy, inputs, sum(amount for amount, _ in entries), target)
+
+
+def largest_first(utxo_manager, direccion, target, exclude=None):
+    """
+    Selecciona UTXOs de mayor a menor cantidad hasta cubrir el objetivo.
+
+    Args:
+        utxo_manager (UTXOManager): Gestor del conjunto UTXO.
+        direccion (str): Dirección del remitente.
+        target (float): Cantidad a cubrir.
+        exclude (set, opcional): Outpoints que no pueden usarse (e.g. ya gastados en el mempool).
+
+    Returns:
+        SelectionResult | None: Selección, o None si los fondos no alcanzan.
+    """
+    ordered = utxo_manager.get_sorted_utxos(direccion)
+    chosen = []
+    total = 0.0
+    for amount, outpoint in reversed(ordered):
+        if exclude and outpoint in exclude:
+            continue
+        chosen.append((amount, outpoint))
+        total += amount
+        if total >= target - EPSILON:
+            return _result("largest_first", utxo_manager, direccion, chosen, target)
+    return None
+
+
+def smallest_sufficient(utxo_manager, direccion, target, exclude=None):
+    """
+    Selecciona el UTXO individual más pequeño cuya cantidad cubre el objetivo, localizado por bisección.
+    Si ningún UTXO alcanza por sí solo, recurre a largest_first.
+
+    Args:
+        utxo_manager (UTXOManager): Gestor del conjunto UTXO.
+        direccion (str): Dirección del remitente.
+        target (float): Cantidad a cubrir.
+        exclude (set, opcional): Outpoints que no pueden usarse.
+
+    Returns:
+        SelectionResult | None: Selección, o None si los fondos no alcanzan.
+    """
+    ordered = utxo_manager.get_sorted_utxos(direccion)
+    i = bisect.bisect_left(ordered, (target - EPSILON,))
+    while i < len(ordered):
+        amount, outpoint = ordered[i]
+        if not exclude or outpoint not in exclude:
+            return _result("smallest_sufficient", utxo_manager, direccion, [(amount, outpoint)], target)
+        i += 1
+    return largest_first(utxo_manager, direccion, target, exclude)
+
+
+def branch_and_bound(utxo_manager, direccion, target, exclude=None, cost_of_change=0.0, max_tries=100000):
+    """
+    Busca un subconjunto de UTXOs cuya suma esté en [target, target + cost_of_change], de modo que la
+    transacción no necesite salida de cambio. Explora en profundidad los UTXOs ordenados de mayor a menor,
+    podando las ramas que se pasan del objetivo o que ya no pueden alcanzarlo. Si no encuentra coincidencia
+    dentro de max_tries, recurre a largest_first.
+
+    Args:
+        utxo_manager (UTXOManager): Gestor del conjunto UTXO.
+        direccion (str): Dirección del remitente.
+        target (float): Cantidad a cubrir.
+        exclude (set, opcional): Outpoints que no pueden usarse.
+        cost_of_change (float): Exceso tolerado sobre el objetivo (se cede al minero como comisión).
+        max_tries (int): Límite de nodos explorados.
+
+    Returns:
+        SelectionResult | None: Selección, o None si los fondos no alcanzan.
+    """
+    candidates = list(reversed(_available(utxo_manager, direccion, exclude)))
+    values = [amount for amount, _ in candidates]
+    n = len(values)
+    remaining = [0.0] * (n + 1)
+    for i in range(n - 1, -1, -1):
+        remaining[i] = remaining[i + 1] + values[i]
+
+    if remaining[0] < target - EPSILON:
+        return None
+
+    upper = target + cost_of_change + EPSILON
+    lower = target - EPSILON
+    selected = []
+    current = 0.0
+    i = 0
+    for _ in range(max_tries):
+        if current > upper or current + remaining[i] < lower:
+            backtrack = True
+        elif current >= lower:
+            result = _result("branch_and_bound", utxo_manager, direccion, [candidates[j] for j in selected], target)
+            # El exceso dentro de la tolerancia no genera salida de cambio.
+            result.change = 0.0
+            return result
+        elif i == n:
+            backtrack = True
+        else:
+            selected.append(i)
+            current += values[i]
+            i += 1
+            continue
+
+        if backtrack:
+            if not selected:
+                break
+            j = selected.pop()
+            current -= values[j]
+            # Excluir j y saltar los UTXOs de igual cantidad: sus subconjuntos ya fueron explorados.
+            i = j + 1
+            while i < n and values[i] == values[j]:
+                i += 1
+
+    return largest_first(utxo_manager, direccion, target, exclude)
+
+
+STRATEGIES = {
+    "largest_first": largest_first,
+    "branch_and_bound": branch_and_bound,
+    "smallest_sufficient": smallest_sufficient,
+}
+
+
+def select_coins(utxo_manager, direccion, target, strategy="largest_first", exclude=None):
+    """
+    Selecciona UTXOs de una dirección usando la estrategia indicada.
+
+    Args:
+        utxo_manager (UTXOManager): Gestor del conjunto UTXO.
+        direccion (str): Dirección del remitente.
+        target (float): Cantidad a cubrir (monto + comisión).
+        strategy (str): Nombre de la estrategia (ver STRATEGIES).
+        exclude (set, opcional): Outpoints que no pueden usarse.
+
+    Returns:
+        SelectionResult | None: Selección, o None si los fondos no alcanzan.
+
+    Raises:
+        ValueError: Si la estrategia no existe.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Estrategia de selección desconocida: {strategy!r}")
+    return STRATEGIES[strategy](utxo_manager, direccion, target, exclude=exclude)
@@ -0,0 +1,450 @@
+"""
+encoding.py
+
+Este módulo define la serialización binaria canónica (versión 2) de transacciones y bloques.
+
+Los campos que en memoria son hexadecimales (txids, direcciones, firmas, claves públicas) se guardan como bytes crudos,
+los enteros como varint (LEB128) y las cantidades como double big-endian:
+
+    referencia   0x00 + 32 bytes (hash hexadecimal de 64 caracteres)
+                 0x01 + varint(longitud) + UTF-8 (identificadores como 'fund_ana' o 'MINERO')
+    transacción  versión | tipo | contenido
+                 tipo 0 (transferencia): varint(#entradas) + [txid (ref) | index (varint) | varint(len) + firma
+                                                               | varint(len) + clave pública]
+                                         varint(#salidas) + [dirección (ref) | cantidad (double)] | fee (double)
+                 tipo 1 (coinbase) y 2 (recompensa): dirección (ref) | cantidad (double) | altura (varint)
+    bloque       versión | cabecera (HEADER_SIZE bytes) | varint(#tx) + [varint(len) + transacción]
+
+Reglas de hash definidas sobre esta forma:
+
+- txid = SHA-256(transacción serializada). El txid no forma parte de la serialización. Las coinbase
+  y recompensas incluyen la altura de su bloque para que dos recompensas iguales no compartan txid.
+- Mensaje firmado por cada entrada = versión | 0xFF | txid y index de la entrada | salidas | fee.
+  La clave pública de la entrada no se firma, pero forma parte del txid; un nodo comprueba que su
+  SHA-256 es la dirección dueña de la salida gastada y verifica la firma con ella, sin necesitar la
+  wallet del remitente.
+- Hash del bloque = SHA-256(cabecera) (ver blockchain.block).
+
+También define el formato compacto de los datos para deshacer un bloque (las salidas que gastó).
+
+Las transacciones guardadas antes de este formato tienen txids calculados sobre JSON; encode_block
+las rechaza con ValueError para que quien guarda pueda conservarlas en JSON. Los datos de la versión 1
+(entradas sin clave pública) no se decodifican.
+
+Los decodificadores reciben bytes de otros nodos, así que comprueban los límites del buffer: datos
+truncados, sobrantes o mal formados se rechazan con ValueError (nunca IndexError ni struct.error).
+"""
+
+import hashlib
+import struct
+
+from blockchain.block import HEADER_PREFIX, HEADER_SIZE, NONCE, hash_to_bytes
+
+VERSION = 2
+TX_TRANSFER = 0
+TX_COINBASE = 1
+TX_REWARD = 2
+SIGHASH = 0xFF
+
+_KINDS = {"coinbase": TX_COINBASE, "recompensa": TX_REWARD}
+_KIND_NAMES = {v: k for k, v in _KINDS.items()}
+_INPUT_FIELDS = (("signature", "firma"), ("public_key", "clave pública"))  # campos opcionales de cada entrada
+
+_REF_HASH = 0
+_REF_TEXT = 1
+_AMOUNT = struct.Struct(">d")
+_HEX = frozenset("0123456789abcdef")
+
+
+# --- Primitivas ---
+
+def _put_varint(out, n):
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _get_varint(data, pos):
+    try:
+        n = data[pos]
+        if n < 0x80:
+            return n, pos + 1
+        n = shift = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            n |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return n, pos
+            shift += 7
+            if shift > 63:
+                raise ValueError("Varint de más de 64 bits")
+    except IndexError:
+        raise ValueError("Datos truncados: varint incompleto") from None
+
+
+def _get_bytes(data, pos, length):
+    end = pos + length
+    if end > len(data):
+        raise ValueError(f"Datos truncados: se esperaban {length} bytes en la posición {pos}")
+    return data[pos:end], end
+
+
+def _get_amount(data, pos):
+    try:
+        return _AMOUNT.unpack_from(data, pos)[0], pos + _AMOUNT.size
+    except struct.error:
+        raise ValueError(f"Datos truncados: falta una cantidad en la posición {pos}") from None
+
+
+def _put_ref(out, text):
+    if len(text) == 64 and _HEX.issuperset(text):
+        out.append(_REF_HASH)
+        out += bytes.fromhex(text)
+    else:
+        data = text.encode()
+        out.append(_REF_TEXT)
+        _put_varint(out, len(data))
+        out += data
+
+
+def _get_ref(data, pos):
+    if pos + 33 <= len(data) and data[pos] == _REF_HASH:
+        return data[pos + 1:pos + 33].hex(), pos + 33
+    (tag,), pos = _get_bytes(data, pos, 1)
+    if tag == _REF_HASH:
+        raise ValueError(f"Datos truncados: hash incompleto en la posición {pos}")
+    if tag != _REF_TEXT:
+        raise ValueError(f"Referencia con etiqueta desconocida: {tag}")
+    length, pos = _get_varint(data, pos)
+    raw, pos = _get_bytes(data, pos, length)
+    return bytes(raw).decode(), pos  # UnicodeDecodeError es un ValueError
+
+
+def _put_outputs(out, outputs, fee):
+    _put_varint(out, len(outputs))
+    for output in outputs:
+        _put_ref(out, output["direccion"])
+        out += _AMOUNT.pack(output["cantidad"])
+    out += _AMOUNT.pack(fee)
+
+
+def encode_outputs(outputs, fee):
+    """
+    Serializa las salidas y la comisión de una transacción (la parte común a los mensajes que firman
+    todas sus entradas).
+
+    Args:
+        outputs (list): Salidas (dicts con direccion y cantidad).
+        fee (float): Comisión.
+
+    Returns:
+        bytes: Salidas y comisión serializadas.
+    """
+    out = bytearray()
+    _put_outputs(out, outputs, fee)
+    return bytes(out)
+
+
+# --- Transacciones ---
+
+def encode_transfer(inputs, outputs, fee):
+    """
+    Serializa una transferencia a partir de sus componentes.
+
+    Args:
+        inputs (list): Entradas (dicts con txid, index y, si está firmada, signature y public_key).
+        outputs (list): Salidas (dicts con direccion y cantidad).
+        fee (float): Comisión.
+
+    Returns:
+        bytes: Transacción serializada.
+    """
+    out = bytearray((VERSION, TX_TRANSFER))
+    _put_varint(out, len(inputs))
+    for inp in inputs:
+        _put_ref(out, inp["txid"])
+        _put_varint(out, inp["index"])
+        signature = bytes.fromhex(inp.get("signature", ""))
+        _put_varint(out, len(signature))
+        out += signature
+        public_key = bytes.fromhex(inp.get("public_key", ""))
+        _put_varint(out, len(public_key))
+        out += public_key
+    _put_outputs(out, outputs, fee)
+    return bytes(out)
+
+
+def encode_transaction(tx):
+    """
+    Serializa una transacción guardada en un bloque (transferencia, coinbase o recompensa).
+
+    Args:
+        tx (dict): Transacción serializada como dict.
+
+    Returns:
+        bytes: Transacción serializada.
+
+    Raises:
+        ValueError: Si la transacción no tiene un formato conocido.
+    """
+    if "tipo" in tx:
+        kind = _KINDS.get(tx["tipo"])
+        if kind is None:
+            raise ValueError(f"Tipo de transacción desconocido: {tx['tipo']!r}")
+        if "altura" not in tx:
+            raise ValueError("Coinbase o recompensa sin altura (anterior al formato binario)")
+        out = bytearray((VERSION, kind))
+        _put_ref(out, tx["direccion"])
+        out += _AMOUNT.pack(tx["cantidad"])
+        _put_varint(out, tx["altura"])
+        return bytes(out)
+    try:
+        return encode_transfer(tx["inputs"], tx["outputs"], tx["fee"])
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"Transacción con formato desconocido: {e}") from e
+
+
+def transaction_id(tx):
+    """
+    Calcula el txid de una transacción serializada como dict a partir de su forma binaria.
+
+    Args:
+        tx (dict): Transacción.
+
+    Returns:
+        str: SHA-256 hexadecimal de la transacción serializada.
+    """
+    return hashlib.sha256(encode_transaction(tx)).hexdigest()
+
+
+def decode_transaction(data, pos=0, end=None):
+    """
+    Deserializa una transacción.
+
+    Args:
+        data (bytes | memoryview): Buffer con la transacción.
+        pos (int): Posición donde empieza.
+        end (int, opcional): Posición donde termina. Por defecto, el final del buffer.
+
+    Returns:
+        dict: Transacción con su txid calculado sobre los bytes leídos.
+
+    Raises:
+        ValueError: Si la versión o el tipo no son compatibles, o los datos están truncados, mal
+            formados o tienen bytes sobrantes.
+    """
+    end = len(data) if end is None else end
+    if end > len(data):
+        raise ValueError(f"Datos truncados: la transacción termina en {end}, el buffer tiene {len(data)} bytes")
+    if end - pos < 2:
+        raise ValueError("Datos truncados: transacción sin versión ni tipo")
+    start = pos
+    version, kind = data[pos], data[pos + 1]
+    pos += 2
+    if version != VERSION:
+        raise ValueError(f"Versión de transacción no soportada: {version}")
+
+    if kind in _KIND_NAMES:
+        direccion, pos = _get_ref(data, pos)
+        cantidad, pos = _get_amount(data, pos)
+        altura, pos = _get_varint(data, pos)
+        tx = {"tipo": _KIND_NAMES[kind], "direccion": direccion, "cantidad": cantidad, "altura": altura}
+    elif kind == TX_TRANSFER:
+        count, pos = _get_varint(data, pos)
+        inputs = []
+        for _ in range(count):
+            txid, pos = _get_ref(data, pos)
+            index, pos = _get_varint(data, pos)
+            inp = {"txid": txid, "index": index}
+            for field, name in _INPUT_FIELDS:
+                length, pos = _get_varint(data, pos)
+                if length:
+                    if pos + length > end:
+                        raise ValueError(f"Datos truncados: {name} incompleta en la posición {pos}")
+                    inp[field] = data[pos:pos + length].hex()
+                pos += length
+            inputs.append(inp)
+        count, pos = _get_varint(data, pos)
+        outputs = []
+        for _ in range(count):
+            direccion, pos = _get_ref(data, pos)
+            if pos + _AMOUNT.size > end:
+                raise ValueError(f"Datos truncados: falta una cantidad en la posición {pos}")
+            (cantidad,) = _AMOUNT.unpack_from(data, pos)
+            pos += _AMOUNT.size
+            outputs.append({"direccion": direccion, "cantidad": cantidad})
+        fee, pos = _get_amount(data, pos)
+        tx = {"inputs": inputs, "outputs": outputs, "fee": fee}
+    else:
+        raise ValueError(f"Tipo de transacción desconocido: {kind}")
+    if pos != end:
+        raise ValueError(f"Transacción mal formada: ocupa {pos - start} bytes de {end - start}")
+
+    tx["txid"] = hashlib.sha256(data[start:end]).hexdigest()
+    return tx
+
+
+def signature_message(inp, outputs, fee, encoded_outputs=None):
+    """
+    Construye el mensaje que firma una entrada: la entrada (sin firma), las salidas y la comisión.
+
+    Args:
+        inp (dict): Entrada a firmar (txid e index).
+        outputs (list): Salidas de la transacción.
+        fee (float): Comisión.
+        encoded_outputs (bytes, opcional): Resultado de encode_outputs(outputs, fee). Al firmar o
+            verificar varias entradas de una transacción con muchas salidas, evita serializarlas
+            una vez por entrada.
+
+    Returns:
+        bytes: Mensaje a firmar.
+    """
+    out = bytearray((VERSION, SIGHASH))
+    _put_ref(out, inp["txid"])
+    _put_varint(out, inp["index"])
+    if encoded_outputs is None:
+        _put_outputs(out, outputs, fee)
+    else:
+        out += encoded_outputs
+    return bytes(out)
+
+
+# --- Cabeceras y bloques ---
+
+def decode_header(data, pos=0):
+    """
+    Deserializa una cabecera de bloque de tamaño fijo.
+
+    Args:
+        data (bytes | memoryview): Buffer con la cabecera.
+        pos (int): Posición donde empieza.
+
+    Returns:
+        dict: index, timestamp, prev_hash, merkle_root y nonce.
+
+    Raises:
+        ValueError: Si el buffer no tiene una cabecera completa.
+    """
+    if len(data) - pos < HEADER_SIZE:
+        raise ValueError(f"Cabecera truncada: {max(0, len(data) - pos)} bytes de {HEADER_SIZE}")
+    index, timestamp, prev_hash, merkle_root = HEADER_PREFIX.unpack_from(data, pos)
+    (nonce,) = NONCE.unpack_from(data, pos + HEADER_PREFIX.size)
+    return {
+        "index": index,
+        "timestamp": timestamp.rstrip(b"\x00").decode(),
+        # El génesis usa "0" como prev_hash; en la cabecera se guarda como 32 bytes en cero.
+        "prev_hash": "0" if index == 0 and prev_hash == hash_to_bytes("0") else prev_hash.hex(),
+        "merkle_root": merkle_root.hex(),
+        "nonce": nonce,
+    }
+
+
+def encode_block(block):
+    """
+    Serializa un bloque: cabecera y transacciones.
+
+    Args:
+        block (Block): Bloque a serializar.
+
+    Returns:
+        bytes: Bloque serializado.
+
+    Raises:
+        ValueError: Si alguna transacción no tiene formato binario o su txid no se calculó sobre él
+            (transacciones anteriores a este formato).
+    """
+    out = bytearray((VERSION,))
+    out += block.header()
+    transactions = block.transactions
+    _put_varint(out, len(transactions))
+    for tx in transactions:
+        data = encode_transaction(tx)
+        if tx.get("txid") != hashlib.sha256(data).hexdigest():
+            raise ValueError(f"La transacción {tx.get('txid')} no tiene un txid canónico")
+        _put_varint(out, len(data))
+        out += data
+    return bytes(out)
+
+
+def decode_block_dict(data):
+    """
+    Deserializa un bloque en el formato de Block.to_dict.
+
+    Args:
+        data (bytes): Bloque serializado.
+
+    Returns:
+        dict: Datos del bloque, con su hash calculado sobre la cabecera.
+
+    Raises:
+        ValueError: Si la versión no es compatible o los datos están truncados o mal formados.
+    """
+    view = memoryview(data)
+    if not len(view):
+        raise ValueError("Bloque vacío")
+    if view[0] != VERSION:
+        raise ValueError(f"Versión de bloque no soportada: {view[0]}")
+    block = decode_header(view, 1)
+    header = view[1:1 + HEADER_SIZE]
+    block["hash"] = hashlib.sha256(header).hexdigest()
+
+    pos = 1 + HEADER_SIZE
+    count, pos = _get_varint(view, pos)
+    transactions = []
+    for _ in range(count):
+        length, pos = _get_varint(view, pos)
+        transactions.append(decode_transaction(view, pos, pos + length))
+        pos += length
+    if pos != len(view):
+        raise ValueError(f"Bloque mal formado: {len(view) - pos} bytes sobrantes")
+    block["transactions"] = transactions
+    return block
+
+
+# --- Datos para deshacer bloques ---
+
+def encode_undo(spent):
+    """
+    Serializa los datos para deshacer un bloque: las salidas que gastó, con su dirección y cantidad.
+
+        varint(#salidas) + [txid (ref) | index (varint) | dirección (ref) | cantidad (double)]
+
+    Args:
+        spent (list): Pares ('txid:index', utxo) en el orden en que se gastaron.
+
+    Returns:
+        bytes: Datos serializados.
+    """
+    out = bytearray()
+    _put_varint(out, len(spent))
+    for outpoint, utxo in spent:
+        txid, index = outpoint.rsplit(":", 1)
+        _put_ref(out, txid)
+        _put_varint(out, int(index))
+        _put_ref(out, utxo["direccion"])
+        out += _AMOUNT.pack(utxo["cantidad"])
+    return bytes(out)
+
+
+def decode_undo(data):
+    """
+    Deserializa los datos para deshacer un bloque.
+
+    Args:
+        data (bytes): Datos serializados con encode_undo.
+
+    Returns:
+        list: Pares ('txid:index', utxo).
+    """
+    view = memoryview(data)
+    count, pos = _get_varint(view, 0)
+    spent = []
+    for _ in range(count):
+        txid, pos = _get_ref(view, pos)
+        index, pos = _get_varint(view, pos)
+        direccion, pos = _get_ref(view, pos)
+        cantidad, pos = _get_amount(view, pos)
+        spent.append((f"{txid}:{index}", {"direccion": direccion, "cantidad": cantidad}))
+    return spent
@@ -0,0 +1,232 @@
+"""
+mempool.py
+
+Este módulo define la clase Mempool, el conjunto de transacciones pendientes de minar.
+
+- Las transacciones se ordenan en un heap por comisión por byte (fee / tamaño).
+- Un mapa outpoint -> txid detecta gastos en conflicto: se conserva la primera transacción vista.
+- El tamaño total está limitado; al superarlo se desalojan las transacciones con menor comisión por byte.
+- build_block_template(max_size) elige el conjunto más rentable de transacciones sin conflictos
+  que cabe en un bloque, en O(n log n).
+
+Las transacciones del mempool solo gastan UTXOs confirmados, por lo que no existen dependencias
+entre transacciones pendientes y el orden por comisión es también un orden válido dentro del bloque.
+"""
+
+import heapq
+import itertools
+
+
+class MempoolEntry:
+    """
+    Transacción pendiente junto con los datos usados para ordenarla.
+
+    Atributos:
+        tx (Transaction): Transacción pendiente.
+        size (int): Tamaño en bytes de la transacción.
+        fee_rate (float): Comisión por byte.
+        seq (int): Orden de llegada (desempata transacciones con igual comisión por byte).
+    """
+
+    __slots__ = ("tx", "size", "fee_rate", "seq")
+
+    def __init__(self, tx, seq):
+        self.tx = tx
+        self.size = tx.size()
+        self.fee_rate = tx.fee / self.size if self.size else 0.0
+        self.seq = seq
+
+    def outpoints(self):
+        """
+        Devuelve los outpoints 'txid:index' que gasta la transacción.
+        """
+        return [f"{inp['txid']}:{inp['index']}" for inp in self.tx.inputs]
+
+
+class Mempool:
+    """
+    Conjunto de transacciones pendientes ordenado por comisión por byte.
+
+    Atributos:
+        max_bytes (int): Tamaño máximo del mempool en bytes.
+        size_bytes (int): Tamaño actual del mempool en bytes.
+    """
+
+    def __init__(self, max_bytes=5_000_000):
+        """
+        Inicializa un mempool vacío.
+
+        Args:
+            max_bytes (int): Tamaño máximo en bytes. Por defecto 5 MB.
+        """
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._entries = {}      # {"txid": MempoolEntry}
+        self._spends = {}       # {"txid:index": "txid" de la transacción que lo gasta}
+        self._by_fee = []       # heap de (-fee_rate, seq, txid): mayor comisión primero
+        self._by_low_fee = []   # heap de (fee_rate, -seq, txid): candidata a desalojo primero
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, txid):
+        return txid in self._entries
+
+    def get(self, txid):
+        """
+        Recupera una transacción pendiente por su txid.
+
+        Args:
+            txid (str): Identificador de la transacción.
+
+        Returns:
+            Transaction | None: Transacción, o None si no está en el mempool.
+        """
+        entry = self._entries.get(txid)
+        return entry.tx if entry else None
+
+    def transactions(self):
+        """
+        Devuelve las transacciones pendientes de mayor a menor comisión por byte.
+
+        Returns:
+            list: Lista de objetos Transaction.
+        """
+        entries = sorted(self._entries.values(), key=lambda e: (-e.fee_rate, e.seq))
+        return [e.tx for e in entries]
+
+    @property
+    def spent_outpoints(self):
+        """
+        Outpoints 'txid:index' que ya gasta alguna transacción pendiente (vista de solo lectura).
+        """
+        return self._spends.keys()
+
+    def conflicts(self, tx):
+        """
+        Devuelve los txids de las transacciones pendientes que gastan alguna de las entradas de tx.
+
+        Args:
+            tx (Transaction): Transacción a comprobar.
+
+        Returns:
+            set: Txids en conflicto.
+        """
+        found = set()
+        for inp in tx.inputs:
+            txid = self._spends.get(f"{inp['txid']}:{inp['index']}")
+            if txid is not None and txid != tx.txid:
+                found.add(txid)
+        return found
+
+    def add(self, tx):
+        """
+        Agrega una transacción al mempool.
+
+        Se rechaza si ya está presente o si gasta una salida que ya gasta otra transacción pendiente.
+        Si el mempool supera su tamaño máximo, se desalojan las transacciones de menor comisión por byte.
+
+        Args:
+            tx (Transaction): Transacción firmada.
+
+        Returns:
+            bool: True si la transacción quedó en el mempool, False si fue rechazada o desalojada.
+        """
+        if tx.txid in self._entries or self.conflicts(tx):
+            return False
+
+        entry = MempoolEntry(tx, next(self._seq))
+        self._entries[tx.txid] = entry
+        for outpoint in entry.outpoints():
+            self._spends[outpoint] = tx.txid
+        self.size_bytes += entry.size
+        heapq.heappush(self._by_fee, (-entry.fee_rate, entry.seq, tx.txid))
+        heapq.heappush(self._by_low_fee, (entry.fee_rate, -entry.seq, tx.txid))
+
+        while self.size_bytes > self.max_bytes and self._by_low_fee:
+            _, neg_seq, txid = heapq.heappop(self._by_low_fee)
+            evicted = self._entries.get(txid)
+            if evicted is not None and evicted.seq == -neg_seq:
+                self.remove(txid)
+
+        self._compact()
+        return tx.txid in self._entries
+
+    def remove(self, txid):
+        """
+        Quita una transacción del mempool. Las entradas de los heaps se descartan de forma diferida.
+
+        Args:
+            txid (str): Identificador de la transacción.
+
+        Returns:
+            Transaction | None: Transacción eliminada, o None si no estaba.
+        """
+        entry = self._entries.pop(txid, None)
+        if entry is None:
+            return None
+        for outpoint in entry.outpoints():
+            if self._spends.get(outpoint) == txid:
+                del self._spends[outpoint]
+        self.size_bytes -= entry.size
+        return entry.tx
+
+    def remove_confirmed(self, transactions):
+        """
+        Quita del mempool las transacciones incluidas en un bloque y las que gastaban sus mismas entradas.
+
+        Args:
+            transactions (list): Transacciones confirmadas (objetos Transaction o dicts serializados).
+        """
+        for tx in transactions:
+            tx_dict = tx if isinstance(tx, dict) else tx.to_dict()
+            if "txid" not in tx_dict:
+                continue
+            self.remove(tx_dict["txid"])
+            for inp in tx_dict.get("inputs", []):
+                conflicting = self._spends.get(f"{inp['txid']}:{inp['index']}")
+                if conflicting is not None:
+                    self.remove(conflicting)
+        self._compact()
+
+    def build_block_template(self, max_size):
+        """
+        Elige las transacciones más rentables sin conflictos que caben en un bloque.
+
+        Recorre el heap por comisión por byte de mayor a menor y agrega cada transacción que cabe en
+        el espacio restante y no gasta una salida ya usada en la plantilla. Costo O(n log n).
+
+        Args:
+            max_size (int): Tamaño máximo en bytes de las transacciones del bloque.
+
+        Returns:
+            list: Transacciones seleccionadas, en orden de comisión por byte descendente.
+        """
+        heap = list(self._by_fee)
+        template = []
+        used = set()
+        remaining = max_size
+        while heap and remaining > 0:
+            _, seq, txid = heapq.heappop(heap)
+            entry = self._entries.get(txid)
+            if entry is None or entry.seq != seq or entry.size > remaining:
+                continue
+            outpoints = entry.outpoints()
+            if any(o in used for o in outpoints):
+                continue
+            used.update(outpoints)
+            template.append(entry.tx)
+            remaining -= entry.size
+        return template
+
+    def _compact(self):
+        """
+        Reconstruye los heaps cuando acumulan demasiadas entradas obsoletas.
+        """
+        if len(self._by_fee) > 2 * len(self._entries) + 64:
+            self._by_fee = [(-e.fee_rate, e.seq, txid) for txid, e in self._entries.items()]
+            heapq.heapify(self._by_fee)
+        if len(self._by_low_fee) > 2 * len(self._entries) + 64:
+            self._by_low_fee = [(e.fee_rate, -e.seq, txid) for txid, e in self._entries.items()]
+            heapq.heapify(self._by_low_fee)
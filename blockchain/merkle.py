@@ -0,0 +1,158 @@
+"""
+merkle.py
+
+Este módulo define la clase MerkleTree, un árbol de Merkle sobre los identificadores de las transacciones
+de un bloque. El árbol se construye de forma incremental (cada transacción agregada actualiza solo la rama
+derecha del árbol) y permite generar pruebas de inclusión de tamaño logarítmico y verificarlas sin
+conocer el resto del bloque.
+
+Las hojas se calculan como SHA-256(0x00 || txid) y los nodos internos como SHA-256(0x01 || izq || der).
+Si un nivel tiene un número impar de nodos, el último se empareja consigo mismo.
+"""
+
+import hashlib
+import json
+
+EMPTY_ROOT = "0" * 64
+
+
+def txid_of(tx):
+    """
+    Obtiene el identificador de una transacción serializada.
+
+    Las transacciones ya incluyen 'txid' (calculado sobre su forma binaria, ver blockchain.encoding).
+    Las coinbase y recompensas guardadas antes de ese formato no lo tienen y se identifican con el
+    SHA-256 de su serialización JSON canónica.
+
+    Args:
+        tx (dict): Transacción serializada.
+
+    Returns:
+        str: Identificador de la transacción.
+    """
+    txid = tx.get("txid")
+    if txid is None:
+        txid = hashlib.sha256(json.dumps(tx, sort_keys=True).encode()).hexdigest()
+    return txid
+
+
+def _leaf_hash(txid):
+    return hashlib.sha256(b"\x00" + txid.encode()).digest()
+
+
+def _node_hash(left, right):
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+class MerkleTree:
+    """
+    Árbol de Merkle incremental sobre identificadores de transacciones.
+
+    Atributos:
+        levels (list): Niveles del árbol; levels[0] son las hojas y el último nivel contiene la raíz.
+    """
+
+    def __init__(self, txids=()):
+        """
+        Inicializa el árbol con los identificadores proporcionados.
+
+        Args:
+            txids (iterable): Identificadores de transacciones en orden.
+        """
+        self.levels = [[]]
+        self._positions = {}
+        for txid in txids:
+            self.append(txid)
+
+    def __len__(self):
+        return len(self.levels[0])
+
+    def append(self, txid):
+        """
+        Agrega una hoja al árbol y recalcula únicamente los nodos de la rama derecha (O(log n)).
+
+        Args:
+            txid (str): Identificador de la transacción.
+        """
+        self._positions.setdefault(txid, len(self.levels[0]))
+        self.levels[0].append(_leaf_hash(txid))
+
+        position = len(self.levels[0]) - 1
+        level = 0
+        while len(self.levels[level]) > 1:
+            nodes = self.levels[level]
+            parent = position // 2
+            left = nodes[2 * parent]
+            right = nodes[2 * parent + 1] if 2 * parent + 1 < len(nodes) else left
+
+            if level + 1 == len(self.levels):
+                self.levels.append([])
+            upper = self.levels[level + 1]
+            if parent < len(upper):
+                upper[parent] = _node_hash(left, right)
+            else:
+                upper.append(_node_hash(left, right))
+
+            position = parent
+            level += 1
+
+    @property
+    def root(self):
+        """
+        str: Raíz del árbol en hexadecimal, o EMPTY_ROOT si no tiene hojas.
+        """
+        if not self.levels[0]:
+            return EMPTY_ROOT
+        return self.levels[-1][0].hex()
+
+    def proof(self, txid):
+        """
+        Genera la prueba de inclusión de una transacción.
+
+        Args:
+            txid (str): Identificador de la transacción.
+
+        Returns:
+            list | None: Lista de pares [hash_hermano, lado], donde lado es 'L' si el hermano va a la
+            izquierda y 'R' si va a la derecha; None si la transacción no está en el árbol.
+        """
+        position = self._positions.get(txid)
+        if position is None:
+            return None
+
+        path = []
+        for nodes in self.levels[:-1]:
+            if position % 2:
+                path.append([nodes[position - 1].hex(), "L"])
+            else:
+                sibling = nodes[position + 1] if position + 1 < len(nodes) else nodes[position]
+                path.append([sibling.hex(), "R"])
+            position //= 2
+        return path
+
+
+def verify_proof(txid, proof, root):
+    """
+    Verifica una prueba de inclusión contra la raíz de Merkle de un bloque.
+
+    Args:
+        txid (str): Identificador de la transacción.
+        proof (list): Prueba generada por MerkleTree.proof.
+        root (str): Raíz de Merkle en hexadecimal.
+
+    Returns:
+        bool: True si la prueba demuestra que la transacción pertenece al árbol.
+    """
+    try:
+        current = _leaf_hash(txid)
+        for sibling_hex, side in proof:
+            sibling = bytes.fromhex(sibling_hex)
+            if side == "L":
+                current = _node_hash(sibling, current)
+            elif side == "R":
+                current = _node_hash(current, sibling)
+            else:
+                return False
+        return current.hex() == root
+    except (TypeError, ValueError):
+        return False
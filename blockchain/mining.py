@@ -0,0 +1,229 @@
+"""
+mining.py
+
+Este módulo define el motor de minería paralela. La clase ParallelMiner reparte el espacio de nonces
+entre varios procesos (cada worker prueba nonces con un paso igual al número de workers), detiene a
+todos en cuanto uno encuentra un hash válido e informa qué worker ganó. La búsqueda puede cancelarse
+desde otro hilo mientras está en curso.
+
+MiningProgress permite que otro hilo (por ejemplo, la interfaz) consulte los hashes calculados, el
+nonce actual y la velocidad de una búsqueda en curso, y la cancele. Sirve tanto para la minería en un
+solo hilo (Block.mine_block) como para la paralela, donde los workers suman sus hashes en un contador
+compartido.
+"""
+
+import hashlib
+import os
+import queue
+import threading
+import time
+
+from blockchain.block import NONCE, difficulty_target
+from utils.procesos import contexto_procesos
+
+
+class MiningProgress:
+    """
+    Progreso de una búsqueda de nonce, compartido entre el hilo que mina y los que lo consultan.
+
+    Atributos:
+        hashes (int): Hashes calculados hasta la última actualización.
+        nonce (int): Último nonce probado (aproximado en la minería paralela).
+        started (float | None): Instante (time.perf_counter) en que empezó la búsqueda.
+        finished (float | None): Instante en que terminó, o None si sigue en curso.
+    """
+
+    def __init__(self):
+        self.hashes = 0
+        self.nonce = 0
+        self.started = None
+        self.finished = None
+        self._cancel = threading.Event()
+
+    def start(self, nonce):
+        self.hashes = 0
+        self.nonce = nonce
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def update(self, hashes, nonce):
+        self.hashes = hashes
+        self.nonce = nonce
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    def cancel(self):
+        """
+        Pide que la búsqueda se detenga; la minería termina en el siguiente lote de nonces.
+        """
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def elapsed(self):
+        """
+        float: Segundos de búsqueda (hasta ahora, o hasta que terminó).
+        """
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def hashes_per_second(self):
+        elapsed = self.elapsed
+        return self.hashes / elapsed if elapsed > 0 else 0.0
+
+
+class MiningResult:
+    """
+    Resultado de una búsqueda de Prueba de Trabajo.
+
+    Atributos:
+        nonce (int): Nonce que cumple la dificultad.
+        hash (str): Hash resultante del bloque.
+        worker (int): Identificador del worker que encontró el nonce.
+        duration (float): Segundos transcurridos en la búsqueda.
+        hashes (int): Hashes calculados entre todos los workers (contados por lotes).
+    """
+
+    def __init__(self, nonce, hash, worker, duration, hashes=0):
+        self.nonce = nonce
+        self.hash = hash
+        self.worker = worker
+        self.duration = duration
+        self.hashes = hashes
+
+    def __repr__(self):
+        return f"MiningResult(nonce={self.nonce}, worker={self.worker}, hash={self.hash})"
+
+
+def _search_nonce(header_prefix, target, start, step, stop_event, results, worker_id, batch, counter):
+    """
+    Recorre los nonces start, start + step, start + 2*step, ... hasta encontrar uno válido
+    o hasta que se active el evento de parada. Se ejecuta dentro de un proceso worker.
+
+    Args:
+        header_prefix (bytes): Cabecera del bloque sin el nonce.
+        target (bytes): Objetivo de dificultad sobre el digest crudo.
+        start (int): Primer nonce a probar.
+        step (int): Separación entre nonces consecutivos de este worker.
+        stop_event (multiprocessing.Event): Evento compartido de parada.
+        results (multiprocessing.Queue): Cola donde se publica el resultado.
+        worker_id (int): Identificador del worker.
+        batch (int): Nonces probados entre cada consulta al evento de parada.
+        counter (multiprocessing.Value): Contador compartido de hashes, actualizado por lotes.
+    """
+    base = hashlib.sha256(header_prefix)
+    pack_nonce = NONCE.pack
+    nonce = start
+    while not stop_event.is_set():
+        for i in range(batch):
+            h = base.copy()
+            h.update(pack_nonce(nonce))
+            digest = h.digest()
+            if digest < target:
+                with counter.get_lock():
+                    counter.value += i + 1
+                results.put((worker_id, nonce, digest.hex()))
+                stop_event.set()
+                return
+            nonce += step
+        with counter.get_lock():
+            counter.value += batch
+
+
+class ParallelMiner:
+    """
+    Motor de minería que reparte la búsqueda del nonce entre varios procesos.
+
+    Atributos:
+        workers (int): Número de procesos worker.
+        batch (int): Nonces que prueba cada worker antes de revisar si debe detenerse.
+    """
+
+    def __init__(self, workers=None, batch=2000):
+        """
+        Inicializa el motor de minería.
+
+        Args:
+            workers (int, opcional): Número de procesos. Por defecto, el número de CPUs.
+            batch (int): Tamaño del lote de nonces entre revisiones del evento de parada.
+        """
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.batch = batch
+        self._context = contexto_procesos()  # sin fork: el proceso ya tiene otros hilos
+        self._stop_event = None
+        self._cancelled = False
+
+    def mine(self, block, difficulty_prefix="000", progress=None):
+        """
+        Busca en paralelo un nonce para el bloque que cumpla la dificultad.
+
+        Args:
+            block (Block): Bloque a minar. No se modifica.
+            difficulty_prefix (str): Prefijo que el hash debe cumplir.
+            progress (MiningProgress, opcional): Progreso a actualizar cada 0.1 s; si se cancela,
+                la búsqueda se detiene.
+
+        Returns:
+            MiningResult | None: Resultado de la búsqueda, o None si fue cancelada.
+        """
+        self._cancelled = False
+        self._stop_event = self._context.Event()
+        results = self._context.Queue()
+        counter = self._context.Value("Q", 0)
+        start_time = time.perf_counter()
+        if progress is not None:
+            progress.start(block.nonce)
+        header_prefix = block.header_prefix()
+        target = difficulty_target(difficulty_prefix)
+
+        processes = [
+            self._context.Process(
+                target=_search_nonce,
+                args=(header_prefix, target, block.nonce + i, self.workers,
+                      self._stop_event, results, i, self.batch, counter),
+                daemon=True
+            )
+            for i in range(self.workers)
+        ]
+        for p in processes:
+            p.start()
+
+        found = None
+        try:
+            while found is None and not self._cancelled:
+                try:
+                    found = results.get(timeout=0.1)
+                except queue.Empty:
+                    if not any(p.is_alive() for p in processes):
+                        break
+                if progress is not None:
+                    progress.update(counter.value, block.nonce + counter.value)
+                    if progress.cancelled:
+                        self._cancelled = True
+        finally:
+            self._stop_event.set()
+            for p in processes:
+                p.join()
+            if progress is not None:
+                progress.update(counter.value, block.nonce + counter.value)
+                progress.finish()
+
+        if found is None:
+            return None
+
+        worker_id, nonce, block_hash = found
+        return MiningResult(nonce, block_hash, worker_id, time.perf_counter() - start_time, counter.value)
+
+    def cancel(self):
+        """
+        Cancela la búsqueda en curso. Todos los workers se detienen y mine() devuelve None.
+        """
+        self._cancelled = True
+        if self._stop_event is not None:
+            self._stop_event.set()
@@ -0,0 +1,408 @@
+"""
+p2p.py
+
+Este módulo define un nodo P2P sobre asyncio que retransmite transacciones y bloques entre nodos.
+
+- Cada mensaje se envía como longitud (4 bytes) | tipo (1 byte) | contenido. Las transacciones y los
+  bloques viajan en su formato binario (ver blockchain.encoding); los mensajes de control, en JSON.
+- Los objetos nuevos se anuncian con un inventario (INV) de identificadores; cada nodo pide (GETDATA)
+  solo los que no tiene ni pidió ya a otro nodo, y los retransmite al resto una vez aceptados.
+- Al conectarse, los nodos intercambian su altura (HELLO). El de menor altura pide los hashes de los
+  bloques desde su altura (GETBLOCKS) y descarga los que le faltan. Si un bloque no enlaza con la
+  cadena, se piden hashes desde alturas cada vez más bajas hasta encontrar la bifurcación; la rama se
+  adopta si tiene más trabajo acumulado (ver SistemaBlockchain.reorganizar).
+
+Todas las modificaciones del sistema se hacen dentro de un asyncio.Lock. La minería corre en un hilo
+para no bloquear el bucle de eventos mientras se busca el nonce.
+"""
+
+import asyncio
+import json
+import struct
+import time
+
+from blockchain.block import Block
+from blockchain.blockchain import Blockchain
+from blockchain.transaction import Transaction
+from utils.logger import log_warning
+
+MSG_HELLO = 1
+MSG_INV = 2
+MSG_GETDATA = 3
+MSG_TX = 4
+MSG_BLOCK = 5
+MSG_GETBLOCKS = 6
+
+INV_TX = "tx"
+INV_BLOCK = "block"
+
+FRAME = struct.Struct(">IB")  # longitud del contenido, tipo
+MAX_FRAME = 32 * 1024 * 1024
+MAX_INV_BLOCKS = 500
+MAX_PENDING_BLOCKS = 1000
+
+
+def encode_block_message(block):
+    """
+    Serializa un bloque para enviarlo. Los bloques anteriores al formato binario se envían en JSON.
+    """
+    try:
+        return block.to_bytes()
+    except ValueError:
+        return json.dumps(block.to_dict(), separators=(",", ":")).encode()
+
+
+def decode_block_message(payload):
+    """
+    Reconstruye un bloque recibido (binario o JSON).
+
+    Raises:
+        ValueError: Si el contenido no es un bloque bien formado.
+    """
+    if payload[:1] == b"{":
+        try:
+            return Blockchain.crear_bloque_desde_dict(json.loads(payload))
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Bloque JSON mal formado: {e!r}") from e
+    return Block.from_bytes(payload)
+
+
+def decode_control_message(payload, **fields):
+    """
+    Reconstruye un mensaje de control (JSON) y comprueba el tipo de sus campos, para que un mensaje
+    mal formado se rechace aquí y no a mitad de su procesamiento.
+
+    Args:
+        payload (bytes): Contenido recibido.
+        **fields: Nombre de cada campo requerido -> tipo esperado. Para los inventarios, ids es una
+            lista de cadenas y tipo es INV_TX o INV_BLOCK.
+
+    Returns:
+        dict: Mensaje decodificado.
+
+    Raises:
+        ValueError: Si el contenido no es JSON, no es un objeto o algún campo falta o tiene otro tipo.
+    """
+    message = json.loads(payload)
+    if not isinstance(message, dict):
+        raise ValueError("El mensaje de control no es un objeto JSON")
+    for name, kind in fields.items():
+        value = message.get(name)
+        if not isinstance(value, kind) or (kind is int and isinstance(value, bool)):
+            raise ValueError(f"Campo {name!r} ausente o de tipo incorrecto: {value!r}")
+    if "ids" in fields and not all(isinstance(i, str) for i in message["ids"]):
+        raise ValueError("El inventario contiene identificadores que no son cadenas")
+    if "tipo" in fields and message["tipo"] not in (INV_TX, INV_BLOCK):
+        raise ValueError(f"Tipo de inventario desconocido: {message['tipo']!r}")
+    return message
+
+
+class Peer:
+    """
+    Conexión con otro nodo.
+
+    Atributos:
+        height (int): Última altura conocida del nodo remoto.
+        backoff (int): Retroceso usado para buscar la bifurcación cuando llegan bloques que no enlazan.
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.height = -1
+        self.backoff = 0
+        self.address = writer.get_extra_info("peername")
+        self._write_lock = asyncio.Lock()
+
+    async def send(self, kind, payload):
+        """
+        Envía un mensaje. El contenido puede ser bytes o un objeto serializable en JSON.
+        """
+        if not isinstance(payload, (bytes, bytearray)):
+            payload = json.dumps(payload).encode()
+        async with self._write_lock:
+            self.writer.write(FRAME.pack(len(payload), kind) + payload)
+            await self.writer.drain()
+
+    async def receive(self):
+        """
+        Recibe un mensaje.
+
+        Returns:
+            tuple: (tipo, contenido en bytes).
+
+        Raises:
+            ConnectionError: Si el mensaje excede el tamaño máximo.
+            asyncio.IncompleteReadError: Si el nodo remoto cerró la conexión.
+        """
+        length, kind = FRAME.unpack(await self.reader.readexactly(FRAME.size))
+        if length > MAX_FRAME:
+            raise ConnectionError(f"Mensaje demasiado grande ({length} bytes) de {self.address}")
+        return kind, await self.reader.readexactly(length)
+
+    def close(self):
+        self.writer.close()
+
+
+class Nodo:
+    """
+    Nodo P2P que comparte el estado de un SistemaBlockchain con otros nodos.
+
+    Atributos:
+        sistema (SistemaBlockchain): Estado local del nodo.
+        host (str): Dirección en la que escucha.
+        port (int): Puerto en el que escucha (0 = elegido por el sistema operativo al iniciar).
+        peers (set): Conexiones abiertas.
+        seen (dict): Identificador -> instante (time.perf_counter) en que el nodo aceptó cada
+            transacción o bloque, usado para medir la propagación.
+    """
+
+    def __init__(self, sistema, host="127.0.0.1", port=0):
+        """
+        Inicializa el nodo sin abrir conexiones.
+
+        Args:
+            sistema (SistemaBlockchain): Estado local del nodo.
+            host (str): Dirección en la que escuchar.
+            port (int): Puerto en el que escuchar. 0 elige uno libre.
+        """
+        self.sistema = sistema
+        self.host = host
+        self.port = port
+        self.peers = set()
+        self.seen = {}
+        self._server = None
+        self._lock = asyncio.Lock()
+        self._requested = {INV_TX: set(), INV_BLOCK: set()}
+        self._pending_blocks = {}  # {"hash": Block} bloques recibidos que aún no enlazan con la cadena
+        self._tasks = set()
+
+    # --- Conexiones ---
+
+    async def start(self):
+        """
+        Empieza a aceptar conexiones.
+
+        Returns:
+            int: Puerto en el que escucha el nodo.
+        """
+        self._server = await asyncio.start_server(self._handle_incoming, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def connect(self, host, port):
+        """
+        Abre una conexión con otro nodo e intercambia alturas.
+
+        Args:
+            host (str): Dirección del nodo remoto.
+            port (int): Puerto del nodo remoto.
+        """
+        reader, writer = await asyncio.open_connection(host, port)
+        peer = Peer(reader, writer)
+        self._spawn(self._run_peer(peer))
+
+    async def close(self):
+        """
+        Cierra el servidor y todas las conexiones.
+        """
+        if self._server is not None:
+            self._server.close()
+        for peer in list(self.peers):
+            peer.close()
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+
+    def _spawn(self, coro):
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _handle_incoming(self, reader, writer):
+        await self._run_peer(Peer(reader, writer))
+
+    async def _run_peer(self, peer):
+        self.peers.add(peer)
+        try:
+            await peer.send(MSG_HELLO, {"altura": self.height, "tip": self.sistema.blockchain.get_last_block().hash})
+            while True:
+                kind, payload = await peer.receive()
+                await self._dispatch(peer, kind, payload)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except (ValueError, KeyError, IndexError, TypeError, struct.error) as e:
+            # Los decodificadores rechazan con ValueError; el resto cubre cualquier otro contenido
+            # inesperado, que cierra la conexión con ese nodo y no el nodo completo.
+            log_warning("Mensaje inválido de %s, se cierra la conexión: %r", peer.address, e, categoria="red")
+        finally:
+            self.peers.discard(peer)
+            peer.close()
+
+    @property
+    def height(self):
+        """
+        int: Altura del último bloque de la cadena local.
+        """
+        return len(self.sistema.blockchain.chain) - 1
+
+    # --- Operaciones locales ---
+
+    async def enviar_transaccion(self, remitente, receptor, monto, fee=1.0):
+        """
+        Crea una transacción en el sistema local y la anuncia a los demás nodos.
+
+        Returns:
+            Transaction | None: Transacción creada, o None si fue rechazada.
+        """
+        async with self._lock:
+            tx = self.sistema.enviar_transaccion(remitente, receptor, monto, fee)
+        if tx is not None:
+            self.seen[tx.txid] = time.perf_counter()
+            await self._announce(INV_TX, [tx.txid])
+        return tx
+
+    async def minar_bloque(self):
+        """
+        Mina un bloque con el mempool local en un hilo aparte y lo anuncia a los demás nodos.
+
+        Returns:
+            Block | None: Bloque minado, o None si no había transacciones o llegó antes otro bloque.
+        """
+        async with self._lock:
+            bloque = await asyncio.get_running_loop().run_in_executor(None, self.sistema.minar_bloque)
+        if bloque is not None:
+            self.seen[bloque.hash] = time.perf_counter()
+            await self._announce(INV_BLOCK, [bloque.hash])
+        return bloque
+
+    async def _announce(self, kind, ids, exclude=None):
+        peers = [p for p in self.peers if p is not exclude]
+        await asyncio.gather(*(p.send(MSG_INV, {"tipo": kind, "ids": ids}) for p in peers),
+                             return_exceptions=True)
+
+    # --- Mensajes ---
+
+    async def _dispatch(self, peer, kind, payload):
+        if kind == MSG_HELLO:
+            peer.height = decode_control_message(payload, altura=int)["altura"]
+            if peer.height > self.height:
+                await peer.send(MSG_GETBLOCKS, {"desde": self.height + 1})
+        elif kind == MSG_GETBLOCKS:
+            chain = self.sistema.blockchain.chain
+            desde = max(0, decode_control_message(payload, desde=int)["desde"])
+            hashes = [b.hash for b in chain[desde:desde + MAX_INV_BLOCKS]]
+            if hashes:
+                await peer.send(MSG_INV, {"tipo": INV_BLOCK, "ids": hashes})
+        elif kind == MSG_INV:
+            await self._on_inv(peer, decode_control_message(payload, tipo=str, ids=list))
+        elif kind == MSG_GETDATA:
+            await self._on_getdata(peer, decode_control_message(payload, tipo=str, ids=list))
+        elif kind == MSG_TX:
+            await self._on_tx(peer, Transaction.from_bytes(payload))
+        elif kind == MSG_BLOCK:
+            await self._on_block(peer, decode_block_message(payload))
+
+    def _has(self, kind, object_id):
+        if kind == INV_TX:
+            return object_id in self.sistema.mempool \
+                or self.sistema.blockchain.locate_transaction(object_id) is not None
+        return self.sistema.blockchain.height_of(object_id) is not None or object_id in self._pending_blocks
+
+    async def _on_inv(self, peer, inv):
+        kind = inv["tipo"]
+        requested = self._requested[kind]
+        wanted = [i for i in inv["ids"] if i not in requested and not self._has(kind, i)]
+        if wanted:
+            requested.update(wanted)
+            await peer.send(MSG_GETDATA, {"tipo": kind, "ids": wanted})
+
+    async def _on_getdata(self, peer, request):
+        for object_id in request["ids"]:
+            if request["tipo"] == INV_TX:
+                tx = self.sistema.mempool.get(object_id)
+                if tx is not None:
+                    await peer.send(MSG_TX, tx.to_bytes())
+            else:
+                block = self.sistema.blockchain.get_block_by_hash(object_id)
+                if block is None:
+                    block = self._pending_blocks.get(object_id)
+                if block is not None:
+                    await peer.send(MSG_BLOCK, encode_block_message(block))
+
+    async def _on_tx(self, peer, tx):
+        self._requested[INV_TX].discard(tx.txid)
+        async with self._lock:
+            accepted = self.sistema.aceptar_transaccion(tx)
+        if accepted:
+            self.seen[tx.txid] = time.perf_counter()
+            await self._announce(INV_TX, [tx.txid], exclude=peer)
+
+    async def _on_block(self, peer, block):
+        self._requested[INV_BLOCK].discard(block.hash)
+        peer.height = max(peer.height, block.index)
+        async with self._lock:
+            if self._has(INV_BLOCK, block.hash):
+                return
+            if len(self._pending_blocks) >= MAX_PENDING_BLOCKS:
+                self._pending_blocks.pop(next(iter(self._pending_blocks)))
+            self._pending_blocks[block.hash] = block
+            connected = self._connect_pending()
+
+        now = time.perf_counter()
+        for b in connected:
+            self.seen[b.hash] = now
+        if connected:
+            peer.backoff = 0
+            await self._announce(INV_BLOCK, [b.hash for b in connected], exclude=peer)
+
+        if self._requested[INV_BLOCK]:
+            return
+        if block.hash in self._pending_blocks and self.sistema.blockchain.height_of(block.prev_hash) is None:
+            # El bloque no enlaza: se buscan hashes desde más atrás para encontrar la bifurcación.
+            peer.backoff = max(1, peer.backoff * 2)
+            await peer.send(MSG_GETBLOCKS, {"desde": max(1, self.height + 1 - peer.backoff)})
+        elif peer.height > self.height:
+            await peer.send(MSG_GETBLOCKS, {"desde": self.height + 1})
+
+    def _connect_pending(self):
+        """
+        Conecta los bloques pendientes que enlazan con la cadena: los que extienden el último bloque
+        y las ramas que parten de un bloque de la cadena y tienen más trabajo acumulado.
+
+        Returns:
+            list: Bloques que quedaron en la cadena, en orden.
+        """
+        connected = []
+        progress = True
+        while progress and self._pending_blocks:
+            progress = False
+            children = {b.prev_hash: b for b in self._pending_blocks.values()}
+            for block in list(self._pending_blocks.values()):
+                if self.sistema.blockchain.height_of(block.prev_hash) is None:
+                    continue
+                branch = [block]
+                while branch[-1].hash in children:
+                    branch.append(children[branch[-1].hash])
+                try:
+                    if block.prev_hash == self.sistema.blockchain.get_last_block().hash:
+                        for b in branch:
+                            self.sistema.conectar_bloque(b)
+                            self._pending_blocks.pop(b.hash)
+                            connected.append(b)
+                    elif self.sistema.reorganizar(branch):
+                        for b in branch:
+                            self._pending_blocks.pop(b.hash)
+                        connected.extend(branch)
+                    else:
+                        continue
+                except ValueError as e:
+                    log_warning("Bloque rechazado de la red: %s", e, categoria="red")
+                    for b in branch:
+                        self._pending_blocks.pop(b.hash, None)
+                progress = True
+                break
+        return connected
@@ -0,0 +1,216 @@
+"""
+reindex.py
+
+Este módulo reconstruye el conjunto UTXO a partir de la cadena guardada.
+
+Los bloques se leen del almacenamiento de bloques de uno en uno (nunca se carga la cadena completa)
+y sus salidas y gastos se aplican a un conjunto UTXO nuevo, junto con los fondeos registrados en
+fondeos.json en la altura en que se hicieron. Opcionalmente se verifican las firmas de las entradas
+en un pool de procesos, por lotes, con la clave pública que lleva cada entrada (que debe corresponder
+a la dirección dueña de la salida que gasta). Al terminar se informa el resumen (digest) del conjunto
+reconstruido para compararlo con el del conjunto en uso.
+
+Uso:
+    python -m blockchain.reindex [carpeta] [--workers N] [--verificar-firmas] [--reparar]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from blockchain.storage import BlockStore
+from blockchain.system import SistemaBlockchain
+from blockchain.transaction import Transaction, UTXOManager
+from blockchain.utxo_store import SQLiteUTXOBackend
+from blockchain.verification import verify_batch
+from blockchain.wallet import address_from_public_key
+
+
+class ReindexResult:
+    """
+    Resultado de un reindexado.
+
+    Atributos:
+        utxo_manager (UTXOManager): Conjunto UTXO reconstruido.
+        blocks (int): Bloques procesados.
+        seconds (float): Duración en segundos.
+        missing_inputs (list): Pares (altura, outpoint) de entradas que gastan salidas inexistentes.
+        invalid_signatures (list): Pares (altura, txid) de transacciones con alguna firma inválida o
+            alguna entrada sin la clave pública del dueño de la salida que gasta.
+    """
+
+    def __init__(self, utxo_manager, blocks, seconds, missing_inputs, invalid_signatures):
+        self.utxo_manager = utxo_manager
+        self.blocks = blocks
+        self.seconds = seconds
+        self.missing_inputs = missing_inputs
+        self.invalid_signatures = invalid_signatures
+
+    @property
+    def blocks_per_second(self):
+        return self.blocks / self.seconds if self.seconds else 0.0
+
+    @property
+    def consistent(self):
+        """
+        bool: True si ninguna entrada gasta una salida inexistente y todas las firmas verificadas son válidas.
+        """
+        return not self.missing_inputs and not self.invalid_signatures
+
+
+def _cargar_fondeos(carpeta):
+    """
+    Devuelve los fondeos de fondeos.json agrupados por la altura de la cadena en que se hicieron.
+    """
+    path = os.path.join(carpeta, "fondeos.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        fondeos = json.load(f)
+    by_height = {}
+    for fondeo in fondeos:
+        by_height.setdefault(fondeo["altura"], []).append(fondeo)
+    return by_height
+
+
+def reindex(carpeta="data", workers=1, verify_signatures=False, batch_size=2048, progress=None,
+            progress_every=1.0, utxo_backend=None):
+    """
+    Reconstruye el conjunto UTXO recorriendo los bloques guardados de uno en uno.
+
+    Args:
+        carpeta (str): Directorio de datos (con bloques/ y fondeos.json).
+        workers (int): Procesos para verificar firmas.
+        verify_signatures (bool): Si es True, verifica las firmas de todas las entradas.
+        batch_size (int): Firmas acumuladas antes de verificarlas en lote.
+        progress (callable, opcional): Función llamada con (altura, total, bloques por segundo).
+        progress_every (float): Segundos entre llamadas a progress.
+        utxo_backend (opcional): Backend del conjunto reconstruido. Por defecto, uno en memoria.
+
+    Returns:
+        ReindexResult: Conjunto reconstruido y estadísticas.
+
+    Raises:
+        FileNotFoundError: Si la carpeta no tiene almacenamiento de bloques.
+    """
+    directory = os.path.join(carpeta, "bloques")
+    if not os.path.exists(os.path.join(directory, "index.dat")):
+        raise FileNotFoundError(f"No hay almacenamiento de bloques en {directory}")
+
+    store = BlockStore(directory)
+    fondeos = _cargar_fondeos(carpeta)
+    utxo_manager = UTXOManager(utxo_backend)
+    missing, invalid = [], []
+    jobs, job_heights = [], []
+    failed = set()  # (altura, txid) de las transacciones con alguna entrada inválida
+
+    def verify_pending():
+        results = verify_batch(jobs, workers=workers, cache=None)
+        failed.update((h, tx.txid) for (tx, _, _), h, ok in zip(jobs, job_heights, results) if not ok)
+        jobs.clear()
+        job_heights.clear()
+
+    total = len(store)
+    start = last_report = time.perf_counter()
+    try:
+        with utxo_manager.batch():
+            for height, block in enumerate(store.iter_blocks()):
+                for fondeo in fondeos.get(height, []):
+                    utxo_manager.add_utxo(fondeo["txid"], fondeo["index"], fondeo["direccion"], fondeo["cantidad"])
+
+                for tx_dict in block["transactions"]:
+                    # El dueño de cada entrada se busca antes de que la transacción la gaste.
+                    if verify_signatures and tx_dict.get("inputs"):
+                        tx = Transaction(tx_dict["inputs"], tx_dict["outputs"], tx_dict["fee"])
+                        for index, inp in enumerate(tx.inputs):
+                            utxo = utxo_manager.get_utxo(f"{inp['txid']}:{inp['index']}")
+                            if utxo is None:
+                                continue  # se informa como entrada faltante
+                            public_key = inp.get("public_key")
+                            try:
+                                del_dueno = public_key is not None and \
+                                    address_from_public_key(public_key) == utxo["direccion"]
+                            except ValueError:
+                                del_dueno = False
+                            if del_dueno:
+                                jobs.append((tx, index, public_key))
+                                job_heights.append(height)
+                            else:
+                                failed.add((height, tx.txid))
+                    _, faltantes = utxo_manager.connect_transactions([tx_dict])
+                    missing.extend((height, outpoint) for outpoint in faltantes)
+                if len(jobs) >= batch_size:
+                    verify_pending()
+
+                now = time.perf_counter()
+                if progress is not None and now - last_report >= progress_every:
+                    progress(height + 1, total, (height + 1) / (now - start))
+                    last_report = now
+
+            for height in sorted(h for h in fondeos if h >= total):
+                for fondeo in fondeos[height]:
+                    utxo_manager.add_utxo(fondeo["txid"], fondeo["index"], fondeo["direccion"], fondeo["cantidad"])
+        if jobs:
+            verify_pending()
+        invalid.extend(sorted(failed))
+    finally:
+        store.close()
+
+    seconds = time.perf_counter() - start
+    if progress is not None:
+        progress(total, total, total / seconds if seconds else 0.0)
+    return ReindexResult(utxo_manager, total, seconds, missing, invalid)
+
+
+def main(argv=None):
+    """
+    Punto de entrada de la línea de comandos: reindexa, compara con el conjunto en uso y, si se pide,
+    lo reemplaza por el reconstruido.
+    """
+    parser = argparse.ArgumentParser(description="Reconstruye el conjunto UTXO desde la cadena guardada.")
+    parser.add_argument("carpeta", nargs="?", default="data", help="Directorio de datos (por defecto: data)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Procesos para verificar firmas")
+    parser.add_argument("--verificar-firmas", action="store_true", help="Verifica las firmas de las entradas")
+    parser.add_argument("--reparar", action="store_true", help="Reemplaza el conjunto en uso por el reconstruido")
+    args = parser.parse_args(argv)
+
+    def report(height, total, rate):
+        print(f"\r{height}/{total} bloques | {rate:,.0f} bloques/s", end="", file=sys.stderr, flush=True)
+
+    result = reindex(args.carpeta, workers=args.workers, verify_signatures=args.verificar_firmas, progress=report)
+    print(file=sys.stderr)
+
+    digest = result.utxo_manager.digest()
+    print(f"Bloques: {result.blocks} en {result.seconds:.2f} s ({result.blocks_per_second:,.0f} bloques/s)")
+    print(f"UTXOs reconstruidos: {len(result.utxo_manager)} | digest {digest}")
+    for height, outpoint in result.missing_inputs[:10]:
+        print(f"  Bloque #{height}: gasta una salida inexistente {outpoint}")
+    for height, txid in result.invalid_signatures[:10]:
+        print(f"  Bloque #{height}: firma o clave pública inválida en {txid}")
+
+    # El conjunto en uso se carga igual que en la aplicación.
+    db_path = os.path.join(args.carpeta, "utxos.db")
+    backend = SQLiteUTXOBackend(db_path) if os.path.exists(db_path) else None
+    sistema = SistemaBlockchain.desde_carpeta(args.carpeta, utxo_backend=backend)
+    live_digest = sistema.utxo_manager.digest()
+    print(f"UTXOs en uso:        {len(sistema.utxo_manager)} | digest {live_digest}")
+
+    status = 0
+    if live_digest == digest:
+        print("El conjunto en uso coincide con la cadena.")
+    elif args.reparar:
+        sistema.utxo_manager.load_utxos(result.utxo_manager.utxos)
+        sistema.guardar_estado(args.carpeta)
+        print("El conjunto en uso no coincidía con la cadena: se reemplazó por el reconstruido.")
+    else:
+        print("El conjunto en uso NO coincide con la cadena (use --reparar para reemplazarlo).")
+        status = 1
+    sistema.cerrar_block_stores()
+    sistema.utxo_manager.close()
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
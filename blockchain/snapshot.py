@@ -0,0 +1,134 @@
+"""
+snapshot.py
+
+Este módulo define la instantánea binaria del estado usada para arrancar rápido.
+
+La instantánea contiene las cabeceras de todos los bloques (sin sus transacciones) y, si el backend
+UTXO no es persistente, el conjunto UTXO completo:
+
+    "BCSN" | versión (1 byte) | número de cabeceras (8 bytes)
+    cabeceras: cabecera canónica (HEADER_SIZE bytes) + hash (32 bytes)
+    número de UTXOs (8 bytes, 0xFF..FF si no se incluyen)
+    UTXOs: outpoint (2 bytes de longitud + UTF-8) | dirección (2 bytes de longitud + UTF-8) | cantidad (double)
+
+Al arrancar, las cabeceras se leen de la instantánea y las transacciones de cada bloque se cargan
+desde el almacenamiento de bloques solo cuando se accede a ellas por primera vez.
+"""
+
+import struct
+
+from blockchain.block import Block, HEADER_SIZE
+from blockchain.encoding import decode_header
+from utils.archivos import escribir_atomico
+
+MAGIC = b"BCSN"
+VERSION = 1
+PREAMBLE = struct.Struct(">4sBQ")
+COUNT = struct.Struct(">Q")
+LENGTH = struct.Struct(">H")
+AMOUNT = struct.Struct(">d")
+NO_UTXOS = 2 ** 64 - 1
+HEADER_RECORD_SIZE = HEADER_SIZE + 32
+
+
+def _pack_text(text):
+    data = text.encode()
+    return LENGTH.pack(len(data)) + data
+
+
+def write_snapshot(path, chain, utxos=None):
+    """
+    Escribe la instantánea de forma atómica (archivo temporal + renombrado).
+
+    Args:
+        path (str): Ruta del archivo de instantánea.
+        chain (list): Bloques de la cadena.
+        utxos (iterable, opcional): Pares ('txid:index', utxo). Si es None, no se incluye el conjunto UTXO.
+    """
+    parts = [PREAMBLE.pack(MAGIC, VERSION, len(chain))]
+    for block in chain:
+        parts.append(block.header())
+        parts.append(bytes.fromhex(block.hash))
+
+    if utxos is None:
+        parts.append(COUNT.pack(NO_UTXOS))
+    else:
+        entries = [
+            _pack_text(outpoint) + _pack_text(utxo["direccion"]) + AMOUNT.pack(utxo["cantidad"])
+            for outpoint, utxo in utxos
+        ]
+        parts.append(COUNT.pack(len(entries)))
+        parts.extend(entries)
+
+    escribir_atomico(path, b"".join(parts))
+
+
+def read_snapshot(path):
+    """
+    Lee una instantánea.
+
+    Args:
+        path (str): Ruta del archivo de instantánea.
+
+    Returns:
+        tuple: (cabeceras, utxos). cabeceras es una lista de dicts con index, timestamp, prev_hash,
+        merkle_root, nonce y hash; utxos es un dict o None si la instantánea no lo incluye.
+
+    Raises:
+        ValueError: Si el archivo no es una instantánea válida o su versión no es compatible.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+
+    magic, version, count = PREAMBLE.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Instantánea no compatible: {path}")
+    pos = PREAMBLE.size
+
+    headers = []
+    for _ in range(count):
+        header = decode_header(data, pos)
+        header["hash"] = data[pos + HEADER_SIZE:pos + HEADER_RECORD_SIZE].hex()
+        headers.append(header)
+        pos += HEADER_RECORD_SIZE
+
+    (n_utxos,) = COUNT.unpack_from(data, pos)
+    pos += COUNT.size
+    if n_utxos == NO_UTXOS:
+        return headers, None
+
+    utxos = {}
+    for _ in range(n_utxos):
+        texts = []
+        for _ in range(2):
+            (length,) = LENGTH.unpack_from(data, pos)
+            pos += LENGTH.size
+            texts.append(data[pos:pos + length].decode())
+            pos += length
+        (amount,) = AMOUNT.unpack_from(data, pos)
+        pos += AMOUNT.size
+        utxos[texts[0]] = {"direccion": texts[1], "cantidad": amount}
+    return headers, utxos
+
+
+def block_from_header(header, loader):
+    """
+    Crea un bloque perezoso a partir de su cabecera.
+
+    Args:
+        header (dict): Cabecera leída de la instantánea.
+        loader (callable): Función que devuelve las transacciones del bloque.
+
+    Returns:
+        Block: Bloque cuyas transacciones se cargan en el primer acceso.
+    """
+    return Block(
+        index=header["index"],
+        transactions=None,
+        prev_hash=header["prev_hash"],
+        nonce=header["nonce"],
+        timestamp=header["timestamp"],
+        hash=header["hash"],
+        merkle_root=header["merkle_root"],
+        loader=loader
+    )
@@ -0,0 +1,435 @@
+"""
+storage.py
+
+Este módulo define la clase BlockStore, el almacenamiento de bloques de solo anexado.
+
+- Cada bloque nuevo se anexa al segmento activo (blk00000.dat, blk00001.dat, ...) como un registro
+  de longitud (4 bytes) + bloque en formato binario (ver blockchain.encoding). Los bloques con
+  transacciones anteriores a ese formato se guardan en JSON; al leer, los registros JSON se reconocen
+  por empezar con '{'.
+- Un índice de registros de tamaño fijo (index.dat) guarda para cada altura el segmento, el offset,
+  la longitud y el hash del bloque, de modo que leer un bloque cuesta un solo acceso.
+- Las llamadas a fsync se agrupan: se sincroniza cada sync_every bloques o al llamar flush().
+  Los datos se sincronizan siempre antes que el índice, para que el índice nunca apunte a datos perdidos.
+- Cuando el segmento activo supera segment_size, el siguiente se crea como archivo temporal,
+  se sincroniza y se renombra de forma atómica.
+- La lectura usa archivos mapeados en memoria y permite recorrer la cadena bloque a bloque.
+- Junto a los bloques se guardan, en undo.dat, los datos para deshacer cada bloque (las salidas que
+  gastó), de modo que desconectar un bloque no requiere volver a procesar la cadena.
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+
+from blockchain.encoding import decode_block_dict
+
+INDEX_RECORD = struct.Struct(">QIQI32s")  # altura, segmento, offset, longitud, hash
+LENGTH = struct.Struct(">I")
+UNDO_RECORD = struct.Struct(">Q32sI")     # altura, hash, longitud
+
+
+def _fsync_directory(directory):
+    """
+    Sincroniza la entrada de directorio para que un renombrado sobreviva a una caída (solo POSIX).
+    """
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class BlockStore:
+    """
+    Almacenamiento de bloques de solo anexado con índice por altura y por hash.
+
+    Atributos:
+        directory (str): Directorio donde se guardan los segmentos y el índice.
+        segment_size (int): Tamaño en bytes a partir del cual se abre un segmento nuevo.
+        sync_every (int): Número de bloques anexados entre cada fsync.
+    """
+
+    def __init__(self, directory, segment_size=16 * 1024 * 1024, sync_every=16):
+        """
+        Abre (o crea) un almacenamiento de bloques y carga su índice.
+
+        Args:
+            directory (str): Directorio del almacenamiento.
+            segment_size (int): Tamaño máximo aproximado de cada segmento en bytes.
+            sync_every (int): Bloques anexados entre cada fsync automático.
+        """
+        self.directory = directory
+        self.segment_size = segment_size
+        self.sync_every = sync_every
+        os.makedirs(directory, exist_ok=True)
+
+        self._locations = []   # altura -> (segmento, offset, longitud)
+        self._hashes = []      # altura -> hash hexadecimal
+        self._heights = {}     # hash hexadecimal -> altura
+        self._maps = {}        # segmento -> (mmap, tamaño mapeado)
+        self._read_lock = threading.Lock()  # un remapeo cierra el mmap anterior: las lecturas no se solapan con él
+        self._undo = {}        # altura -> (offset, longitud) en undo.dat
+        self._pending = 0
+        self._segment_file = None
+        self._index_file = None
+        self._undo_file = None
+
+        self._recover()
+        self._recover_undo()
+        self._open_for_append()
+
+    # --- Rutas ---
+
+    def _segment_path(self, segment):
+        return os.path.join(self.directory, f"blk{segment:05d}.dat")
+
+    @property
+    def _index_path(self):
+        return os.path.join(self.directory, "index.dat")
+
+    @property
+    def _undo_path(self):
+        return os.path.join(self.directory, "undo.dat")
+
+    # --- Apertura y recuperación ---
+
+    def _recover(self):
+        """
+        Carga el índice y descarta lo que quedó a medio escribir tras una caída: registros de índice
+        incompletos, registros que apuntan más allá del final de su segmento y segmentos temporales.
+        """
+        for name in os.listdir(self.directory):
+            if name.endswith(".tmp"):
+                os.remove(os.path.join(self.directory, name))
+
+        data = b""
+        if os.path.exists(self._index_path):
+            with open(self._index_path, "rb") as f:
+                data = f.read()
+
+        sizes = {}
+        valid = 0
+        for pos in range(0, len(data) - INDEX_RECORD.size + 1, INDEX_RECORD.size):
+            height, segment, offset, length, block_hash = INDEX_RECORD.unpack_from(data, pos)
+            if segment not in sizes:
+                path = self._segment_path(segment)
+                sizes[segment] = os.path.getsize(path) if os.path.exists(path) else -1
+            if height != len(self._locations) or offset + LENGTH.size + length > sizes[segment]:
+                break
+            self._append_location(segment, offset, length, block_hash.hex())
+            valid += 1
+
+        if valid * INDEX_RECORD.size != len(data):
+            with open(self._index_path, "r+b") as f:
+                f.truncate(valid * INDEX_RECORD.size)
+
+        # Recortar datos anexados sin registro de índice y segmentos posteriores al último indexado.
+        segment, end = self._end_position()
+        path = self._segment_path(segment)
+        if os.path.exists(path) and os.path.getsize(path) > end:
+            with open(path, "r+b") as f:
+                f.truncate(end)
+        self._remove_segments_after(segment)
+
+    def _recover_undo(self):
+        """
+        Carga las posiciones de los datos para deshacer y descarta los registros incompletos o de
+        bloques que ya no están guardados.
+        """
+        if not os.path.exists(self._undo_path):
+            return
+        with open(self._undo_path, "rb") as f:
+            data = f.read()
+        pos = 0
+        while pos + UNDO_RECORD.size <= len(data):
+            height, block_hash, length = UNDO_RECORD.unpack_from(data, pos)
+            start = pos + UNDO_RECORD.size
+            if start + length > len(data) or height >= len(self._hashes) \
+                    or self._hashes[height] != block_hash.hex():
+                break
+            self._undo[height] = (start, length)
+            pos = start + length
+        if pos != len(data):
+            with open(self._undo_path, "r+b") as f:
+                f.truncate(pos)
+
+    def _end_position(self):
+        """
+        Devuelve el segmento activo y el offset donde termina el último bloque indexado.
+        """
+        if not self._locations:
+            return 0, 0
+        segment, offset, length = self._locations[-1]
+        return segment, offset + LENGTH.size + length
+
+    def _remove_segments_after(self, segment):
+        for name in os.listdir(self.directory):
+            if name.startswith("blk") and name.endswith(".dat") and int(name[3:8]) > segment:
+                os.remove(os.path.join(self.directory, name))
+
+    def _open_for_append(self):
+        segment, _ = self._end_position()
+        self._segment = segment
+        self._segment_file = open(self._segment_path(segment), "ab")
+        self._index_file = open(self._index_path, "ab")
+        self._undo_file = open(self._undo_path, "ab")
+
+    def _append_location(self, segment, offset, length, block_hash):
+        self._heights[block_hash] = len(self._locations)
+        self._locations.append((segment, offset, length))
+        self._hashes.append(block_hash)
+
+    # --- Escritura ---
+
+    def __len__(self):
+        return len(self._locations)
+
+    def append(self, block):
+        """
+        Anexa un bloque al final del almacenamiento.
+
+        Args:
+            block (Block): Bloque a guardar. Su índice debe ser igual a la altura siguiente.
+
+        Returns:
+            int: Altura en la que quedó guardado el bloque.
+
+        Raises:
+            ValueError: Si el índice del bloque no es la siguiente altura.
+        """
+        height = len(self._locations)
+        if block.index != height:
+            raise ValueError(f"Se esperaba el bloque #{height}, se recibió #{block.index}")
+
+        try:
+            payload = block.to_bytes()
+        except ValueError:
+            payload = json.dumps(block.to_dict(), separators=(",", ":")).encode()
+        offset = self._segment_file.tell()
+        if offset > 0 and offset + LENGTH.size + len(payload) > self.segment_size:
+            self._rollover()
+            offset = 0
+
+        self._segment_file.write(LENGTH.pack(len(payload)))
+        self._segment_file.write(payload)
+        self._index_file.write(INDEX_RECORD.pack(height, self._segment, offset, len(payload),
+                                                 bytes.fromhex(block.hash)))
+        self._append_location(self._segment, offset, len(payload), block.hash)
+
+        self._pending += 1
+        if self._pending >= self.sync_every:
+            self.flush()
+        return height
+
+    def append_undo(self, height, payload):
+        """
+        Guarda los datos para deshacer un bloque ya anexado.
+
+        Args:
+            height (int): Altura del bloque.
+            payload (bytes): Datos serializados (ver blockchain.encoding.encode_undo).
+        """
+        if height >= len(self._locations):
+            raise ValueError(f"No hay un bloque guardado en la altura {height}")
+        self._undo_file.write(UNDO_RECORD.pack(height, bytes.fromhex(self._hashes[height]), len(payload)))
+        offset = self._undo_file.tell()
+        self._undo_file.write(payload)
+        self._undo[height] = (offset, len(payload))
+
+    def read_undo(self, height):
+        """
+        Lee los datos para deshacer un bloque.
+
+        Args:
+            height (int): Altura del bloque.
+
+        Returns:
+            bytes | None: Datos serializados, o None si no se guardaron para ese bloque.
+        """
+        location = self._undo.get(height)
+        if location is None:
+            return None
+        self._undo_file.flush()
+        offset, length = location
+        with open(self._undo_path, "rb") as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def _rollover(self):
+        """
+        Cierra el segmento activo y abre el siguiente. El segmento nuevo se crea como temporal,
+        se sincroniza y se renombra, para que nunca exista a medio crear con su nombre definitivo.
+        """
+        self.flush()
+        self._segment_file.close()
+        self._segment += 1
+        path = self._segment_path(self._segment)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        _fsync_directory(self.directory)
+        self._segment_file = open(path, "ab")
+
+    def flush(self):
+        """
+        Escribe a disco los bloques pendientes: primero el segmento y después el índice.
+        """
+        if self._segment_file is None:
+            return
+        self._segment_file.flush()
+        self._undo_file.flush()
+        self._index_file.flush()
+        if self._pending:
+            os.fsync(self._segment_file.fileno())
+            os.fsync(self._undo_file.fileno())
+            os.fsync(self._index_file.fileno())
+            self._pending = 0
+
+    def truncate(self, height):
+        """
+        Descarta los bloques desde la altura indicada (inclusive), por ejemplo si la cadena guardada
+        difiere de la cadena en memoria.
+
+        Args:
+            height (int): Primera altura a descartar.
+        """
+        if height >= len(self._locations):
+            return
+        self.flush()
+        self._close_maps()
+        self._segment_file.close()
+        self._index_file.close()
+        self._undo_file.close()
+
+        segment, offset, _ = self._locations[height]
+        for block_hash in self._hashes[height:]:
+            self._heights.pop(block_hash, None)
+        del self._locations[height:]
+        del self._hashes[height:]
+
+        with open(self._segment_path(segment), "r+b") as f:
+            f.truncate(offset)
+            os.fsync(f.fileno())
+        self._remove_segments_after(segment)
+        with open(self._index_path, "r+b") as f:
+            f.truncate(height * INDEX_RECORD.size)
+            os.fsync(f.fileno())
+        discarded = [h for h in self._undo if h >= height]
+        if discarded:
+            undo_end = min(self._undo[h][0] for h in discarded) - UNDO_RECORD.size
+            for h in discarded:
+                del self._undo[h]
+            with open(self._undo_path, "r+b") as f:
+                f.truncate(undo_end)
+                os.fsync(f.fileno())
+
+        self._open_for_append()
+
+    # --- Lectura ---
+
+    def height_of(self, block_hash):
+        """
+        Devuelve la altura de un bloque a partir de su hash.
+
+        Args:
+            block_hash (str): Hash del bloque.
+
+        Returns:
+            int | None: Altura, o None si el bloque no está guardado.
+        """
+        return self._heights.get(block_hash)
+
+    def hash_at(self, height):
+        """
+        Devuelve el hash del bloque guardado en una altura.
+        """
+        return self._hashes[height]
+
+    def _map(self, segment, end):
+        """
+        Devuelve un mmap del segmento que cubra al menos hasta el offset end, remapeándolo si el
+        segmento creció desde la última vez.
+        """
+        mapped = self._maps.get(segment)
+        if mapped is None or mapped[1] < end:
+            if mapped is not None:
+                mapped[0].close()
+            if segment == self._segment:
+                self._segment_file.flush()
+            with open(self._segment_path(segment), "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                mapped = (mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ), size)
+            self._maps[segment] = mapped
+        return mapped[0]
+
+    def read_raw(self, height):
+        """
+        Lee el contenido serializado de un bloque con un único acceso al segmento mapeado.
+
+        Args:
+            height (int): Altura del bloque.
+
+        Returns:
+            bytes: Bloque serializado (binario o JSON).
+        """
+        segment, offset, length = self._locations[height]
+        start = offset + LENGTH.size
+        with self._read_lock:
+            data = self._map(segment, start + length)
+            return data[start:start + length]
+
+    def read(self, height):
+        """
+        Lee un bloque guardado.
+
+        Args:
+            height (int): Altura del bloque.
+
+        Returns:
+            dict: Datos del bloque (formato de Block.to_dict).
+        """
+        raw = self.read_raw(height)
+        if raw[:1] == b"{":
+            return json.loads(raw)
+        return decode_block_dict(raw)
+
+    def iter_blocks(self, start=0):
+        """
+        Recorre los bloques guardados uno a uno, sin cargar la cadena completa en memoria.
+
+        Args:
+            start (int): Altura desde la que empezar.
+
+        Yields:
+            dict: Datos de cada bloque.
+        """
+        for height in range(start, len(self._locations)):
+            yield self.read(height)
+
+    # --- Cierre ---
+
+    def _close_maps(self):
+        for mapped, _ in self._maps.values():
+            mapped.close()
+        self._maps = {}
+
+    def close(self):
+        """
+        Sincroniza los bloques pendientes y cierra los archivos.
+        """
+        if self._segment_file is None:
+            return
+        self.flush()
+        self._close_maps()
+        self._segment_file.close()
+        self._index_file.close()
+        self._undo_file.close()
+        self._segment_file = None
+        self._index_file = None
+        self._undo_file = None
@@ -3,29 +3,155 @@ system.py
 
 Este módulo define la clase SistemaBlockchain, que actúa como controlador central del proyecto.
 Se encarga de manejar usuarios, transacciones, el modelo UTXO, la blockchain y la minería.
-También incluye persistencia en archivos JSON y soporte para financiar usuarios para pruebas.
+También incluye persistencia (usuarios en JSON, bloques en un almacenamiento de solo anexado y una
+instantánea binaria de cabeceras y UTXOs para arrancar rápido) y soporte para financiar usuarios para pruebas.
 """
 
 import os
 import json
-from blockchain.wallet import Wallet
+import struct
+import weakref
+from functools import partial, wraps
+from blockchain.wallet import Wallet, address_from_public_key, generate_wallets
 from blockchain.transaction import Transaction, UTXOManager
 from blockchain.blockchain import Blockchain
-from utils.logger import log_info
+from blockchain.coin_selection import select_coins
+from blockchain.encoding import VERSION, decode_undo, encode_undo, transaction_id
+from blockchain.mempool import Mempool
+from blockchain.snapshot import block_from_header, read_snapshot, write_snapshot
+from blockchain.storage import BlockStore
+from blockchain.verification import verify_batch
+from utils import metrics
+from utils.archivos import guardar_json
+from utils.logger import log_info, log_warning
+from utils.rwlock import RWLock
+
+GUARDAR_SECONDS = metrics.histogram("sistema_guardar_estado_seconds", "Duración de guardar_estado")
+CARGAR_SECONDS = metrics.histogram("sistema_cargar_estado_seconds", "Duración de cargar_estado")
+MEMPOOL_SIZE = metrics.gauge("mempool_transactions", "Transacciones en el mempool")
+MEMPOOL_BYTES = metrics.gauge("mempool_bytes", "Tamaño de las transacciones del mempool en bytes")
+UTXO_COUNT = metrics.gauge("utxo_count", "UTXOs en el conjunto")
+CHAIN_HEIGHT = metrics.gauge("blockchain_height", "Altura del último bloque de la cadena")
+
+RECOMPENSA_BLOQUE = 3  # monedas que recibe el minero por bloque, además de las comisiones
+DESHACER_EN_MEMORIA = 100  # bloques recientes cuyos datos para deshacer se conservan en memoria
+
+
+def _lectura(metodo):
+    """
+    Ejecuta el método con el candado del sistema tomado para leer.
+    """
+    @wraps(metodo)
+    def envoltura(self, *args, **kwargs):
+        with self.bloqueo.read():
+            return metodo(self, *args, **kwargs)
+    return envoltura
+
+
+def _escritura(metodo):
+    """
+    Ejecuta el método con el candado del sistema tomado para escribir.
+    """
+    @wraps(metodo)
+    def envoltura(self, *args, **kwargs):
+        with self.bloqueo.write():
+            return metodo(self, *args, **kwargs)
+    return envoltura
+
+
+def _transacciones_guardadas(store, altura):
+    """
+    Lee del almacenamiento las transacciones de un bloque (cargador de los bloques perezosos).
+    """
+    return store.read(altura)["transactions"]
+
 
 class SistemaBlockchain:
     """
     Clase que encapsula toda la lógica del sistema blockchain: usuarios, UTXO, transacciones y bloques.
+
+    Una misma instancia puede compartirse entre hilos (por ejemplo, todas las sesiones de la interfaz):
+    las consultas toman self.bloqueo para leer y pueden ejecutarse a la vez, mientras que las operaciones
+    que modifican el estado lo toman para escribir y se serializan. La Prueba de Trabajo se hace sin el
+    candado, así que minar no bloquea las consultas. Quien lea atributos directamente (self.usuarios,
+    self.blockchain.chain, ...) desde otro hilo debe tomar antes `sistema.bloqueo.read()`.
     """
 
-    def __init__(self):
+    def __init__(self, workers=1, utxo_backend=None, crear_genesis=True):
         """
         Inicializa el sistema con una blockchain nueva, un gestor UTXO y un diccionario vacío de usuarios.
+
+        Args:
+            workers (int): Número de procesos usados para minar bloques. Por defecto 1.
+            utxo_backend (opcional): Backend del conjunto UTXO (ver blockchain.utxo_store).
+                Por defecto, un conjunto en memoria que se guarda en la instantánea binaria.
+            crear_genesis (bool): Si es False, no se mina el bloque génesis (el estado se cargará de disco).
+        """
+        self.bloqueo = RWLock()
+        self._inicializar(workers, utxo_backend, crear_genesis)
+
+        # Los gauges se evalúan al exportar las métricas y reflejan el último sistema creado.
+        ref = weakref.ref(self)
+        MEMPOOL_SIZE.set_function(lambda: len(ref().mempool))
+        MEMPOOL_BYTES.set_function(lambda: ref().mempool.size_bytes)
+        UTXO_COUNT.set_function(lambda: len(ref().utxo_manager))
+        CHAIN_HEIGHT.set_function(lambda: len(ref().blockchain.chain) - 1)
+
+    def _inicializar(self, workers, utxo_backend, crear_genesis):
+        """
+        Crea el estado del sistema (todo salvo el candado); lo usan __init__ y reiniciar.
         """
-        self.blockchain = Blockchain()
-        self.utxo_manager = UTXOManager()
+        self.blockchain = Blockchain(workers=workers, create_genesis=crear_genesis)
+        self.utxo_manager = UTXOManager(utxo_backend)
         self.usuarios = {}  # {"nombre": Wallet}
+        self.direcciones = {}  # {"direccion": Wallet}
+        self.estrategia_seleccion = "largest_first"
+        self.mempool = Mempool()
+        self.tamano_max_bloque = 1_000_000  # bytes de transacciones por bloque
+        self._stores = {}  # {"carpeta": BlockStore}
+        self._undo = {}  # {"hash del bloque": [("txid:index", utxo gastado), ...]}, de los últimos bloques
+        self._undo_guardado = set()  # hashes de self._undo cuyos datos ya están en undo.dat
+        self.fondeos = []  # UTXOs creados fuera de la cadena por fund_usuario, con la altura en que se crearon
+
+    @classmethod
+    def desde_carpeta(cls, carpeta="data", **kwargs):
+        """
+        Crea un sistema cargando su estado desde disco, sin minar un génesis que luego se descartaría.
+        Si la carpeta no tiene una cadena guardada, se crea un génesis nuevo.
+
+        Args:
+            carpeta (str): Ruta al directorio de datos.
+            **kwargs: Argumentos adicionales para el constructor (workers, utxo_backend).
+
+        Returns:
+            SistemaBlockchain: Sistema con el estado cargado.
+        """
+        sistema = cls(crear_genesis=False, **kwargs)
+        sistema.cargar_estado(carpeta)
+        return sistema
 
+    @_escritura
+    def reiniciar(self, carpeta=None, workers=None, utxo_backend=None):
+        """
+        Descarta todo el estado en memoria y vuelve a empezar, cargándolo desde una carpeta (como
+        desde_carpeta) o con un génesis nuevo. El objeto y su candado no cambian, así que quien comparte
+        el sistema (por ejemplo, las sesiones de la interfaz) ve el estado nuevo sin volver a obtenerlo.
+
+        No cierra los almacenamientos de bloques ni el backend UTXO anteriores: quien reinicia los cierra
+        antes (cerrar_block_stores, utxo_manager.close), normalmente para borrar sus archivos.
+
+        Args:
+            carpeta (str, opcional): Directorio de datos del que cargar el estado. Si no se indica, se
+                crea un génesis nuevo.
+            workers (int, opcional): Número de procesos para minar. Por defecto, el que ya tenía el sistema.
+            utxo_backend (opcional): Backend del nuevo conjunto UTXO. Por defecto, uno en memoria.
+        """
+        workers = self.blockchain.workers if workers is None else workers
+        self._inicializar(workers, utxo_backend, crear_genesis=carpeta is None)
+        if carpeta is not None:
+            self.cargar_estado(carpeta)
+
+    @_escritura
     def crear_usuario(self, nombre):
         """
         Crea un nuevo usuario y su wallet asociada.
@@ -37,17 +163,45 @@ class SistemaBlockchain:
             Wallet | None: Wallet creada, o None si el usuario ya existía.
         """
         if nombre in self.usuarios:
-            log_info(f"El usuario '{nombre}' ya existe.")
+            log_info("El usuario '%s' ya existe.", nombre, categoria="usuarios")
             return None
 
         wallet = Wallet()
         self.usuarios[nombre] = wallet
-        log_info(f"Usuario '{nombre}' creado con dirección: {wallet.address}")
+        self.direcciones[wallet.address] = wallet
+        log_info("Usuario '%s' creado con dirección: %s", nombre, wallet.address, categoria="usuarios")
         return wallet
 
+    def crear_usuarios(self, nombres, workers=None):
+        """
+        Crea muchos usuarios a la vez. Las claves se generan en paralelo (ver wallet.generate_wallets)
+        y sin el candado del sistema, que solo se toma para registrar las wallets.
+
+        Args:
+            nombres (list): Nombres de los usuarios. Los que ya existen se omiten.
+            workers (int, opcional): Número de procesos para generar claves. Por defecto, el número de CPUs.
+
+        Returns:
+            dict: {nombre: Wallet} de los usuarios creados.
+        """
+        with self.bloqueo.read():
+            nuevos = [nombre for nombre in dict.fromkeys(nombres) if nombre not in self.usuarios]
+        creados = {}
+        wallets = generate_wallets(len(nuevos), workers)
+        with self.bloqueo.write():
+            for nombre, wallet in zip(nuevos, wallets):
+                if nombre in self.usuarios:
+                    continue
+                self.usuarios[nombre] = wallet
+                self.direcciones[wallet.address] = wallet
+                creados[nombre] = wallet
+        log_info("%d usuarios creados.", len(creados), categoria="usuarios")
+        return creados
+
+    @_lectura
     def obtener_saldo(self, direccion):
         """
-        Calcula el saldo actual de una dirección sumando todos sus UTXOs.
+        Obtiene el saldo actual de una dirección a partir del saldo indexado del gestor UTXO.
 
         Args:
             direccion (str): Dirección pública del usuario.
@@ -55,159 +209,849 @@ class SistemaBlockchain:
         Returns:
             float: Suma total de monedas disponibles.
         """
-        utxos = self.utxo_manager.get_utxos_for_address(direccion)
-        return sum(v["cantidad"] for v in utxos.values())
+        return self.utxo_manager.get_balance(direccion)
+
+    @_lectura
+    def historial_movimientos(self, direccion):
+        """
+        Obtiene los movimientos confirmados de una dirección usando los índices de la blockchain,
+        sin recorrer la cadena.
+
+        Args:
+            direccion (str): Dirección pública del usuario.
+
+        Returns:
+            list: Dicts con altura, timestamp, txid y cambio (positivo si la dirección recibió monedas),
+            en orden de la cadena.
+        """
+        movimientos = []
+        for txid in self.blockchain.transactions_for_address(direccion):
+            altura, posicion = self.blockchain.locate_transaction(txid)
+            bloque = self.blockchain.chain[altura]
+            tx = bloque.transactions[posicion]
+            if "direccion" in tx:
+                cambio = tx["cantidad"] if tx["direccion"] == direccion else 0
+            else:
+                cambio = sum(o["cantidad"] for o in tx["outputs"] if o["direccion"] == direccion)
+                # Todas las entradas de una transacción son del remitente y suman salidas + comisión.
+                if tx["inputs"] and self._propietario_entrada(tx["inputs"][0]) == direccion:
+                    cambio -= sum(o["cantidad"] for o in tx["outputs"]) + tx["fee"]
+            movimientos.append({"altura": altura, "timestamp": bloque.timestamp, "txid": txid, "cambio": cambio})
+        return movimientos
 
-    def enviar_transaccion(self, remitente, receptor, monto, fee=1.0):
+    def _propietario_entrada(self, entrada):
         """
-        Crea y firma una transacción desde un remitente hacia un receptor.
+        Devuelve la dirección dueña de la salida que gasta una entrada confirmada, o None si no se conoce.
+        """
+        propietario = self.blockchain.output_owner(entrada["txid"], entrada["index"])
+        if propietario is None and entrada["txid"].startswith("fund_"):
+            wallet = self.usuarios.get(entrada["txid"][len("fund_"):])
+            propietario = wallet.address if wallet else None
+        return propietario
+
+    @_escritura
+    def enviar_transaccion(self, remitente, receptor, monto, fee=1.0, estrategia=None):
+        """
+        Crea y firma una transacción desde un remitente hacia un receptor y la agrega al mempool.
+
+        Los UTXOs que ya gasta otra transacción pendiente no se consideran en la selección de monedas.
 
         Args:
             remitente (str): Nombre del usuario emisor.
             receptor (str): Nombre del usuario receptor.
             monto (float): Cantidad a transferir.
             fee (float): Comisión para el minero.
+            estrategia (str, opcional): Estrategia de selección de monedas (ver blockchain.coin_selection).
+                Si no se indica, se usa self.estrategia_seleccion.
 
         Returns:
-            Transaction | None: Transacción firmada si es válida, o None si falla.
+            Transaction | None: Transacción firmada si es válida y fue aceptada en el mempool, o None si falla.
         """
         if remitente not in self.usuarios or receptor not in self.usuarios:
-            log_info("Uno de los usuarios no existe.")
+            log_info("Uno de los usuarios no existe.", categoria="transacciones")
             return None
 
-        sender_wallet = self.usuarios[remitente]
-        receiver_wallet = self.usuarios[receptor]
-        sender_address = sender_wallet.address
+        outputs = [{"direccion": self.usuarios[receptor].address, "cantidad": monto}]
+        tx, _ = self._crear_transferencia(self.usuarios[remitente], outputs, fee, estrategia)
+        return tx
 
-        utxos = self.utxo_manager.get_utxos_for_address(sender_address)
-        seleccionados = []
-        acumulado = 0
+    @_escritura
+    def enviar_pagos(self, remitente, pagos, fee=1.0, estrategia=None):
+        """
+        Paga a muchos receptores con una sola transacción firmada: las monedas se seleccionan una vez,
+        cada entrada se firma una vez y cada pago es una salida. Es la forma eficiente de hacer pagos
+        masivos (por ejemplo, una nómina), frente a llamar a enviar_transaccion por cada receptor.
 
-        for utxo_id, utxo_data in utxos.items():
-            seleccionados.append((utxo_id, utxo_data))
-            acumulado += utxo_data["cantidad"]
-            if acumulado >= monto + fee:
-                break
+        Los pagos a usuarios inexistentes o con montos no positivos se rechazan uno a uno y los demás
+        se incluyen. Si la transacción no puede crearse (fondos insuficientes, tamaño mayor que el de
+        un bloque o rechazo del mempool), todos los pagos fallan.
 
-        if acumulado < monto + fee:
-            log_info("Fondos insuficientes.")
-            return None
+        Args:
+            remitente (str): Nombre del usuario emisor.
+            pagos (list): Pares (receptor, monto), con el nombre del usuario receptor.
+            fee (float): Comisión de la transacción completa.
+            estrategia (str, opcional): Estrategia de selección de monedas (ver blockchain.coin_selection).
+
+        Returns:
+            list: Un dict por pago, en el mismo orden, con receptor, monto, txid y salida (índice de la
+            salida de la transacción) si el pago se incluyó, o error con el motivo si no.
+        """
+        resultados = [{"receptor": receptor, "monto": monto, "txid": None, "salida": None, "error": None}
+                      for receptor, monto in pagos]
+        if remitente not in self.usuarios:
+            error = "remitente inexistente"
+        else:
+            outputs = []
+            for resultado in resultados:
+                if resultado["receptor"] not in self.usuarios:
+                    resultado["error"] = "receptor inexistente"
+                elif not resultado["monto"] > 0:
+                    resultado["error"] = "monto no positivo"
+                else:
+                    resultado["salida"] = len(outputs)
+                    outputs.append({"direccion": self.usuarios[resultado["receptor"]].address,
+                                    "cantidad": resultado["monto"]})
+            if not outputs:
+                error = "ningún pago válido"
+            else:
+                tx, error = self._crear_transferencia(self.usuarios[remitente], outputs, fee, estrategia)
+
+        for resultado in resultados:
+            if resultado["error"] is not None:
+                continue
+            if error is not None:
+                resultado["error"] = error
+                resultado["salida"] = None
+            else:
+                resultado["txid"] = tx.txid
+        aceptados = sum(r["txid"] is not None for r in resultados)
+        log_info("Pagos de '%s': %d de %d incluidos%s", remitente, aceptados, len(resultados),
+                 f" ({error})" if error else "", categoria="transacciones")
+        return resultados
+
+    def _crear_transferencia(self, sender_wallet, outputs, fee, estrategia=None):
+        """
+        Selecciona monedas del remitente para cubrir las salidas y la comisión, agrega la salida de
+        cambio, firma todas las entradas y agrega la transacción al mempool.
+
+        Los UTXOs que ya gasta otra transacción pendiente no se consideran en la selección de monedas.
+
+        Args:
+            sender_wallet (Wallet): Wallet del remitente.
+            outputs (list): Salidas a pagar (dicts con direccion y cantidad), sin el cambio.
+            fee (float): Comisión para el minero.
+            estrategia (str, opcional): Estrategia de selección de monedas. Si no se indica, se usa
+                self.estrategia_seleccion.
+
+        Returns:
+            tuple: (Transaction, None) si la transacción quedó en el mempool, o (None, motivo) si no.
+        """
+        sender_address = sender_wallet.address
+        seleccion = select_coins(
+            self.utxo_manager, sender_address, sum(o["cantidad"] for o in outputs) + fee,
+            strategy=estrategia or self.estrategia_seleccion,
+            exclude=self.mempool.spent_outpoints
+        )
+        if seleccion is None:
+            log_info("Fondos insuficientes.", categoria="transacciones")
+            return None, "fondos insuficientes"
 
         inputs = []
-        for utxo_id, _ in seleccionados:
-            txid, index = utxo_id.split(":")
+        for utxo_id, _ in seleccion.inputs:
+            txid, index = utxo_id.rsplit(":", 1)
             inputs.append({"txid": txid, "index": int(index)})
 
-        outputs = [{"direccion": receiver_wallet.address, "cantidad": monto}]
-        cambio = acumulado - monto - fee
-        if cambio > 0:
-            outputs.append({"direccion": sender_address, "cantidad": cambio})
+        outputs = list(outputs)
+        if seleccion.creates_change:
+            outputs.append({"direccion": sender_address, "cantidad": seleccion.change})
 
         tx = Transaction(inputs, outputs, fee)
-        for i in range(len(inputs)):
-            tx.sign_input(i, sender_wallet.get_keys()["private_key"])
+        tx.sign_inputs(sender_wallet.private_key)
 
-        for i in range(len(inputs)):
-            if not tx.verify_input(i, sender_wallet.get_keys()["public_key"]):
-                log_info("Firma inválida en input", i)
-                return None
+        public_key = sender_wallet.get_keys()["public_key"]
+        resultados = verify_batch([(tx, i, public_key) for i in range(len(inputs))])
+        if not all(resultados):
+            log_info("Firma inválida en input %d", resultados.index(False), categoria="transacciones")
+            return None, "firma inválida"
 
-        log_info(f"Transacción creada: {tx.txid}")
-        return tx
+        if tx.size() > self.tamano_max_bloque:
+            log_info("Transacción de %d bytes, mayor que un bloque: %s", tx.size(), tx.txid,
+                     categoria="transacciones")
+            return None, "transacción mayor que un bloque"
+
+        if not self.mempool.add(tx):
+            log_info("Transacción rechazada por el mempool: %s", tx.txid, categoria="transacciones")
+            return None, "rechazada por el mempool"
+
+        log_info("Transacción creada: %s (%s: %d entradas, %d salidas, cambio %s)", tx.txid, seleccion.strategy,
+                 seleccion.num_inputs, len(outputs), seleccion.change, categoria="transacciones")
+        return tx, None
 
-    def minar_bloque(self, transacciones):
+    def minar_bloque(self, transacciones=None, workers=None, progreso=None):
         """
         Mina un nuevo bloque con una recompensa y las transacciones proporcionadas.
 
+        Si no se proporcionan transacciones, se toma del mempool la plantilla de bloque más rentable
+        (hasta self.tamano_max_bloque bytes). Las transacciones minadas, y las que entraban en conflicto
+        con ellas, se retiran del mempool.
+
         Args:
-            transacciones (list): Lista de objetos Transaction.
+            transacciones (list, opcional): Lista de objetos Transaction.
+            workers (int, opcional): Número de procesos para minar. Si no se indica, se usa el del sistema.
+            progreso (MiningProgress, opcional): Progreso de la búsqueda del nonce, consultable y
+                cancelable desde otro hilo (ver blockchain.mining).
+
+        Returns:
+            Block | None: Bloque minado, o None si no había transacciones, la minería fue cancelada o
+            la cadena avanzó mientras se minaba.
         """
-        if not transacciones:
-            log_info("No hay transacciones para minar.")
-            return
+        # El bloque se arma y se conecta con el candado de escritura, pero la búsqueda del nonce se hace
+        # sin él para no bloquear las consultas. Si entretanto se conectó otro bloque, este se descarta.
+        with self.bloqueo.write():
+            if transacciones is None:
+                transacciones = self.mempool.build_block_template(self.tamano_max_bloque)
+            transacciones = self.verificar_transacciones(transacciones)
+            if not transacciones:
+                log_info("No hay transacciones para minar.", categoria="mineria")
+                return None
+
+            recompensa = {
+                "direccion": "MINERO",
+                "cantidad": RECOMPENSA_BLOQUE + sum(tx.fee for tx in transacciones),
+                "tipo": "recompensa",
+                "altura": len(self.blockchain.chain)
+            }
+            recompensa["txid"] = transaction_id(recompensa)
+            txs_serializadas = [tx.to_dict() for tx in transacciones]
+            txs_serializadas.insert(0, recompensa)
+            bloque = self.blockchain.new_block(txs_serializadas)
 
-        recompensa = {
-            "direccion": "MINERO",
-            "cantidad": 3 + sum(tx.fee for tx in transacciones),
-            "tipo": "recompensa"
-        }
-        txs_serializadas = [tx.__dict__ for tx in transacciones]
-        txs_serializadas.insert(0, recompensa)
+        if not self.blockchain.mine(bloque, workers=workers, progress=progreso):
+            log_info("Minería cancelada.", categoria="mineria")
+            return None
+
+        with self.bloqueo.write():
+            if bloque.prev_hash != self.blockchain.get_last_block().hash:
+                log_info("La cadena avanzó durante la minería; se descarta el bloque #%d", bloque.index,
+                         categoria="mineria")
+                return None
+            self.blockchain.connect_block(bloque)
+            with self.utxo_manager.batch():
+                self._registrar_deshacer(bloque, self._conectar_utxos(txs_serializadas))
+            self.mempool.remove_confirmed(transacciones)
+
+        log_info("Bloque minado: #%d", bloque.index, categoria="mineria")
+        return bloque
+
+    def _validar_transaccion(self, tx, obtener_utxo, txid=None):
+        """
+        Comprueba una transferencia con las reglas que comparten el mempool, la minería y los bloques
+        recibidos (las firmas se comprueban después, en lote, con los trabajos que devuelve):
+
+        - El txid corresponde a su contenido.
+        - Tiene al menos una entrada, sus salidas son positivas y su comisión no es negativa.
+        - Cada entrada gasta una salida existente que ninguna otra de sus entradas gasta, y lleva una
+          clave pública cuyo SHA-256 es la dirección dueña de esa salida. Las firmas se verifican con
+          esa clave, así que no hace falta conocer la wallet del remitente.
+        - Las entradas cubren las salidas más la comisión, así que no crea monedas.
+
+        Args:
+            tx (Transaction): Transacción a comprobar.
+            obtener_utxo (callable): Recibe 'txid:index' y devuelve la salida (dict con direccion y
+                cantidad) o None si no existe.
+            txid (str, opcional): txid declarado, por ejemplo el guardado en un bloque. Por defecto, tx.txid.
+
+        Returns:
+            tuple: (motivo, trabajos). motivo es None si la transacción cumple las reglas o describe el
+            incumplimiento; trabajos son las tripletas (tx, índice de entrada, clave pública) para verify_batch.
+        """
+        if (tx.txid if txid is None else txid) != tx._calculate_txid():
+            return "tiene un txid que no corresponde a su contenido", []
+        if not tx.inputs:
+            return "no tiene entradas", []
+        if not all(o["cantidad"] > 0 for o in tx.outputs):
+            return "tiene salidas no positivas", []
+        if not tx.fee >= 0:
+            return "tiene una comisión negativa", []
+
+        trabajos = []
+        gastados = set()
+        entradas = 0
+        for i, inp in enumerate(tx.inputs):
+            outpoint = f"{inp['txid']}:{inp['index']}"
+            if outpoint in gastados:
+                return f"gasta dos veces la salida {outpoint}", []
+            utxo = obtener_utxo(outpoint)
+            if utxo is None:
+                return f"gasta una salida inexistente ({outpoint})", []
+            public_key = inp.get("public_key")
+            try:
+                del_dueno = public_key is not None and address_from_public_key(public_key) == utxo["direccion"]
+            except ValueError:
+                del_dueno = False
+            if not del_dueno:
+                return f"gasta la salida {outpoint} sin la clave pública de su dueño", []
+            gastados.add(outpoint)
+            entradas += utxo["cantidad"]
+            trabajos.append((tx, i, public_key))
+        if not round(entradas, 8) >= round(sum(o["cantidad"] for o in tx.outputs) + tx.fee, 8):
+            return "gasta más de lo que tienen sus entradas", []
+        return None, trabajos
+
+    @_escritura
+    def verificar_transacciones(self, transacciones):
+        """
+        Comprueba las transacciones contra el conjunto UTXO (ver _validar_transaccion), verifica en lote
+        las firmas de todas sus entradas y descarta las inválidas, así como las que gastan una salida que
+        ya gasta una transacción anterior de la lista.
+
+        Cada firma se verifica con la clave pública que lleva su entrada. Las firmas verificadas al crear
+        la transacción se resuelven desde la caché sin volver a calcularse. Las transacciones
+        descartadas también se retiran del mempool.
 
-        self.blockchain.add_block(txs_serializadas)
+        Args:
+            transacciones (list): Lista de objetos Transaction.
 
+        Returns:
+            list: Transacciones que cumplen las reglas y tienen firmas válidas.
+        """
+        trabajos = []
+        rangos = []
+        validas = []
+        gastados = set()
         for tx in transacciones:
-            for i, output in enumerate(tx.outputs):
-                self.utxo_manager.add_utxo(tx.txid, i, output["direccion"], output["cantidad"])
-            for inp in tx.inputs:
-                self.utxo_manager.remove_utxo(inp["txid"], inp["index"])
+            motivo, propios = self._validar_transaccion(tx, self.utxo_manager.get_utxo)
+            outpoints = {f"{inp['txid']}:{inp['index']}" for inp in tx.inputs}
+            if motivo is None and not gastados.isdisjoint(outpoints):
+                motivo = "gasta una salida que ya gasta otra transacción de la lista"
+            if motivo is not None:
+                log_info("Transacción descartada, %s: %s", motivo, tx.txid, categoria="transacciones")
+                self.mempool.remove(tx.txid)
+                continue
+            gastados |= outpoints
+            rangos.append((tx, len(trabajos), len(trabajos) + len(propios)))
+            trabajos.extend(propios)
+
+        resultados = verify_batch(trabajos)
+        for tx, inicio, fin in rangos:
+            if all(resultados[inicio:fin]):
+                validas.append(tx)
+            else:
+                log_info("Transacción descartada por firma inválida: %s", tx.txid, categoria="transacciones")
+                self.mempool.remove(tx.txid)
+        return validas
+
+    @_escritura
+    def aceptar_transaccion(self, tx):
+        """
+        Agrega al mempool una transacción firmada recibida de otro nodo, si cumple las reglas de
+        _validar_transaccion, sus firmas son válidas y no está ya en el mempool ni en la cadena.
+
+        Args:
+            tx (Transaction): Transacción recibida.
+
+        Returns:
+            bool: True si la transacción quedó en el mempool.
+        """
+        if tx.txid in self.mempool or self.blockchain.locate_transaction(tx.txid) is not None:
+            return False
+        if not self.verificar_transacciones([tx]):
+            return False
+        return self.mempool.add(tx)
 
-        log_info(f"Bloque minado: #{self.blockchain.get_last_block().index}")
+    def cancelar_mineria(self):
+        """
+        Cancela la minería paralela en curso.
+        """
+        self.blockchain.cancel_mining()
 
+    @_lectura
     def mostrar_saldos(self):
         """
         Muestra los saldos actuales de todos los usuarios registrados.
         """
+        saldos = self.utxo_manager.get_balances([wallet.address for wallet in self.usuarios.values()])
         for nombre, wallet in self.usuarios.items():
-            saldo = self.obtener_saldo(wallet.address)
-            log_info(f"{nombre} -> {saldo} monedas")
+            log_info("%s -> %s monedas", nombre, saldos[wallet.address])
+
+    @_lectura
+    def suministro_total(self):
+        """
+        Devuelve las monedas en circulación (suma de todos los UTXOs).
+
+        Returns:
+            float: Oferta total.
+        """
+        return self.utxo_manager.total_supply()
+
+    @_lectura
+    def mas_ricos(self, n=10):
+        """
+        Devuelve los usuarios (o direcciones sin usuario local, como la del minero) con mayor saldo.
+
+        Args:
+            n (int): Número de resultados.
+
+        Returns:
+            list: Pares (nombre o dirección, saldo) ordenados de mayor a menor saldo.
+        """
+        nombres = {wallet.address: nombre for nombre, wallet in self.usuarios.items()}
+        return [(nombres.get(direccion, direccion), saldo) for direccion, saldo in self.utxo_manager.richest(n)]
 
+    @_lectura
     def mostrar_usuarios(self):
         """
         Muestra todas las direcciones asociadas a los usuarios registrados.
         """
         for nombre, wallet in self.usuarios.items():
-            log_info(f"{nombre}: {wallet.address}")
+            log_info("%s: %s", nombre, wallet.address)
 
+    def obtener_block_store(self, carpeta="data"):
+        """
+        Devuelve el almacenamiento de bloques de una carpeta de datos, abriéndolo la primera vez.
+
+        Args:
+            carpeta (str): Ruta al directorio de datos.
+
+        Returns:
+            BlockStore: Almacenamiento de bloques en <carpeta>/bloques.
+        """
+        ruta = os.path.abspath(os.path.join(carpeta, "bloques"))
+        if ruta not in self._stores:
+            self._stores[ruta] = BlockStore(ruta)
+        return self._stores[ruta]
+
+    def cerrar_block_stores(self):
+        """
+        Sincroniza y cierra los almacenamientos de bloques abiertos (por ejemplo antes de borrar la carpeta de datos).
+        """
+        for store in self._stores.values():
+            store.close()
+        self._stores = {}
+
+    @_escritura
     def guardar_estado(self, carpeta="data"):
         """
-        Guarda en archivos JSON el estado actual de usuarios, UTXOs y la blockchain.
+        Guarda los usuarios y los fondeos en JSON, anexa los bloques nuevos al almacenamiento de bloques
+        y escribe la instantánea binaria (cabeceras y, si el backend UTXO no es persistente, el conjunto
+        UTXO) que se usa para arrancar rápido. Los bloques ya guardados no se vuelven a escribir.
 
         Args:
             carpeta (str): Ruta al directorio donde guardar los archivos.
         """
-        usuarios_serializados = {
-            nombre: wallet.get_keys()
-            for nombre, wallet in self.usuarios.items()
-        }
-        with open(os.path.join(carpeta, "usuarios.json"), "w") as f:
-            json.dump(usuarios_serializados, f, indent=4)
+        with GUARDAR_SECONDS.time():
+            usuarios_serializados = {
+                nombre: wallet.get_keys()
+                for nombre, wallet in self.usuarios.items()
+            }
+            guardar_json(os.path.join(carpeta, "usuarios.json"), usuarios_serializados)
+            guardar_json(os.path.join(carpeta, "fondeos.json"), self.fondeos)
 
-        with open(os.path.join(carpeta, "utxos.json"), "w") as f:
-            json.dump(self.utxo_manager.utxos, f, indent=4)
+            self._guardar_bloques(self.obtener_block_store(carpeta))
 
-        bloques = [block.__dict__ for block in self.blockchain.chain]
-        with open(os.path.join(carpeta, "blockchain.json"), "w") as f:
-            json.dump(bloques, f, indent=4)
+            # Se escribe después de los bloques: al cargar, una instantánea nunca va por delante del almacenamiento.
+            utxos = None if self.utxo_manager.backend.persistent else self.utxo_manager.utxos.items()
+            write_snapshot(os.path.join(carpeta, "snapshot.bin"), self.blockchain.chain, utxos)
 
+    def _guardar_bloques(self, store):
+        """
+        Anexa al almacenamiento los bloques de la cadena que aún no están guardados. Si la cadena
+        guardada diverge de la cadena en memoria, descarta primero los bloques divergentes.
+
+        Args:
+            store (BlockStore): Almacenamiento de bloques.
+        """
+        cadena = self.blockchain.chain
+        comunes = min(len(store), len(cadena))
+        # Caso habitual: el último bloque guardado coincide, solo hay que anexar.
+        if comunes and store.hash_at(comunes - 1) != cadena[comunes - 1].hash:
+            while comunes and store.hash_at(comunes - 1) != cadena[comunes - 1].hash:
+                comunes -= 1
+        store.truncate(comunes)
+
+        for bloque in cadena[comunes:]:
+            store.append(bloque)
+            gastados = self._undo.get(bloque.hash)
+            if gastados is not None:
+                store.append_undo(bloque.index, encode_undo(gastados))
+                self._undo_guardado.add(bloque.hash)
+        store.flush()
+        self._recortar_deshacer()
+
+    @_escritura
     def cargar_estado(self, carpeta="data"):
         """
-        Carga desde archivos JSON los usuarios, UTXOs y blockchain.
+        Carga los usuarios, los UTXOs y la blockchain.
+
+        Si existe una instantánea binaria (snapshot.bin), las cabeceras y el conjunto UTXO se leen de
+        ella y las transacciones de cada bloque se cargan del almacenamiento de bloques en su primer
+        acceso. Si no, los bloques se leen del almacenamiento uno a uno y los UTXOs de utxos.json
+        (o del backend UTXO persistente). Si el almacenamiento aún no existe, se cargan los bloques de
+        blockchain.json, que pasan al almacenamiento en el siguiente guardado.
+
+        Las cadenas guardadas en un formato anterior (antes del binario, con hashes calculados sobre el
+        JSON de los bloques, o en la versión 1 del binario, sin claves públicas en las entradas) no se
+        convierten: se rechazan con un mensaje explícito en lugar de cargarse con hashes que ya no
+        corresponden a la serialización actual.
 
         Args:
             carpeta (str): Ruta al directorio donde se encuentran los archivos.
+
+        Raises:
+            ValueError: Si la cadena guardada tiene un formato anterior al actual.
+        """
+        with CARGAR_SECONDS.time():
+            usuarios_path = os.path.join(carpeta, "usuarios.json")
+            if os.path.exists(usuarios_path):
+                with open(usuarios_path, "r") as f:
+                    data = json.load(f)
+                    for nombre, keys in data.items():
+                        wallet = Wallet(private_key=keys["private_key"])
+                        self.usuarios[nombre] = wallet
+                        self.direcciones[wallet.address] = wallet
+
+            fondeos_path = os.path.join(carpeta, "fondeos.json")
+            if os.path.exists(fondeos_path):
+                with open(fondeos_path, "r") as f:
+                    self.fondeos = json.load(f)
+
+            backend = self.utxo_manager.backend
+            store = None
+            if os.path.exists(os.path.join(carpeta, "bloques", "index.dat")):
+                store = self.obtener_block_store(carpeta)
+
+            if store is not None and len(store):
+                self._rechazar_formato_anterior(carpeta, store)
+            if store is not None and len(store) and self._cargar_snapshot(carpeta, store):
+                self._rechazar_formato_anterior(carpeta)
+                return
+
+            # Con un backend persistente, utxos.json solo se importa si la base de datos está vacía.
+            utxos_path = os.path.join(carpeta, "utxos.json")
+            if os.path.exists(utxos_path) and not (backend.persistent and len(backend)):
+                with open(utxos_path, "r") as f:
+                    self.utxo_manager.load_utxos(json.load(f))
+
+            bc_path = os.path.join(carpeta, "blockchain.json")
+            if store is not None and len(store):
+                self.blockchain.chain = [
+                    self.blockchain.crear_bloque_desde_dict(bloque_dict)
+                    for bloque_dict in store.iter_blocks()
+                ]
+            elif os.path.exists(bc_path):
+                with open(bc_path, "r") as f:
+                    bloques_data = json.load(f)
+                    self.blockchain.chain = [self.blockchain.crear_bloque_desde_dict(b) for b in bloques_data]
+
+            if not self.blockchain.chain:
+                self.blockchain.create_genesis_block()
+            self._rechazar_formato_anterior(carpeta)
+
+    def _rechazar_formato_anterior(self, carpeta, store=None):
+        """
+        Comprueba que la cadena guardada no tenga un formato anterior al actual: el anterior al binario
+        (génesis cuya coinbase no tiene altura y cuyo hash se calculó sobre el JSON del bloque) o la
+        versión 1 del binario (entradas sin clave pública). Basta con el génesis, porque su txid cambia
+        con la versión del formato.
+
+        Args:
+            carpeta (str): Directorio del que se cargó la cadena (para el mensaje de error).
+            store (BlockStore, opcional): Si se indica, se comprueba la versión del primer bloque
+                guardado, antes de cargar la cadena; si no, el génesis ya cargado.
+
+        Raises:
+            ValueError: Si la cadena tiene un formato anterior.
+        """
+        if store is not None:
+            actual = store.read_raw(0)[:1] == bytes((VERSION,))
+        else:
+            genesis = self.blockchain.chain[0]
+            try:
+                actual = genesis.calculate_hash() == genesis.hash and all(
+                    transaction_id(tx) == tx.get("txid") for tx in genesis.transactions)
+            except ValueError:  # coinbase sin altura: no se puede serializar en el formato binario
+                actual = False
+        if not actual:
+            raise ValueError(
+                f"La cadena guardada en '{carpeta}' tiene un formato anterior al actual y no se puede "
+                "cargar: sus hashes no corresponden a la serialización actual. Borra la carpeta (o sus archivos "
+                "blockchain.json, utxos.json, fondeos.json, snapshot.bin y bloques/) para empezar una "
+                "cadena nueva.")
+
+    def _cargar_snapshot(self, carpeta, store):
+        """
+        Carga la cadena (con transacciones perezosas) y el conjunto UTXO desde la instantánea binaria.
+
+        Si la instantánea quedó atrás del almacenamiento de bloques (por ejemplo, por una caída entre
+        ambos guardados), los bloques restantes se leen del almacenamiento y sus cambios se aplican al
+        conjunto UTXO de la instantánea.
+
+        Args:
+            carpeta (str): Ruta al directorio de datos.
+            store (BlockStore): Almacenamiento de bloques.
+
+        Returns:
+            bool: True si se cargó desde la instantánea, False si no existe o no corresponde al almacenamiento.
         """
-        usuarios_path = os.path.join(carpeta, "usuarios.json")
-        if os.path.exists(usuarios_path):
-            with open(usuarios_path, "r") as f:
-                data = json.load(f)
-                for nombre, keys in data.items():
-                    self.usuarios[nombre] = Wallet(private_key=keys["private_key"])
-
-        utxos_path = os.path.join(carpeta, "utxos.json")
-        if os.path.exists(utxos_path):
-            with open(utxos_path, "r") as f:
-                self.utxo_manager.utxos = json.load(f)
-
-        bc_path = os.path.join(carpeta, "blockchain.json")
-        if os.path.exists(bc_path):
-            with open(bc_path, "r") as f:
-                bloques_data = json.load(f)
-                self.blockchain.chain = []
-                for bloque_dict in bloques_data:
-                    b = self.blockchain.crear_bloque_desde_dict(bloque_dict)
-                    self.blockchain.chain.append(b)
+        snapshot_path = os.path.join(carpeta, "snapshot.bin")
+        if not os.path.exists(snapshot_path):
+            return False
+        try:
+            cabeceras, utxos = read_snapshot(snapshot_path)
+        except (ValueError, struct.error) as e:
+            log_warning("Instantánea ignorada: %s", e, categoria="estado")
+            return False
+
+        backend = self.utxo_manager.backend
+        if not cabeceras or len(cabeceras) > len(store) \
+                or store.hash_at(len(cabeceras) - 1) != cabeceras[-1]["hash"] \
+                or (utxos is None and not backend.persistent):
+            return False
+
+        cadena = [block_from_header(c, partial(_transacciones_guardadas, store, c["index"])) for c in cabeceras]
+        restantes = [self.blockchain.crear_bloque_desde_dict(d) for d in store.iter_blocks(len(cabeceras))]
+        if utxos is not None:
+            self.utxo_manager.load_utxos(utxos)
+            with self.utxo_manager.batch():
+                for bloque in restantes:
+                    self._registrar_deshacer(bloque, self._conectar_utxos(bloque.transactions))
+                    self._undo_guardado.add(bloque.hash)  # ya están en el almacenamiento
+        self.blockchain.chain = cadena + restantes
+        return True
+
+    def _conectar_utxos(self, transacciones):
+        """
+        Aplica al conjunto UTXO las salidas creadas y las entradas gastadas por transacciones serializadas.
+        Las transacciones sin inputs/outputs (recompensa, coinbase) no modifican el conjunto.
+
+        Args:
+            transacciones (list): Transacciones serializadas (dicts).
+
+        Returns:
+            list: Datos para deshacer: pares ('txid:index', utxo) de las salidas gastadas.
+        """
+        return self.utxo_manager.connect_transactions(transacciones)[0]
+
+    def _registrar_deshacer(self, bloque, gastados):
+        """
+        Guarda en memoria los datos para deshacer un bloque recién conectado.
+
+        Args:
+            bloque (Block): Bloque conectado.
+            gastados (list): Pares ('txid:index', utxo) de las salidas que gastó.
+        """
+        self._undo[bloque.hash] = gastados
+        self._recortar_deshacer()
+
+    def _recortar_deshacer(self):
+        """
+        Deja en memoria los datos para deshacer de los últimos DESHACER_EN_MEMORIA bloques. Solo se
+        descartan los que ya están guardados en undo.dat (de ahí los lee _datos_deshacer); los de bloques
+        que aún no se guardaron se conservan hasta el siguiente guardar_estado, que los necesita.
+        """
+        exceso = len(self._undo) - DESHACER_EN_MEMORIA
+        if exceso <= 0 or not self._undo_guardado:
+            return
+        descartar = []
+        for bloque_hash in self._undo:  # del más antiguo al más reciente (orden de inserción)
+            if bloque_hash in self._undo_guardado:
+                descartar.append(bloque_hash)
+                if len(descartar) == exceso:
+                    break
+        for bloque_hash in descartar:
+            del self._undo[bloque_hash]
+            self._undo_guardado.discard(bloque_hash)
+
+    def _datos_deshacer(self, bloque):
+        """
+        Devuelve los datos para deshacer un bloque, de memoria (bloques recientes) o del almacenamiento
+        de bloques (undo.dat).
+
+        Returns:
+            list | None: Pares ('txid:index', utxo), o None si no se registraron.
+        """
+        if bloque.hash in self._undo:
+            return self._undo[bloque.hash]
+        for store in self._stores.values():
+            if bloque.index < len(store) and store.hash_at(bloque.index) == bloque.hash:
+                payload = store.read_undo(bloque.index)
+                if payload is not None:
+                    return decode_undo(payload)
+        return None
+
+    @_escritura
+    def conectar_bloque(self, bloque):
+        """
+        Agrega a la cadena un bloque ya minado (por ejemplo, de una rama competidora) y aplica sus
+        cambios al conjunto UTXO, registrando los datos para deshacerlo.
+
+        Args:
+            bloque (Block): Bloque que sucede al último bloque de la cadena.
+
+        Raises:
+            ValueError: Si el bloque no es válido (ver _validar_bloque).
+        """
+        self._validar_bloque(bloque)
+        self.blockchain.connect_block(bloque)
+        with self.utxo_manager.batch():
+            self._registrar_deshacer(bloque, self._conectar_utxos(bloque.transactions))
+        self.mempool.remove_confirmed(bloque.transactions)
+
+    def _validar_bloque(self, bloque):
+        """
+        Comprueba las transacciones de un bloque recibido contra el conjunto UTXO:
+
+        - La primera transacción es la recompensa, y es la única: su altura es la del bloque y su
+          cantidad es exactamente RECOMPENSA_BLOQUE más las comisiones del bloque.
+        - Cada transferencia cumple las reglas de _validar_transaccion (las mismas que se aplican al
+          aceptarla en el mempool y al minarla); sus entradas pueden gastar salidas de transacciones
+          anteriores del mismo bloque.
+        - Ninguna salida se gasta en dos transacciones del bloque.
+        - Todas las firmas son válidas (verificadas en un solo lote con verify_batch).
+
+        Args:
+            bloque (Block): Bloque a comprobar.
+
+        Raises:
+            ValueError: Si el bloque incumple alguna de las reglas.
+        """
+        def rechazar(motivo):
+            raise ValueError(f"Bloque #{bloque.index} rechazado: {motivo}")
+
+        txs = bloque.transactions
+        if not isinstance(txs, list) or not all(isinstance(tx, dict) for tx in txs):
+            rechazar("sus transacciones no son una lista de objetos")
+        if not txs or txs[0].get("tipo") != "recompensa":
+            rechazar("no empieza con la recompensa del minero")
+        recompensa = txs[0]
+        if recompensa.get("altura") != bloque.index:
+            rechazar(f"la recompensa es de la altura {recompensa.get('altura')}")
+        try:
+            txid_recompensa = transaction_id(recompensa)
+        except (KeyError, TypeError, ValueError, struct.error):
+            rechazar("la recompensa está mal formada")
+        if recompensa.get("txid") != txid_recompensa:
+            rechazar("el txid de la recompensa no corresponde a su contenido")
+
+        creados = {}  # salidas de las transacciones anteriores del bloque: {'txid:index': salida}
+        gastados = set()
+        trabajos = []
+        comisiones = []
+        for tx_dict in txs[1:]:
+            if "tipo" in tx_dict:
+                rechazar(f"transacción de tipo {tx_dict['tipo']!r} fuera de la primera posición")
+            try:
+                tx = Transaction(tx_dict["inputs"], tx_dict["outputs"], tx_dict["fee"])
+            except (KeyError, TypeError, ValueError, struct.error):
+                rechazar(f"la transacción {tx_dict.get('txid')} está mal formada")
+            for inp in tx.inputs:
+                outpoint = f"{inp['txid']}:{inp['index']}"
+                if outpoint in gastados:
+                    rechazar(f"gasta dos veces la salida {outpoint}")
+            motivo, propios = self._validar_transaccion(
+                tx, lambda outpoint: creados.get(outpoint) or self.utxo_manager.get_utxo(outpoint),
+                txid=tx_dict.get("txid"))
+            if motivo is not None:
+                rechazar(f"la transacción {tx_dict.get('txid')} {motivo}")
+            for inp in tx.inputs:
+                outpoint = f"{inp['txid']}:{inp['index']}"
+                gastados.add(outpoint)
+                creados.pop(outpoint, None)
+            trabajos.extend(propios)
+            creados.update((f"{tx.txid}:{i}", o) for i, o in enumerate(tx.outputs))
+            comisiones.append(tx.fee)
+
+        if recompensa.get("cantidad") != RECOMPENSA_BLOQUE + sum(comisiones):
+            rechazar(f"la recompensa ({recompensa.get('cantidad')}) no es {RECOMPENSA_BLOQUE} más las comisiones")
+        if not all(verify_batch(trabajos)):
+            rechazar("contiene firmas inválidas")
+
+    @_escritura
+    def desconectar_bloque(self):
+        """
+        Quita el último bloque de la cadena y revierte sus cambios en el conjunto UTXO usando sus datos
+        para deshacer, sin volver a procesar la cadena. Sus transacciones vuelven al mempool.
+
+        Returns:
+            Block: Bloque desconectado.
+
+        Raises:
+            ValueError: Si el último bloque es el génesis o no tiene datos para deshacer.
+        """
+        bloque = self.blockchain.get_last_block()
+        gastados = self._datos_deshacer(bloque)
+        if gastados is None or bloque.index == 0:
+            raise ValueError(f"No hay datos para deshacer el bloque #{bloque.index}")
+
+        creados = {tx["txid"] for tx in bloque.transactions if "outputs" in tx}
+        with self.utxo_manager.batch():
+            for tx in bloque.transactions:
+                for i in range(len(tx.get("outputs", []))):
+                    self.utxo_manager.remove_utxo(tx["txid"], i)
+            for outpoint, utxo in gastados:
+                txid, index = outpoint.rsplit(":", 1)
+                # Las salidas creadas y gastadas dentro del mismo bloque no existían antes de él.
+                if txid not in creados:
+                    self.utxo_manager.add_utxo(txid, int(index), utxo["direccion"], utxo["cantidad"])
+        self.blockchain.disconnect_block()
+        self._undo.pop(bloque.hash, None)
+        self._undo_guardado.discard(bloque.hash)
+
+        for tx_dict in bloque.transactions:
+            if "inputs" in tx_dict:
+                tx = Transaction(tx_dict["inputs"], tx_dict["outputs"], tx_dict["fee"])
+                if tx.txid == tx_dict["txid"]:
+                    self.mempool.add(tx)
+        log_info("Bloque desconectado: #%d", bloque.index, categoria="cadena")
+        return bloque
+
+    @_escritura
+    def reorganizar(self, rama):
+        """
+        Cambia a una rama competidora si tiene más trabajo acumulado que la cadena actual.
+
+        Se desconectan los bloques posteriores al punto de bifurcación y se conectan los de la rama,
+        con un costo proporcional a la profundidad de la reorganización. Si un bloque de la rama resulta
+        inválido, se restaura la cadena original.
+
+        Args:
+            rama (list): Bloques de la rama en orden; el primero enlaza con un bloque de la cadena.
+
+        Returns:
+            bool: True si la cadena cambió a la rama, False si la rama no tiene más trabajo.
+
+        Raises:
+            ValueError: Si la rama no enlaza con la cadena o alguno de sus bloques es inválido.
+        """
+        trabajo = self.blockchain.branch_work(rama)
+        if trabajo is None:
+            raise ValueError("La rama no enlaza con ningún bloque de la cadena")
+        if trabajo <= self.blockchain.chain_work():
+            return False
+
+        bifurcacion = self.blockchain.height_of(rama[0].prev_hash)
+        for bloque in self.blockchain.chain[bifurcacion + 1:]:
+            if self._datos_deshacer(bloque) is None:
+                raise ValueError(f"No hay datos para deshacer el bloque #{bloque.index}")
+        desconectados = []
+        while len(self.blockchain.chain) - 1 > bifurcacion:
+            desconectados.append(self.desconectar_bloque())
+        conectados = 0
+        try:
+            for bloque in rama:
+                self.conectar_bloque(bloque)
+                conectados += 1
+        except ValueError:
+            for _ in range(conectados):
+                self.desconectar_bloque()
+            for bloque in reversed(desconectados):
+                self.conectar_bloque(bloque)
+            raise
+        log_info("Reorganización: %d bloques desconectados, %d conectados.", len(desconectados), conectados,
+                 categoria="cadena")
+        return True
 
+    @_escritura
     def fund_usuario(self, nombre, cantidad=10):
         """
         Asigna monedas manualmente a un usuario (por ejemplo para pruebas).
@@ -217,10 +1061,15 @@ class SistemaBlockchain:
             cantidad (float): Monto a asignar.
         """
         if nombre not in self.usuarios:
-            log_info("Usuario no encontrado.")
+            log_info("Usuario no encontrado.", categoria="usuarios")
             return None
 
         direccion = self.usuarios[nombre].address
         txid = f"fund_{nombre}"
         self.utxo_manager.add_utxo(txid, 0, direccion, cantidad)
-        log_info(f"Usuario '{nombre}' financiado con {cantidad} monedas.")
+        # Se registra para que un reindexado pueda reconstruir el conjunto UTXO desde la cadena.
+        self.fondeos.append({
+            "altura": len(self.blockchain.chain), "txid": txid, "index": 0,
+            "direccion": direccion, "cantidad": cantidad
+        })
+        log_info("Usuario '%s' financiado con %s monedas.", nombre, cantidad, categoria="usuarios")
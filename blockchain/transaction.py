@@ -9,20 +9,35 @@ Este módulo define las clases Transaction y UTXOManager.
 """
 
 import hashlib
-import json
-from ecdsa import VerifyingKey, SigningKey, SECP256k1, BadSignatureError
+import heapq
+from contextlib import contextmanager
+from ecdsa import SigningKey, SECP256k1
+
+from blockchain.encoding import (decode_transaction, encode_outputs, encode_transfer, encode_undo,
+                                 signature_message)
+from blockchain.utxo_store import MemoryUTXOBackend
+from blockchain.verification import verify_signature
+from utils import metrics
+
+SIGN_SECONDS = metrics.histogram("transaction_sign_seconds", "Duración de la firma de una entrada")
+VERIFY_SECONDS = metrics.histogram("transaction_verify_seconds", "Duración de la verificación de una entrada")
 
 class Transaction:
     """
     Representa una transacción en el modelo UTXO.
 
     Atributos:
-        inputs (list): Lista de entradas, cada una con txid, index y firma.
+        inputs (list): Lista de entradas, cada una con txid, index, firma y la clave pública que la firmó.
         outputs (list): Lista de salidas con dirección y cantidad.
         fee (float): Comisión asignada al minero.
-        txid (str): Identificador único de la transacción (SHA-256).
+        txid (str): Identificador único de la transacción (SHA-256 de su forma binaria).
+
+    La forma binaria canónica (ver blockchain.encoding) define el txid, el mensaje que firma cada
+    entrada y el tamaño usado para calcular la comisión por byte.
     """
 
+    __slots__ = ("inputs", "outputs", "fee", "txid")
+
     def __init__(self, inputs, outputs, fee=0.0):
         """
         Inicializa una transacción con entradas, salidas y comisión.
@@ -39,86 +54,171 @@ class Transaction:
 
     def _calculate_txid(self):
         """
-        Calcula el hash único de la transacción usando SHA-256.
+        Calcula el hash único de la transacción usando SHA-256 sobre su forma binaria.
 
         Returns:
             str: Hash hexadecimal como identificador de la transacción.
         """
-        tx_copy = {
+        return hashlib.sha256(self.to_bytes()).hexdigest()
+
+    def to_bytes(self):
+        """
+        Serializa la transacción en el formato binario canónico (el txid no se incluye: se deriva de él).
+
+        Returns:
+            bytes: Transacción serializada.
+        """
+        return encode_transfer(self.inputs, self.outputs, self.fee)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Reconstruye una transacción desde su formato binario canónico.
+
+        Args:
+            data (bytes): Transacción serializada con to_bytes.
+
+        Returns:
+            Transaction: Transacción con su txid recalculado.
+
+        Raises:
+            ValueError: Si los bytes no son una transferencia válida.
+        """
+        tx = decode_transaction(data)
+        if "inputs" not in tx:
+            raise ValueError(f"Se esperaba una transferencia, se recibió: {tx['tipo']}")
+        return cls(tx["inputs"], tx["outputs"], tx["fee"])
+
+    def to_dict(self):
+        """
+        Serializa la transacción como diccionario (formato en que se guarda dentro de los bloques).
+
+        Returns:
+            dict: Entradas, salidas, comisión y txid.
+        """
+        return {
             "inputs": self.inputs,
             "outputs": self.outputs,
-            "fee": self.fee
+            "fee": self.fee,
+            "txid": self.txid
         }
-        tx_string = json.dumps(tx_copy, sort_keys=True)
-        return hashlib.sha256(tx_string.encode()).hexdigest()
 
-    def sign_input(self, index, private_key_hex):
+    def size(self):
+        """
+        Calcula el tamaño en bytes de la transacción serializada.
+
+        Returns:
+            int: Tamaño de la serialización binaria canónica de la transacción.
+        """
+        return len(self.to_bytes())
+
+    def sign_input(self, index, private_key):
         """
         Firma una entrada específica usando la clave privada del remitente.
 
         Args:
             index (int): Índice de la entrada a firmar.
-            private_key_hex (str): Clave privada en formato hexadecimal.
+            private_key (SigningKey | str): Objeto SigningKey (e.g. Wallet.private_key) o clave privada
+                en formato hexadecimal. Pasar el objeto evita parsear la clave en cada entrada.
+        """
+        self.sign_inputs(private_key, [index])
+
+    def sign_inputs(self, private_key, indices=None):
+        """
+        Firma varias entradas con la misma clave privada y guarda en cada una la clave pública, con la
+        que cualquier nodo puede verificarla. Las salidas se serializan una sola vez para todos los
+        mensajes y el txid se recalcula una sola vez al final, así que firmar una transacción con muchas
+        entradas y salidas no cuesta entradas × salidas.
+
+        Args:
+            private_key (SigningKey | str): Objeto SigningKey o clave privada en formato hexadecimal.
+            indices (list, opcional): Índices de las entradas a firmar. Por defecto, todas.
         """
-        sk = SigningKey.from_string(bytes.fromhex(private_key_hex), curve=SECP256k1)
-        message = self._message_to_sign(index)
-        signature = sk.sign(message.encode()).hex()
-        self.inputs[index]["signature"] = signature
+        if isinstance(private_key, SigningKey):
+            sk = private_key
+        else:
+            sk = SigningKey.from_string(bytes.fromhex(private_key), curve=SECP256k1)
+        public_key = sk.get_verifying_key().to_string().hex()
+        encoded_outputs = encode_outputs(self.outputs, self.fee)
+        for index in range(len(self.inputs)) if indices is None else indices:
+            with SIGN_SECONDS.time():
+                message = self._message_to_sign(index, encoded_outputs)
+                signature = sk.sign(message).hex()
+            self.inputs[index]["signature"] = signature
+            self.inputs[index]["public_key"] = public_key
         self.txid = self._calculate_txid()
 
-    def _message_to_sign(self, index):
+    def _message_to_sign(self, index, encoded_outputs=None):
         """
         Construye el mensaje que debe firmarse para una entrada.
 
         Args:
             index (int): Índice de la entrada.
+            encoded_outputs (bytes, opcional): Salidas y comisión ya serializadas (ver encode_outputs).
 
         Returns:
-            str: Mensaje serializado a firmar.
+            bytes: Mensaje serializado a firmar (entrada sin firma, salidas y comisión).
         """
-        input_copy = self.inputs[index].copy()
-        input_copy.pop("signature", None)
-
-        tx_part = {
-            "input": input_copy,
-            "outputs": self.outputs,
-            "fee": self.fee
-        }
-        return json.dumps(tx_part, sort_keys=True)
+        return signature_message(self.inputs[index], self.outputs, self.fee, encoded_outputs)
 
-    def verify_input(self, index, public_key_hex):
+    def verify_input(self, index, public_key):
         """
         Verifica la firma de una entrada utilizando la clave pública.
+        Las firmas ya verificadas se resuelven desde la caché de firmas y las claves públicas en
+        hexadecimal desde la caché de VerifyingKey (ver blockchain.verification).
 
         Args:
             index (int): Índice de la entrada a verificar.
-            public_key_hex (str): Clave pública en formato hexadecimal.
+            public_key (VerifyingKey | str): Objeto VerifyingKey o clave pública en formato hexadecimal.
 
         Returns:
             bool: True si la firma es válida, False en caso contrario.
         """
         try:
-            vk = VerifyingKey.from_string(bytes.fromhex(public_key_hex), curve=SECP256k1)
             message = self._message_to_sign(index)
             signature = bytes.fromhex(self.inputs[index]["signature"])
-            return vk.verify(signature, message.encode())
-        except (BadSignatureError, KeyError, Exception):
+        except (KeyError, IndexError, ValueError):
             return False
+        with VERIFY_SECONDS.time():
+            return verify_signature(message, signature, public_key)
 
 
 class UTXOManager:
     """
     Manejador del conjunto de salidas no gastadas (UTXO).
 
+    El almacenamiento se delega en un backend (ver blockchain.utxo_store). El backend en memoria mantiene,
+    además del conjunto principal, un índice por dirección, el saldo acumulado de cada dirección y una
+    lista por dirección ordenada por cantidad, todos sincronizados en add_utxo y remove_utxo. Así,
+    consultar los UTXOs de una dirección cuesta O(UTXOs de esa dirección), consultar su saldo cuesta O(1)
+    y la selección de monedas puede buscar por cantidad con bisección. El backend SQLite ofrece la misma
+    interfaz sobre una base de datos embebida, y el columnar (blockchain.utxo_columnar, requiere NumPy)
+    sobre arreglos con cantidades enteras, con consultas agregadas vectorizadas.
+
     Atributos:
-        utxos (dict): Diccionario con claves 'txid:index' y valores con dirección y cantidad.
+        backend (MemoryUTXOBackend | SQLiteUTXOBackend | ColumnarUTXOBackend): Almacenamiento del conjunto UTXO.
     """
 
-    def __init__(self):
+    def __init__(self, backend=None):
+        """
+        Inicializa el gestor con el backend indicado.
+
+        Args:
+            backend (opcional): Backend de almacenamiento. Por defecto, un MemoryUTXOBackend vacío.
+        """
+        self.backend = backend if backend is not None else MemoryUTXOBackend()
+
+    def __len__(self):
+        return len(self.backend)
+
+    @property
+    def utxos(self):
         """
-        Inicializa el conjunto de UTXOs como un diccionario vacío.
+        dict: Conjunto completo de UTXOs con claves 'txid:index' y valores con dirección y cantidad.
         """
-        self.utxos = {}
+        if isinstance(self.backend, MemoryUTXOBackend):
+            return self.backend.utxos
+        return dict(self.backend.items())
 
     def add_utxo(self, txid, index, direccion, cantidad):
         """
@@ -130,10 +230,10 @@ class UTXOManager:
             direccion (str): Dirección del beneficiario.
             cantidad (float): Valor de la salida.
         """
-        self.utxos[f"{txid}:{index}"] = {
+        self.backend.put(f"{txid}:{index}", {
             "direccion": direccion,
             "cantidad": cantidad
-        }
+        })
 
     def remove_utxo(self, txid, index):
         """
@@ -142,8 +242,23 @@ class UTXOManager:
         Args:
             txid (str): ID de la transacción.
             index (int): Índice de la salida.
+
+        Returns:
+            dict | None: UTXO eliminado, o None si no existía.
+        """
+        return self.backend.delete(f"{txid}:{index}")
+
+    def get_utxo(self, outpoint):
+        """
+        Recupera un UTXO por su outpoint.
+
+        Args:
+            outpoint (str): Identificador 'txid:index'.
+
+        Returns:
+            dict | None: UTXO con dirección y cantidad, o None si no existe (o ya fue gastado).
         """
-        self.utxos.pop(f"{txid}:{index}", None)
+        return self.backend.get(outpoint)
 
     def get_utxos_for_address(self, direccion):
         """
@@ -155,4 +270,144 @@ class UTXOManager:
         Returns:
             dict: Subconjunto de UTXOs propiedad de la dirección.
         """
-        return {k: v for k, v in self.utxos.items() if v["direccion"] == direccion}
+        return self.backend.by_address(direccion)
+
+    def get_balance(self, direccion):
+        """
+        Devuelve el saldo de una dirección (O(1) con el backend en memoria).
+
+        Args:
+            direccion (str): Dirección del usuario.
+
+        Returns:
+            float: Suma de las cantidades de los UTXOs de la dirección.
+        """
+        return self.backend.balance(direccion)
+
+    def get_sorted_utxos(self, direccion):
+        """
+        Devuelve los UTXOs de una dirección ordenados por cantidad ascendente.
+
+        Con el backend en memoria la lista es la estructura interna del gestor y no debe modificarse.
+
+        Args:
+            direccion (str): Dirección del usuario.
+
+        Returns:
+            list: Pares (cantidad, 'txid:index') ordenados por cantidad.
+        """
+        return self.backend.sorted_by_amount(direccion)
+
+    def get_balances(self, direcciones=None):
+        """
+        Devuelve los saldos de varias direcciones. Si el backend tiene una consulta agregada (el
+        columnar), se usa; si no, se consulta cada dirección o se recorre el conjunto.
+
+        Args:
+            direcciones (list, opcional): Direcciones a consultar. Por defecto, todas las que tienen saldo.
+
+        Returns:
+            dict: {dirección: saldo}.
+        """
+        if hasattr(self.backend, "balances"):
+            return self.backend.balances(direcciones)
+        if direcciones is not None:
+            return {direccion: self.backend.balance(direccion) for direccion in direcciones}
+        saldos = {}
+        for _, utxo in self.backend.items():
+            saldos[utxo["direccion"]] = saldos.get(utxo["direccion"], 0) + utxo["cantidad"]
+        return {direccion: saldo for direccion, saldo in saldos.items() if saldo}
+
+    def total_supply(self):
+        """
+        Devuelve la suma de las cantidades de todos los UTXOs (monedas en circulación).
+
+        Returns:
+            float: Oferta total.
+        """
+        if hasattr(self.backend, "total_supply"):
+            return self.backend.total_supply()
+        return sum(utxo["cantidad"] for _, utxo in self.backend.items())
+
+    def richest(self, n=10):
+        """
+        Devuelve las n direcciones con mayor saldo.
+
+        Args:
+            n (int): Número de direcciones.
+
+        Returns:
+            list: Pares (dirección, saldo) ordenados de mayor a menor saldo.
+        """
+        if hasattr(self.backend, "richest"):
+            return self.backend.richest(n)
+        return heapq.nlargest(n, self.get_balances().items(), key=lambda par: par[1])
+
+    def connect_transactions(self, transactions):
+        """
+        Aplica las salidas creadas y las entradas gastadas por transacciones serializadas.
+        Las transacciones sin inputs/outputs (recompensa, coinbase) no modifican el conjunto.
+
+        Args:
+            transactions (list): Transacciones serializadas (dicts), en orden.
+
+        Returns:
+            tuple: (gastados, faltantes). gastados son los pares ('txid:index', utxo) de las salidas
+            gastadas (los datos para deshacer); faltantes, los outpoints gastados que no existían.
+        """
+        spent = []
+        missing = []
+        for tx in transactions:
+            for i, output in enumerate(tx.get("outputs", [])):
+                self.add_utxo(tx["txid"], i, output["direccion"], output["cantidad"])
+            for inp in tx.get("inputs", []):
+                utxo = self.remove_utxo(inp["txid"], inp["index"])
+                outpoint = f"{inp['txid']}:{inp['index']}"
+                if utxo is None:
+                    missing.append(outpoint)
+                else:
+                    spent.append((outpoint, utxo))
+        return spent, missing
+
+    def digest(self):
+        """
+        Calcula un resumen del conjunto UTXO que no depende del orden ni del backend: la suma módulo
+        2**256 del SHA-256 de cada UTXO serializado. Sirve para comparar dos conjuntos (no es resistente
+        a colisiones buscadas a propósito).
+
+        Returns:
+            str: Resumen en hexadecimal (64 caracteres).
+        """
+        total = 0
+        for outpoint, utxo in self.backend.items():
+            total += int.from_bytes(hashlib.sha256(encode_undo([(outpoint, utxo)])).digest(), "big")
+        return (total % 2 ** 256).to_bytes(32, "big").hex()
+
+    def load_utxos(self, utxos):
+        """
+        Reemplaza el conjunto de UTXOs (por ejemplo al cargar desde JSON) y reconstruye los índices.
+
+        Args:
+            utxos (dict): Diccionario con claves 'txid:index' y valores con dirección y cantidad.
+        """
+        self.backend.load(utxos)
+
+    @contextmanager
+    def batch(self):
+        """
+        Agrupa varios cambios del conjunto UTXO (por ejemplo, los de un bloque) en una sola transacción
+        del backend. Si ocurre una excepción, los cambios del lote se descartan.
+        """
+        self.backend.begin()
+        try:
+            yield self
+        except Exception:
+            self.backend.rollback()
+            raise
+        self.backend.commit()
+
+    def close(self):
+        """
+        Confirma los cambios pendientes y cierra el backend.
+        """
+        self.backend.close()
@@ -0,0 +1,248 @@
+"""
+utxo_columnar.py
+
+Backend columnar del conjunto UTXO sobre arreglos de NumPy, pensado para conjuntos de millones de UTXOs
+y para consultas agregadas (saldos de todas las direcciones, oferta total, direcciones más ricas).
+
+Cada UTXO ocupa una fila de dos columnas: el identificador numérico de su dirección (int32) y su
+cantidad en punto fijo (int64, en unidades de 10**-8 monedas). Un diccionario outpoint -> fila permite
+buscar, y las filas de los UTXOs gastados se guardan en una lista libre para reutilizarlas. Los saldos
+por dirección se mantienen como enteros, así que sumarlos no acumula error de redondeo.
+
+Expone la misma interfaz que los backends de blockchain.utxo_store (con las cantidades redondeadas
+a 8 decimales) y además balances, total_supply y richest, que UTXOManager usa cuando están disponibles.
+Las consultas por dirección (by_address, sorted_by_amount) recorren la columna de direcciones de forma
+vectorizada en lugar de mantener un índice por dirección, que costaría memoria por cada UTXO.
+
+NumPy es una dependencia opcional: el módulo se puede importar sin ella, pero crear el backend lanza
+ImportError.
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SCALE = 10 ** 8  # unidades por moneda
+
+
+def to_units(cantidad):
+    """
+    Convierte una cantidad en monedas a unidades enteras de punto fijo.
+
+    Args:
+        cantidad (float): Cantidad en monedas.
+
+    Returns:
+        int: Cantidad en unidades de 10**-8 monedas.
+    """
+    return round(cantidad * SCALE)
+
+
+def from_units(units):
+    """
+    Convierte unidades enteras de punto fijo a monedas.
+
+    Args:
+        units (int): Cantidad en unidades de 10**-8 monedas.
+
+    Returns:
+        float: Cantidad en monedas.
+    """
+    return int(units) / SCALE
+
+
+class ColumnarUTXOBackend:
+    """
+    Backend columnar del conjunto UTXO en memoria.
+
+    Atributos:
+        persistent (bool): False; el conjunto se guarda aparte (en la instantánea binaria).
+    """
+
+    persistent = False
+
+    def __init__(self, capacity=1024):
+        """
+        Inicializa el backend vacío.
+
+        Args:
+            capacity (int): Filas reservadas inicialmente; las columnas duplican su tamaño al llenarse.
+
+        Raises:
+            ImportError: Si NumPy no está instalado.
+        """
+        if np is None:
+            raise ImportError("ColumnarUTXOBackend requiere NumPy, que no es una dependencia del proyecto: "
+                              "instálalo con 'pip install numpy' o usa MemoryUTXOBackend")
+        self._reset(capacity)
+
+    def _reset(self, capacity):
+        capacity = max(1, capacity)
+        self._address = np.full(capacity, -1, dtype=np.int32)  # -1 = fila libre
+        self._amount = np.zeros(capacity, dtype=np.int64)      # 0 en las filas libres
+        self._outpoints = [None] * capacity                    # fila -> "txid:index"
+        self._rows = {}                                        # "txid:index" -> fila
+        self._free = []                                        # filas liberadas, para reutilizar
+        self._used = 0                                         # filas ocupadas alguna vez
+        self._addresses = []                                   # id -> dirección
+        self._address_ids = {}                                 # dirección -> id
+        self._balances = np.zeros(16, dtype=np.int64)          # id -> saldo en unidades
+
+    def __len__(self):
+        return len(self._rows)
+
+    # --- Filas y direcciones ---
+
+    def _address_id(self, direccion):
+        aid = self._address_ids.get(direccion)
+        if aid is None:
+            aid = len(self._addresses)
+            self._address_ids[direccion] = aid
+            self._addresses.append(direccion)
+            if aid == len(self._balances):
+                self._balances = np.concatenate([self._balances, np.zeros(aid, dtype=np.int64)])
+        return aid
+
+    def _new_row(self):
+        if self._free:
+            return self._free.pop()
+        if self._used == len(self._amount):
+            extra = len(self._amount)
+            self._address = np.concatenate([self._address, np.full(extra, -1, dtype=np.int32)])
+            self._amount = np.concatenate([self._amount, np.zeros(extra, dtype=np.int64)])
+            self._outpoints.extend([None] * extra)
+        self._used += 1
+        return self._used - 1
+
+    def _utxo(self, row):
+        return {"direccion": self._addresses[self._address[row]], "cantidad": from_units(self._amount[row])}
+
+    def _rows_of(self, direccion):
+        aid = self._address_ids.get(direccion)
+        if aid is None:
+            return []
+        return np.flatnonzero(self._address[:self._used] == aid).tolist()
+
+    # --- Interfaz del backend ---
+
+    def get(self, outpoint):
+        row = self._rows.get(outpoint)
+        return None if row is None else self._utxo(row)
+
+    def put(self, outpoint, utxo):
+        if outpoint in self._rows:
+            self.delete(outpoint)
+        aid = self._address_id(utxo["direccion"])
+        units = to_units(utxo["cantidad"])
+        row = self._new_row()
+        self._address[row] = aid
+        self._amount[row] = units
+        self._outpoints[row] = outpoint
+        self._rows[outpoint] = row
+        self._balances[aid] += units
+
+    def delete(self, outpoint):
+        row = self._rows.pop(outpoint, None)
+        if row is None:
+            return None
+        utxo = self._utxo(row)
+        self._balances[self._address[row]] -= self._amount[row]
+        self._address[row] = -1
+        self._amount[row] = 0
+        self._outpoints[row] = None
+        self._free.append(row)
+        return utxo
+
+    def by_address(self, direccion):
+        return {self._outpoints[row]: self._utxo(row) for row in self._rows_of(direccion)}
+
+    def balance(self, direccion):
+        aid = self._address_ids.get(direccion)
+        return 0 if aid is None else from_units(self._balances[aid])
+
+    def sorted_by_amount(self, direccion):
+        return sorted((from_units(self._amount[row]), self._outpoints[row]) for row in self._rows_of(direccion))
+
+    def items(self):
+        for outpoint, row in list(self._rows.items()):
+            yield outpoint, self._utxo(row)
+
+    def load(self, utxos):
+        self._reset(len(utxos))
+        n = len(utxos)
+        self._outpoints[:n] = list(utxos)
+        self._rows = {outpoint: row for row, outpoint in enumerate(self._outpoints[:n])}
+        values = utxos.values()
+        self._address[:n] = np.fromiter((self._address_id(u["direccion"]) for u in values), np.int32, n)
+        self._amount[:n] = np.fromiter((to_units(u["cantidad"]) for u in values), np.int64, n)
+        self._used = n
+        # Saldos de todas las direcciones en una pasada vectorizada (suma entera exacta).
+        np.add.at(self._balances, self._address[:n], self._amount[:n])
+
+    def begin(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+    # --- Consultas agregadas ---
+
+    def balances(self, direcciones=None):
+        """
+        Devuelve los saldos de varias direcciones con una sola operación vectorizada.
+
+        Args:
+            direcciones (list, opcional): Direcciones a consultar. Por defecto, todas las que tienen saldo.
+
+        Returns:
+            dict: {dirección: saldo}.
+        """
+        if direcciones is None:
+            ids = np.flatnonzero(self._balances[:len(self._addresses)])
+            return {self._addresses[aid]: units / SCALE for aid, units in zip(ids.tolist(), self._balances[ids].tolist())}
+        ids = np.fromiter((self._address_ids.get(d, -1) for d in direcciones), np.int64, len(direcciones))
+        units = np.where(ids >= 0, self._balances[np.maximum(ids, 0)], 0)
+        return {d: u / SCALE for d, u in zip(direcciones, units.tolist())}
+
+    def total_supply(self):
+        """
+        Devuelve la suma de todas las cantidades del conjunto (las filas libres valen 0).
+
+        Returns:
+            float: Monedas en circulación.
+        """
+        return from_units(self._amount[:self._used].sum())
+
+    def richest(self, n=10):
+        """
+        Devuelve las n direcciones con mayor saldo, seleccionadas con argpartition sin ordenar todo.
+
+        Args:
+            n (int): Número de direcciones.
+
+        Returns:
+            list: Pares (dirección, saldo) ordenados de mayor a menor saldo.
+        """
+        balances = self._balances[:len(self._addresses)]
+        n = min(n, int(np.count_nonzero(balances > 0)))
+        if n <= 0:
+            return []
+        top = np.argpartition(-balances, n - 1)[:n]
+        top = top[np.argsort(-balances[top], kind="stable")]
+        return [(self._addresses[aid], units / SCALE) for aid, units in zip(top.tolist(), balances[top].tolist())]
+
+    def nbytes(self):
+        """
+        Devuelve los bytes que ocupan las columnas de NumPy (sin el diccionario de outpoints).
+
+        Returns:
+            int: Bytes reservados por las columnas y los saldos.
+        """
+        return self._address.nbytes + self._amount.nbytes + self._balances.nbytes
@@ -0,0 +1,308 @@
+"""
+utxo_store.py
+
+Este módulo define los backends de almacenamiento del conjunto UTXO que usa UTXOManager.
+
+- MemoryUTXOBackend guarda los UTXOs en un diccionario junto con un índice por dirección, el saldo de
+  cada dirección y una lista por dirección ordenada por cantidad. Es el backend por defecto y el de pruebas.
+- SQLiteUTXOBackend guarda los UTXOs en una base de datos SQLite embebida en modo WAL, de modo que el
+  conjunto no está limitado por la RAM y guardarlo no implica reescribirlo. Encima tiene una caché de
+  escritura diferida: las altas y bajas se acumulan en memoria y se escriben juntas, y todas las de un
+  lote (por ejemplo, un bloque minado) se confirman en una sola transacción.
+
+Ambos backends exponen la misma interfaz: get, put, delete, by_address, balance, sorted_by_amount,
+items, load, begin, commit, rollback y close.
+"""
+
+import bisect
+import sqlite3
+import threading
+from collections import OrderedDict
+
+_DELETED = object()
+
+
+class MemoryUTXOBackend:
+    """
+    Backend en memoria del conjunto UTXO.
+
+    Atributos:
+        utxos (dict): Diccionario con claves 'txid:index' y valores con dirección y cantidad.
+        persistent (bool): False; el conjunto se guarda aparte (utxos.json).
+    """
+
+    persistent = False
+
+    def __init__(self):
+        """
+        Inicializa el backend vacío.
+        """
+        self.utxos = {}
+        self._by_address = {}  # {"direccion": {"txid:index": utxo}}
+        self._balances = {}    # {"direccion": saldo}
+        self._sorted = {}      # {"direccion": [(cantidad, "txid:index"), ...]} ordenada por cantidad
+
+    def __len__(self):
+        return len(self.utxos)
+
+    def get(self, outpoint):
+        return self.utxos.get(outpoint)
+
+    def put(self, outpoint, utxo):
+        if outpoint in self.utxos:
+            self._unindex(outpoint, self.utxos[outpoint])
+        self.utxos[outpoint] = utxo
+        self._index(outpoint, utxo)
+
+    def delete(self, outpoint):
+        utxo = self.utxos.pop(outpoint, None)
+        if utxo is not None:
+            self._unindex(outpoint, utxo)
+        return utxo
+
+    def by_address(self, direccion):
+        return dict(self._by_address.get(direccion, {}))
+
+    def balance(self, direccion):
+        return self._balances.get(direccion, 0)
+
+    def sorted_by_amount(self, direccion):
+        return self._sorted.get(direccion, [])
+
+    def items(self):
+        return self.utxos.items()
+
+    def load(self, utxos):
+        self.utxos = {}
+        self._by_address = {}
+        self._balances = {}
+        self._sorted = {}
+        for outpoint, utxo in utxos.items():
+            self.utxos[outpoint] = utxo
+            self._index(outpoint, utxo)
+
+    def begin(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+    def _index(self, outpoint, utxo):
+        """
+        Registra un UTXO en los índices por dirección y actualiza el saldo de la dirección.
+        """
+        direccion = utxo["direccion"]
+        self._by_address.setdefault(direccion, {})[outpoint] = utxo
+        self._balances[direccion] = self._balances.get(direccion, 0) + utxo["cantidad"]
+        bisect.insort(self._sorted.setdefault(direccion, []), (utxo["cantidad"], outpoint))
+
+    def _unindex(self, outpoint, utxo):
+        """
+        Quita un UTXO de los índices por dirección y actualiza el saldo de la dirección.
+        """
+        direccion = utxo["direccion"]
+        outpoints = self._by_address.get(direccion)
+        if outpoints is None or outpoints.pop(outpoint, None) is None:
+            return
+        if outpoints:
+            self._balances[direccion] -= utxo["cantidad"]
+            ordered = self._sorted[direccion]
+            i = bisect.bisect_left(ordered, (utxo["cantidad"], outpoint))
+            del ordered[i]
+        else:
+            # Sin UTXOs el saldo es exactamente 0; se descarta para no arrastrar error de redondeo.
+            del self._by_address[direccion]
+            del self._balances[direccion]
+            del self._sorted[direccion]
+
+
+class SQLiteUTXOBackend:
+    """
+    Backend del conjunto UTXO sobre SQLite (modo WAL) con caché de escritura diferida.
+
+    Fuera de un lote, cada alta o baja se confirma de inmediato. Dentro de un lote (begin/commit) los
+    cambios se acumulan en memoria y se escriben y confirman juntos en commit. Las consultas por
+    dirección escriben antes los cambios pendientes en la transacción abierta, sin confirmarla.
+
+    Atributos:
+        path (str): Ruta del archivo de base de datos.
+        cache_size (int): Número máximo de UTXOs en la caché de lectura.
+        persistent (bool): True; el conjunto ya queda guardado en la base de datos.
+    """
+
+    persistent = True
+
+    def __init__(self, path, cache_size=100_000):
+        """
+        Abre (o crea) la base de datos de UTXOs.
+
+        Args:
+            path (str): Ruta del archivo SQLite.
+            cache_size (int): Número máximo de UTXOs en la caché de lectura.
+        """
+        self.path = path
+        self.cache_size = cache_size
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS utxos ("
+            "outpoint TEXT PRIMARY KEY, direccion TEXT NOT NULL, cantidad REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS utxos_direccion ON utxos (direccion, cantidad, outpoint)")
+        self._pending = {}            # {"txid:index": utxo o _DELETED}
+        self._cache = OrderedDict()   # caché LRU de lectura {"txid:index": utxo o None}
+        self._depth = 0
+
+    def __len__(self):
+        with self._lock:
+            self._write_pending()
+            return self._conn.execute("SELECT COUNT(*) FROM utxos").fetchone()[0]
+
+    # --- Caché ---
+
+    def _remember(self, outpoint, utxo):
+        self._cache[outpoint] = utxo
+        self._cache.move_to_end(outpoint)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _write_pending(self):
+        """
+        Escribe los cambios pendientes en la transacción abierta (sin confirmarla).
+        """
+        if not self._pending:
+            return
+        if not self._conn.in_transaction:
+            self._conn.execute("BEGIN")
+        deleted = [(o,) for o, u in self._pending.items() if u is _DELETED]
+        added = [(o, u["direccion"], u["cantidad"]) for o, u in self._pending.items() if u is not _DELETED]
+        self._conn.executemany("DELETE FROM utxos WHERE outpoint = ?", deleted)
+        self._conn.executemany("INSERT OR REPLACE INTO utxos VALUES (?, ?, ?)", added)
+        self._pending = {}
+
+    # --- Interfaz del backend ---
+
+    def get(self, outpoint):
+        with self._lock:
+            utxo = self._pending.get(outpoint)
+            if utxo is not None:
+                return None if utxo is _DELETED else utxo
+            if outpoint in self._cache:
+                self._cache.move_to_end(outpoint)
+                return self._cache[outpoint]
+            row = self._conn.execute(
+                "SELECT direccion, cantidad FROM utxos WHERE outpoint = ?", (outpoint,)
+            ).fetchone()
+            utxo = {"direccion": row[0], "cantidad": row[1]} if row else None
+            self._remember(outpoint, utxo)
+            return utxo
+
+    def put(self, outpoint, utxo):
+        with self._lock:
+            self._pending[outpoint] = utxo
+            self._remember(outpoint, utxo)
+            if not self._depth:
+                self.commit()
+
+    def delete(self, outpoint):
+        with self._lock:
+            utxo = self.get(outpoint)
+            if utxo is None:
+                return None
+            self._pending[outpoint] = _DELETED
+            self._remember(outpoint, None)
+            if not self._depth:
+                self.commit()
+            return utxo
+
+    def by_address(self, direccion):
+        with self._lock:
+            self._write_pending()
+            rows = self._conn.execute(
+                "SELECT outpoint, direccion, cantidad FROM utxos WHERE direccion = ?", (direccion,)
+            )
+            return {o: {"direccion": d, "cantidad": c} for o, d, c in rows}
+
+    def balance(self, direccion):
+        with self._lock:
+            self._write_pending()
+            row = self._conn.execute(
+                "SELECT SUM(cantidad) FROM utxos WHERE direccion = ?", (direccion,)
+            ).fetchone()
+            return row[0] or 0
+
+    def sorted_by_amount(self, direccion):
+        with self._lock:
+            self._write_pending()
+            rows = self._conn.execute(
+                "SELECT cantidad, outpoint FROM utxos WHERE direccion = ? ORDER BY cantidad, outpoint",
+                (direccion,)
+            )
+            return list(rows)
+
+    def items(self):
+        with self._lock:
+            self._write_pending()
+            rows = self._conn.execute("SELECT outpoint, direccion, cantidad FROM utxos").fetchall()
+        for o, d, c in rows:
+            yield o, {"direccion": d, "cantidad": c}
+
+    def load(self, utxos):
+        with self._lock:
+            self.begin()
+            try:
+                self._pending = {}
+                self._cache.clear()
+                self._conn.execute("DELETE FROM utxos")
+                self._pending.update(utxos)
+                self.commit()
+            except Exception:
+                self.rollback()
+                raise
+
+    def begin(self):
+        """
+        Abre un lote: los cambios se confirman juntos en el commit que lo cierra (admite anidamiento).
+        """
+        with self._lock:
+            if not self._depth and not self._conn.in_transaction:
+                self._conn.execute("BEGIN")
+            self._depth += 1
+
+    def commit(self):
+        """
+        Cierra un lote y, si era el más externo, escribe los cambios pendientes y los confirma.
+        """
+        with self._lock:
+            if self._depth:
+                self._depth -= 1
+            if self._depth:
+                return
+            self._write_pending()
+            if self._conn.in_transaction:
+                self._conn.execute("COMMIT")
+
+    def rollback(self):
+        """
+        Descarta todos los cambios del lote en curso.
+        """
+        with self._lock:
+            self._depth = 0
+            self._pending = {}
+            self._cache.clear()
+            if self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+
+    def close(self):
+        with self._lock:
+            self._depth = 0
+            self.commit()
+            self._conn.close()
@@ -0,0 +1,339 @@
+"""
+verification.py
+
+Este módulo concentra la verificación de firmas ECDSA de las entradas de transacciones.
+
+- SignatureCache es una caché LRU acotada de tripletas (hash del mensaje, firma, clave pública) ya
+  verificadas, de modo que una transacción verificada al entrar al mempool no se vuelve a verificar
+  al incluirse en un bloque.
+- verify_batch recibe muchos trabajos (tx, índice de entrada, clave pública) y reparte los que no están
+  en caché entre un pool de procesos.
+- VerifyingKeyCache es una caché LRU acotada, compartida por todo el proceso, de clave pública en
+  hexadecimal -> VerifyingKey con sus tablas de precómputo, para no volver a parsear la misma clave.
+"""
+
+import atexit
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from ecdsa import VerifyingKey, SECP256k1, BadSignatureError
+from ecdsa.ellipticcurve import PointJacobi
+
+from blockchain.encoding import encode_outputs
+from utils import metrics
+from utils.procesos import contexto_procesos
+
+BATCH_SECONDS = metrics.histogram("signature_verify_batch_seconds", "Duración de una verificación de firmas en lote")
+SIGNATURES_VERIFIED = metrics.counter("signatures_verified_total", "Firmas verificadas criptográficamente")
+SIGNATURE_CACHE_HITS = metrics.counter("signature_cache_hits_total", "Firmas aceptadas desde la caché")
+
+
+class SignatureCache:
+    """
+    Caché LRU acotada de firmas ya verificadas como válidas.
+
+    Atributos:
+        maxsize (int): Número máximo de entradas.
+        hits (int): Consultas encontradas en la caché.
+        misses (int): Consultas no encontradas en la caché.
+    """
+
+    def __init__(self, maxsize=100_000):
+        """
+        Inicializa una caché vacía.
+
+        Args:
+            maxsize (int): Número máximo de entradas antes de descartar las menos usadas.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(message, signature, public_key_hex):
+        """
+        Construye la clave de caché para una firma.
+
+        Args:
+            message (bytes): Mensaje firmado.
+            signature (bytes): Firma.
+            public_key_hex (str): Clave pública en hexadecimal.
+
+        Returns:
+            tuple: (SHA-256 del mensaje, firma, clave pública).
+        """
+        return hashlib.sha256(message).digest(), signature, public_key_hex
+
+    def contains(self, key):
+        """
+        Indica si la firma ya fue verificada, marcándola como usada recientemente.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True
+            self.misses += 1
+            return False
+
+    def add(self, key):
+        """
+        Registra una firma válida, descartando la menos usada si se supera maxsize.
+        """
+        with self._lock:
+            self._entries[key] = None
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Vacía la caché y reinicia los contadores.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+class VerifyingKeyCache:
+    """
+    Caché LRU acotada de objetos VerifyingKey indexados por la clave pública en hexadecimal.
+
+    Atributos:
+        maxsize (int): Número máximo de claves en caché.
+    """
+
+    def __init__(self, maxsize=10_000):
+        """
+        Inicializa una caché vacía.
+
+        Args:
+            maxsize (int): Número máximo de claves antes de descartar las menos usadas.
+        """
+        self.maxsize = maxsize
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def get(self, public_key_hex):
+        """
+        Devuelve el VerifyingKey de una clave pública, parseándolo y precalculando sus tablas solo la primera vez.
+
+        Args:
+            public_key_hex (str): Clave pública en hexadecimal.
+
+        Returns:
+            VerifyingKey: Clave lista para verificar.
+
+        Raises:
+            ValueError: Si la clave no es válida.
+        """
+        with self._lock:
+            vk = self._keys.get(public_key_hex)
+            if vk is not None:
+                self._keys.move_to_end(public_key_hex)
+                return vk
+        # El punto se crea con el orden de la curva: precompute() lo convierte en un "generador" y sin
+        # orden las tablas no se pueden calcular (VerifyingKey.from_string no lo asigna).
+        point = PointJacobi.from_bytes(SECP256k1.curve, bytes.fromhex(public_key_hex), order=SECP256k1.order)
+        vk = VerifyingKey.from_public_point(point, curve=SECP256k1)
+        vk.precompute(lazy=True)
+        self.put(public_key_hex, vk)
+        return vk
+
+    def put(self, public_key_hex, vk):
+        """
+        Registra un VerifyingKey ya construido (por ejemplo, el de una wallet local).
+
+        Args:
+            public_key_hex (str): Clave pública en hexadecimal.
+            vk (VerifyingKey): Objeto de clave pública.
+        """
+        with self._lock:
+            self._keys[public_key_hex] = vk
+            self._keys.move_to_end(public_key_hex)
+            if len(self._keys) > self.maxsize:
+                self._keys.popitem(last=False)
+
+
+signature_cache = SignatureCache()
+verifying_key_cache = VerifyingKeyCache()
+
+_executor = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def public_key_hex_of(public_key):
+    """
+    Normaliza una clave pública a hexadecimal.
+
+    Args:
+        public_key (str | VerifyingKey): Clave pública en hexadecimal u objeto VerifyingKey.
+
+    Returns:
+        str: Clave pública en hexadecimal.
+    """
+    if isinstance(public_key, VerifyingKey):
+        return public_key.to_string().hex()
+    return public_key
+
+
+def _verify_raw(message, signature, public_key):
+    """
+    Verifica una firma ECDSA sin consultar la caché de firmas.
+
+    Args:
+        message (bytes): Mensaje firmado.
+        signature (bytes): Firma.
+        public_key (str | VerifyingKey): Clave pública en hexadecimal u objeto VerifyingKey.
+
+    Returns:
+        bool: True si la firma es válida.
+    """
+    try:
+        if isinstance(public_key, VerifyingKey):
+            vk = public_key
+        else:
+            vk = verifying_key_cache.get(public_key)
+        return vk.verify(signature, message)
+    except (BadSignatureError, ValueError, Exception):
+        return False
+
+
+def _verify_chunk(jobs):
+    """
+    Verifica un lote de firmas dentro de un proceso worker.
+
+    Args:
+        jobs (list): Tripletas (mensaje, firma, clave pública).
+
+    Returns:
+        list: Resultado booleano de cada verificación.
+    """
+    return [_verify_raw(message, signature, pubkey) for message, signature, pubkey in jobs]
+
+
+def _get_executor(workers):
+    """
+    Devuelve el pool de procesos de verificación, creándolo (o recreándolo con otro número de
+    workers) la primera vez. Los workers se crean sin fork (ver utils.procesos).
+    """
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is None or _executor_workers != workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=contexto_procesos())
+            _executor_workers = workers
+        return _executor
+
+
+@atexit.register
+def shutdown_executor():
+    """
+    Cierra el pool de procesos de verificación, si existe (se ejecuta también al salir del proceso).
+    """
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True, cancel_futures=True)
+            _executor = None
+            _executor_workers = 0
+
+
+def verify_signature(message, signature, public_key, cache=signature_cache):
+    """
+    Verifica una firma consultando primero la caché de firmas verificadas.
+
+    Args:
+        message (bytes): Mensaje firmado.
+        signature (bytes): Firma.
+        public_key (str | VerifyingKey): Clave pública en hexadecimal u objeto VerifyingKey.
+        cache (SignatureCache, opcional): Caché a usar. None desactiva la caché.
+
+    Returns:
+        bool: True si la firma es válida.
+    """
+    if cache is None:
+        return _verify_raw(message, signature, public_key)
+    key = cache.key(message, signature, public_key_hex_of(public_key))
+    if cache.contains(key):
+        return True
+    valid = _verify_raw(message, signature, public_key)
+    if valid:
+        cache.add(key)
+    return valid
+
+
+def verify_batch(jobs, workers=None, min_parallel=64, cache=signature_cache):
+    """
+    Verifica en lote las firmas de muchas entradas de transacciones.
+
+    Las firmas ya presentes en la caché se aceptan sin verificar. Las demás se verifican en un pool
+    de procesos si son al menos min_parallel; si son menos, se verifican en el proceso actual porque
+    el costo de enviarlas a otro proceso supera al de verificarlas.
+
+    Args:
+        jobs (list): Tripletas (tx, índice de entrada, clave pública en hexadecimal).
+            Las claves se envían a los workers en hexadecimal; cada proceso mantiene su propia
+            caché de VerifyingKey.
+        workers (int, opcional): Número de procesos. Por defecto, el número de CPUs.
+        min_parallel (int): Mínimo de firmas pendientes para usar el pool de procesos.
+        cache (SignatureCache, opcional): Caché a usar. None desactiva la caché.
+
+    Returns:
+        list: Resultado booleano de cada trabajo, en el mismo orden.
+    """
+    with BATCH_SECONDS.time():
+        results = _verify_batch(jobs, workers, min_parallel, cache)
+    return results
+
+
+def _verify_batch(jobs, workers, min_parallel, cache):
+    results = [False] * len(jobs)
+    hits = 0
+    pending = []  # (posición, mensaje, firma, clave pública, clave de caché)
+    encoded = {}  # {id(tx): salidas serializadas}, compartidas por las entradas de una misma transacción
+    for pos, (tx, index, public_key_hex) in enumerate(jobs):
+        try:
+            if id(tx) not in encoded:
+                encoded[id(tx)] = encode_outputs(tx.outputs, tx.fee)
+            message = tx._message_to_sign(index, encoded[id(tx)])
+            signature = bytes.fromhex(tx.inputs[index]["signature"])
+        except (KeyError, IndexError, ValueError):
+            continue
+        key = cache.key(message, signature, public_key_hex) if cache is not None else None
+        if key is not None and cache.contains(key):
+            results[pos] = True
+            hits += 1
+        else:
+            pending.append((pos, message, signature, public_key_hex, key))
+
+    workers = max(1, workers or os.cpu_count() or 1)
+    raw = [(message, signature, pubkey) for _, message, signature, pubkey, _ in pending]
+    if workers == 1 or len(pending) < min_parallel:
+        verified = _verify_chunk(raw)
+    else:
+        chunk = -(-len(raw) // (workers * 4))
+        chunks = [raw[i:i + chunk] for i in range(0, len(raw), chunk)]
+        verified = [v for part in _get_executor(workers).map(_verify_chunk, chunks) for v in part]
+
+    for (pos, _, _, _, key), valid in zip(pending, verified):
+        results[pos] = valid
+        if valid and key is not None:
+            cache.add(key)
+    SIGNATURE_CACHE_HITS.inc(hits)
+    SIGNATURES_VERIFIED.inc(len(pending))
+    return results
@@ -3,13 +3,23 @@ wallet.py
 
 Este módulo define la clase Wallet, encargada de generar claves privadas y públicas usando ECDSA
 (curva secp256k1), y derivar direcciones SHA-256. También permite guardar y cargar las claves desde archivo.
+
+La wallet conserva los objetos SigningKey y VerifyingKey listos para usar (con las tablas de precómputo
+de la clave pública) y sus representaciones hexadecimales, para no volver a parsear ni codificar claves
+en cada firma o verificación. generate_wallets genera muchas wallets repartiendo la generación de
+claves entre varios procesos.
 """
 
 import hashlib
 import json
 import os
+from concurrent.futures import ProcessPoolExecutor
 from ecdsa import SigningKey, SECP256k1
 
+from blockchain.verification import verifying_key_cache
+from utils.archivos import guardar_json
+from utils.procesos import contexto_procesos
+
 class Wallet:
     """
     Representa una wallet criptográfica basada en ECDSA.
@@ -26,15 +36,24 @@ class Wallet:
         de lo contrario, genera una nueva.
 
         Args:
-            private_key (str, opcional): Clave privada en formato hexadecimal.
+            private_key (SigningKey | str, opcional): Objeto SigningKey o clave privada en formato hexadecimal.
         """
-        if private_key:
+        if isinstance(private_key, SigningKey):
+            self.private_key = private_key
+        elif private_key:
             self.private_key = SigningKey.from_string(bytes.fromhex(private_key), curve=SECP256k1)
         else:
             self.private_key = SigningKey.generate(curve=SECP256k1)
 
         self.public_key = self.private_key.get_verifying_key()
+        self.public_key.precompute(lazy=True)
         self.address = self._generate_address()
+        self._keys = {
+            "private_key": self.private_key.to_string().hex(),
+            "public_key": self.public_key.to_string().hex(),
+            "address": self.address
+        }
+        verifying_key_cache.put(self._keys["public_key"], self.public_key)
 
     def _generate_address(self):
         """
@@ -43,9 +62,7 @@ class Wallet:
         Returns:
             str: Dirección de la wallet en formato hexadecimal.
         """
-        pubkey_bytes = self.public_key.to_string()
-        sha256 = hashlib.sha256(pubkey_bytes).hexdigest()
-        return sha256
+        return hashlib.sha256(self.public_key.to_string()).hexdigest()
 
     def get_keys(self):
         """
@@ -54,11 +71,7 @@ class Wallet:
         Returns:
             dict: Diccionario con 'private_key', 'public_key' y 'address'.
         """
-        return {
-            "private_key": self.private_key.to_string().hex(),
-            "public_key": self.public_key.to_string().hex(),
-            "address": self.address
-        }
+        return dict(self._keys)
 
     def save_to_file(self, filepath):
         """
@@ -67,9 +80,7 @@ class Wallet:
         Args:
             filepath (str): Ruta al archivo de salida.
         """
-        data = self.get_keys()
-        with open(filepath, 'w') as f:
-            json.dump(data, f, indent=4)
+        guardar_json(filepath, self.get_keys())
 
     @staticmethod
     def load_from_file(filepath):
@@ -85,3 +96,50 @@ class Wallet:
         with open(filepath, 'r') as f:
             data = json.load(f)
         return Wallet(private_key=data["private_key"])
+
+
+def address_from_public_key(public_key_hex):
+    """
+    Calcula la dirección que corresponde a una clave pública (la misma regla que Wallet.address).
+
+    Args:
+        public_key_hex (str): Clave pública en hexadecimal.
+
+    Returns:
+        str: Dirección en formato hexadecimal.
+
+    Raises:
+        ValueError: Si la clave no es hexadecimal.
+    """
+    return hashlib.sha256(bytes.fromhex(public_key_hex)).hexdigest()
+
+
+def _generate_signing_key(_):
+    """
+    Genera una clave privada con su clave pública ya derivada (se ejecuta en los procesos del pool).
+    """
+    sk = SigningKey.generate(curve=SECP256k1)
+    sk.get_verifying_key()
+    return sk
+
+
+def generate_wallets(n, workers=None):
+    """
+    Genera n wallets nuevas. La generación de claves (una multiplicación escalar por wallet) se
+    reparte entre `workers` procesos; las claves vuelven ya derivadas, así que crear cada Wallet en
+    el proceso actual no repite ese cálculo.
+
+    Args:
+        n (int): Número de wallets.
+        workers (int, opcional): Número de procesos. Por defecto, el número de CPUs.
+
+    Returns:
+        list: Lista de n objetos Wallet.
+    """
+    workers = max(1, workers or os.cpu_count() or 1)
+    if workers == 1 or n < 2 * workers:
+        keys = [_generate_signing_key(i) for i in range(n)]
+    else:
+        with ProcessPoolExecutor(workers, mp_context=contexto_procesos()) as pool:
+            keys = list(pool.map(_generate_signing_key, range(n), chunksize=-(-n // (workers * 4))))
+    return [Wallet(private_key=sk) for sk in keys]
@@ -1,21 +1,91 @@
 import sys
 import os
 import shutil
+import threading
+import time
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 
 import streamlit as st
 from blockchain.system import SistemaBlockchain
+from blockchain.utxo_store import SQLiteUTXOBackend
+from interface.mineria import TrabajoMineria
 
-# Inicializar sistema global
-if "sistema" not in st.session_state:
-    sistema = SistemaBlockchain()
-    sistema.cargar_estado()
-    st.session_state.sistema = sistema
-if "transacciones_pendientes" not in st.session_state:
-    st.session_state.transacciones_pendientes = []
+UTXO_DB = os.path.join("data", "utxos.db")
+BLOQUES_POR_PAGINA = 10
+INTERVALO_PROGRESO = 0.5  # segundos entre actualizaciones de la página mientras se mina
 
-sistema = st.session_state.sistema
+
+def crear_sistema():
+    """
+    Crea un sistema cuyo conjunto UTXO se guarda en la base de datos SQLite de data/ y carga su estado.
+    """
+    return SistemaBlockchain.desde_carpeta("data", utxo_backend=SQLiteUTXOBackend(UTXO_DB))
+
+
+def reiniciar_sistema(sistema):
+    """
+    Borra el estado guardado en data/ y reinicia el sistema compartido en el mismo objeto, con el
+    candado de escritura tomado: las demás sesiones esperan y después ven el sistema nuevo.
+    """
+    with sistema.bloqueo.write():
+        for archivo in ["usuarios.json", "fondeos.json", "utxos.json", "blockchain.json", "snapshot.bin"]:
+            ruta = os.path.join("data", archivo)
+            if os.path.exists(ruta):
+                os.remove(ruta)
+        sistema.cerrar_block_stores()
+        shutil.rmtree(os.path.join("data", "bloques"), ignore_errors=True)
+        sistema.utxo_manager.close()
+        for sufijo in ["", "-wal", "-shm"]:
+            if os.path.exists(UTXO_DB + sufijo):
+                os.remove(UTXO_DB + sufijo)
+        sistema.reiniciar("data", utxo_backend=SQLiteUTXOBackend(UTXO_DB))
+
+
+@st.cache_resource(show_spinner=False)
+def sistema_compartido():
+    """
+    Sistema único del proceso, compartido por todas las sesiones: el estado se carga una sola vez y
+    las sesiones se coordinan con el candado del sistema (sistema.bloqueo).
+    """
+    return crear_sistema()
+
+
+@st.cache_resource(show_spinner=False)
+def mineria_compartida():
+    """
+    Trabajo de minería del proceso. Solo puede haber uno en curso, y todas las sesiones ven su progreso.
+    """
+    return {"trabajo": None, "bloqueo": threading.Lock()}
+
+
+@st.cache_data(max_entries=128, show_spinner=False)
+def cabeceras_pagina(_cadena, ultimo_hash, desde, hasta):
+    """
+    Devuelve las cabeceras de los bloques de alturas [desde, hasta), del más reciente al más antiguo.
+    El hash del último bloque forma parte de la clave de la caché, así que un bloque nuevo la invalida.
+    """
+    return [
+        {"altura": b.index, "hash": b.hash, "prev_hash": b.prev_hash, "nonce": b.nonce, "timestamp": b.timestamp}
+        for b in reversed(_cadena.chain[desde:hasta])
+    ]
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def transacciones_bloque(_cadena, hash_bloque):
+    """
+    Devuelve las transacciones de un bloque por su hash (el contenido de un hash no cambia).
+    """
+    bloque = _cadena.get_block_by_hash(hash_bloque)
+    return bloque.transactions if bloque else []
+
+
+try:
+    sistema = sistema_compartido()
+except ValueError as e:  # por ejemplo, una cadena guardada con el formato anterior
+    st.error(f"No se pudo cargar el estado de data/: {e}")
+    st.stop()
+mineria = mineria_compartida()
 
 # --- Sidebar ---
 st.sidebar.title("Menú")
@@ -44,12 +114,15 @@ elif seccion == "Usuarios":
         else:
             st.warning("Escribe un nombre válido.")
     
+    with sistema.bloqueo.read():
+        usuarios = {nombre: wallet.address for nombre, wallet in sistema.usuarios.items()}
+
     st.subheader("Usuarios registrados:")
-    for nombre, wallet in sistema.usuarios.items():
-        st.write(f"- {nombre}: `{wallet.address}`")
+    for nombre, direccion in usuarios.items():
+        st.write(f"- {nombre}: `{direccion}`")
 
     st.subheader("💰 Financiar usuario (dev mode)")
-    usuario_seleccionado = st.selectbox("Seleccionar usuario para financiar", list(sistema.usuarios.keys()))
+    usuario_seleccionado = st.selectbox("Seleccionar usuario para financiar", list(usuarios))
     monto = st.number_input("Monto a asignar", min_value=1, value=10)
 
     if st.button("Asignar fondos"):
@@ -61,10 +134,12 @@ elif seccion == "Usuarios":
 elif seccion == "Transacciones":
     st.header("💸 Enviar Transacción")
 
-    if len(sistema.usuarios) < 2:
+    with sistema.bloqueo.read():
+        usuarios = list(sistema.usuarios.keys())
+
+    if len(usuarios) < 2:
         st.warning("Debes tener al menos 2 usuarios.")
     else:
-        usuarios = list(sistema.usuarios.keys())
         remitente = st.selectbox("Remitente", usuarios)
         receptor = st.selectbox("Receptor", [u for u in usuarios if u != remitente])
         monto = st.number_input("Monto", min_value=0.0, step=0.1)
@@ -73,8 +148,7 @@ elif seccion == "Transacciones":
         if st.button("Enviar"):
             tx = sistema.enviar_transaccion(remitente, receptor, monto, fee)
             if tx:
-                st.session_state.transacciones_pendientes.append(tx)
-                st.success(f"Transacción agregada a la cola: {tx.txid}")
+                st.success(f"Transacción agregada al mempool: {tx.txid}")
             else:
                 st.error("Transacción fallida.")
 
@@ -82,46 +156,103 @@ elif seccion == "Transacciones":
 # --- Minería ---
 elif seccion == "Minería":
     st.header("⛏️ Minar Bloque")
-    
-    if st.session_state.transacciones_pendientes:
-        st.subheader("Transacciones pendientes")
-        for tx in st.session_state.transacciones_pendientes:
-            st.json(tx.__dict__)
-    else:
-        st.info("No hay transacciones en la cola.")
+    trabajo = mineria["trabajo"]
 
-    if st.button("Minar"):
-        txs = st.session_state.transacciones_pendientes
-        if txs:
-            sistema.minar_bloque(txs)
-            bloque = sistema.blockchain.get_last_block() 
-            st.success(f"✅ Bloque #{bloque.index} minado con hash: `{bloque.hash}`")
-            st.session_state.transacciones_pendientes = []
-            sistema.guardar_estado()
+    if trabajo is not None and trabajo.activo:
+        progreso = trabajo.progreso
+        st.info(f"⛏️ Minando... {progreso.hashes:,} hashes en {progreso.elapsed:.1f} s "
+                f"({progreso.hashes_per_second:,.0f} hashes/s) | nonce {progreso.nonce}")
+        if trabajo.cancelado:
+            st.caption("Cancelando...")
+        elif st.button("Cancelar minería"):
+            trabajo.cancelar()
+        # La página se vuelve a ejecutar para actualizar el progreso hasta que el hilo termine.
+        time.sleep(INTERVALO_PROGRESO)
+        st.rerun()
+
+    if trabajo is not None:
+        progreso = trabajo.progreso
+        if trabajo.error is not None:
+            st.error(f"Error al minar: {trabajo.error}")
+        elif trabajo.bloque is not None:
+            st.success(f"✅ Bloque #{trabajo.bloque.index} minado con hash: `{trabajo.bloque.hash}` "
+                       f"({progreso.hashes:,} hashes en {progreso.elapsed:.2f} s, "
+                       f"{progreso.hashes_per_second:,.0f} hashes/s)")
+        elif trabajo.cancelado:
+            st.warning("Minería cancelada.")
         else:
             st.warning("No hay transacciones pendientes.")
 
+    with sistema.bloqueo.read():
+        pendientes = [tx.to_dict() for tx in sistema.mempool.transactions()]
+        tamano = sistema.mempool.size_bytes
+    if pendientes:
+        st.subheader(f"Mempool ({len(pendientes)} transacciones, {tamano} bytes)")
+        for tx in pendientes:
+            st.json(tx)
+    else:
+        st.info("No hay transacciones en el mempool.")
+
+    if st.button("Minar"):
+        with mineria["bloqueo"]:
+            if mineria["trabajo"] is None or not mineria["trabajo"].activo:
+                mineria["trabajo"] = TrabajoMineria(sistema).iniciar()
+        st.rerun()
+
 
 # --- Saldos ---
 elif seccion == "Saldos":
     st.header("💰 Saldos actuales")
-    for nombre, wallet in sistema.usuarios.items():
-        saldo = sistema.obtener_saldo(wallet.address)
+    with sistema.bloqueo.read():
+        direcciones = {nombre: wallet.address for nombre, wallet in sistema.usuarios.items()}
+        saldos = {nombre: sistema.obtener_saldo(direccion) for nombre, direccion in direcciones.items()}
+    for nombre, saldo in saldos.items():
         st.write(f"{nombre}: **{saldo} monedas**")
 
+    if direcciones:
+        st.subheader("📜 Historial de movimientos")
+        usuario = st.selectbox("Usuario", list(direcciones))
+        movimientos = sistema.historial_movimientos(direcciones[usuario])
+        if movimientos:
+            st.table(movimientos)
+        else:
+            st.info("El usuario no tiene movimientos confirmados.")
+
 # --- Blockchain ---
 elif seccion == "Blockchain":
     st.header("📦 Cadena de bloques")
-    for bloque in sistema.blockchain.chain:
-        with st.expander(f"Bloque #{bloque.index}"):
-            st.json({
-                "index": bloque.index,
-                "timestamp": bloque.timestamp,
-                "hash": bloque.hash,
-                "prev_hash": bloque.prev_hash,
-                "nonce": bloque.nonce,
-                "transacciones": bloque.transactions
-            })
+
+    consulta = st.text_input("Buscar por altura, hash de bloque o txid").strip()
+    # La página se arma con el candado de lectura: otras sesiones pueden leer a la vez, pero ningún
+    # bloque se conecta ni se desconecta mientras tanto.
+    with sistema.bloqueo.read():
+        cadena = sistema.blockchain
+        if consulta:
+            bloque = None
+            if consulta.isdigit() and int(consulta) < len(cadena.chain):
+                bloque = cadena.chain[int(consulta)]
+            else:
+                bloque = cadena.get_block_by_hash(consulta)
+            ubicacion = None if bloque else cadena.locate_transaction(consulta)
+            if bloque:
+                st.json(bloque.to_dict())
+            elif ubicacion:
+                altura, posicion = ubicacion
+                st.write(f"Transacción #{posicion} del bloque #{altura}")
+                st.json(cadena.get_transaction(consulta))
+            else:
+                st.warning("No se encontró ningún bloque ni transacción.")
+
+        # Solo se leen los bloques de la página actual: el costo no depende de la longitud de la cadena.
+        total = len(cadena.chain)
+        paginas = -(-total // BLOQUES_POR_PAGINA)
+        pagina = st.number_input(f"Página (1 = más reciente, {paginas} en total)", min_value=1, max_value=paginas, value=1)
+        hasta = total - (pagina - 1) * BLOQUES_POR_PAGINA
+        cabeceras = cabeceras_pagina(cadena, cadena.get_last_block().hash, max(0, hasta - BLOQUES_POR_PAGINA), hasta)
+
+        for cabecera in cabeceras:
+            with st.expander(f"Bloque #{cabecera['altura']}"):
+                st.json({**cabecera, "transacciones": transacciones_bloque(cadena, cabecera["hash"])})
 
 
 
@@ -129,13 +260,11 @@ elif seccion == "Reiniciar Sistema":
     st.header("⚠️ Reiniciar Sistema Blockchain")
 
     if st.button("Eliminar estado y reiniciar"):
-        # Eliminar archivos de data/
-        for archivo in ["usuarios.json", "utxos.json", "blockchain.json"]:
-            ruta = os.path.join("data", archivo)
-            if os.path.exists(ruta):
-                os.remove(ruta)
-
-        # Reiniciar estado interno
-        st.session_state.sistema = SistemaBlockchain()
-        st.session_state.transacciones_pendientes = []
+        with mineria["bloqueo"]:
+            trabajo, mineria["trabajo"] = mineria["trabajo"], None
+        if trabajo is not None:
+            trabajo.cancelar()
+            trabajo.esperar()
+        # Eliminar el estado de data/ y reiniciar el sistema compartido en el mismo objeto.
+        reiniciar_sistema(sistema)
         st.success("Sistema reiniciado con éxito. Se generó un nuevo bloque génesis.")
\ No newline at end of file
@@ -0,0 +1,75 @@
+"""
+mineria.py
+
+Minería en segundo plano para la interfaz. El bloque se mina en un hilo aparte, de modo que la
+página no queda bloqueada durante la Prueba de Trabajo: cada ejecución del script consulta el
+progreso (hashes, hashes por segundo y nonce) y puede cancelar la búsqueda.
+"""
+
+import threading
+
+from blockchain.mining import MiningProgress
+from utils.logger import log_error
+
+
+class TrabajoMineria:
+    """
+    Minado de un bloque en un hilo en segundo plano.
+
+    Atributos:
+        sistema (SistemaBlockchain): Sistema en el que se mina.
+        carpeta (str): Carpeta donde se guarda el estado si se mina un bloque.
+        progreso (MiningProgress): Progreso de la búsqueda del nonce.
+        bloque (Block | None): Bloque minado al terminar, o None si no había transacciones o se canceló.
+        error (Exception | None): Error ocurrido durante el minado.
+    """
+
+    def __init__(self, sistema, carpeta="data"):
+        self.sistema = sistema
+        self.carpeta = carpeta
+        self.progreso = MiningProgress()
+        self.bloque = None
+        self.error = None
+        self._hilo = threading.Thread(target=self._ejecutar, name="mineria", daemon=True)
+
+    def iniciar(self):
+        """
+        Empieza a minar en segundo plano.
+
+        Returns:
+            TrabajoMineria: El mismo trabajo, para encadenar la llamada.
+        """
+        self._hilo.start()
+        return self
+
+    def _ejecutar(self):
+        try:
+            self.bloque = self.sistema.minar_bloque(progreso=self.progreso)
+            if self.bloque is not None:
+                self.sistema.guardar_estado(self.carpeta)
+        except Exception as e:
+            log_error("Error al minar en segundo plano: %s", e, categoria="mineria")
+            self.error = e
+
+    @property
+    def activo(self):
+        """
+        bool: True mientras el hilo de minería sigue en ejecución.
+        """
+        return self._hilo.is_alive()
+
+    @property
+    def cancelado(self):
+        return self.progreso.cancelled
+
+    def cancelar(self):
+        """
+        Pide que la minería se detenga; el hilo termina en el siguiente lote de nonces.
+        """
+        self.progreso.cancel()
+
+    def esperar(self, timeout=None):
+        """
+        Espera a que el hilo de minería termine.
+        """
+        self._hilo.join(timeout)
@@ -0,0 +1,90 @@
+"""
+Pruebas de las estrategias de selección de monedas (blockchain.coin_selection): cada estrategia cubre
+el objetivo con UTXOs de la dirección, respeta los outpoints excluidos, calcula el cambio y devuelve
+None si los fondos no alcanzan.
+"""
+
+import pytest
+
+from blockchain.coin_selection import STRATEGIES, select_coins
+from blockchain.transaction import UTXOManager
+
+CANTIDADES = [1, 2, 5, 8, 13]
+
+
+@pytest.fixture
+def manager():
+    manager = UTXOManager()
+    for i, cantidad in enumerate(CANTIDADES):
+        manager.add_utxo(f"{i:064x}", 0, "ana", cantidad)
+    manager.add_utxo("ff" * 32, 0, "beto", 100)
+    return manager
+
+
+def outpoint(cantidad):
+    return f"{CANTIDADES.index(cantidad):064x}:0"
+
+
+def cantidades(seleccion):
+    return sorted(utxo["cantidad"] for _, utxo in seleccion.inputs)
+
+
+@pytest.mark.parametrize("strategy", sorted(STRATEGIES))
+@pytest.mark.parametrize("target", [0.5, 1, 4, 7, 10, 15.5, 20, 29])
+def test_la_seleccion_cubre_el_objetivo_con_utxos_de_la_direccion(manager, strategy, target):
+    seleccion = select_coins(manager, "ana", target, strategy=strategy)
+    assert seleccion.strategy in (strategy, "largest_first")  # las demás pueden recurrir a largest_first
+    assert seleccion.total >= target
+    assert seleccion.total == sum(cantidades(seleccion))
+    assert len({o for o, _ in seleccion.inputs}) == seleccion.num_inputs
+    assert all(utxo["direccion"] == "ana" for _, utxo in seleccion.inputs)
+    if strategy != "branch_and_bound":
+        assert seleccion.change == pytest.approx(seleccion.total - target)
+    assert seleccion.creates_change == (seleccion.change > 0)
+
+
+@pytest.mark.parametrize("strategy", sorted(STRATEGIES))
+def test_fondos_insuficientes_devuelve_none(manager, strategy):
+    assert select_coins(manager, "ana", 30, strategy=strategy) is None
+    assert select_coins(manager, "nadie", 1, strategy=strategy) is None
+    assert select_coins(manager, "ana", 17, strategy=strategy, exclude={outpoint(13)}) is None
+
+
+@pytest.mark.parametrize("strategy", sorted(STRATEGIES))
+def test_los_outpoints_excluidos_no_se_usan(manager, strategy):
+    excluidos = {outpoint(13), outpoint(5)}
+    seleccion = select_coins(manager, "ana", 9, strategy=strategy, exclude=excluidos)
+    assert not excluidos & {o for o, _ in seleccion.inputs}
+    assert seleccion.total >= 9
+
+
+def test_largest_first_usa_el_minimo_de_entradas(manager):
+    assert cantidades(select_coins(manager, "ana", 10)) == [13]
+    seleccion = select_coins(manager, "ana", 20)
+    assert cantidades(seleccion) == [8, 13]
+    assert seleccion.change == 1
+
+
+def test_smallest_sufficient_toma_el_menor_utxo_que_alcanza(manager):
+    seleccion = select_coins(manager, "ana", 4, strategy="smallest_sufficient")
+    assert cantidades(seleccion) == [5]
+    assert seleccion.change == 1
+    assert cantidades(select_coins(manager, "ana", 5, strategy="smallest_sufficient")) == [5]
+    # Ningún UTXO alcanza por sí solo: recurre a largest_first.
+    assert cantidades(select_coins(manager, "ana", 15, strategy="smallest_sufficient")) == [8, 13]
+
+
+def test_branch_and_bound_busca_una_suma_exacta_sin_cambio(manager):
+    seleccion = select_coins(manager, "ana", 7, strategy="branch_and_bound")
+    assert sum(cantidades(seleccion)) == 7
+    assert not seleccion.creates_change
+    assert sum(cantidades(select_coins(manager, "ana", 24, strategy="branch_and_bound"))) == 24
+    # Sin suma exacta recurre a largest_first, que sí genera cambio.
+    seleccion = select_coins(manager, "ana", 15.5, strategy="branch_and_bound")
+    assert seleccion.strategy == "largest_first"
+    assert seleccion.change == pytest.approx(5.5)
+
+
+def test_estrategia_desconocida(manager):
+    with pytest.raises(ValueError):
+        select_coins(manager, "ana", 1, strategy="aleatoria")
@@ -0,0 +1,132 @@
+"""
+Pruebas de la serialización binaria (blockchain.encoding): ida y vuelta de transacciones, bloques y
+cabeceras, bloques perezosos y rechazo de datos mal formados con ValueError.
+"""
+
+import pytest
+
+from blockchain.block import Block, HEADER_SIZE
+from blockchain.encoding import decode_block_dict, decode_header, decode_transaction, encode_transaction, transaction_id
+from blockchain.snapshot import block_from_header
+from blockchain.transaction import Transaction
+from blockchain.wallet import Wallet
+
+
+def recompensa(altura, cantidad=4.0):
+    tx = {"direccion": "MINERO", "cantidad": cantidad, "tipo": "recompensa", "altura": altura}
+    tx["txid"] = transaction_id(tx)
+    return tx
+
+
+def transferencia(wallet, receptor, entradas=2):
+    tx = Transaction(
+        [{"txid": f"{i:064x}", "index": i} for i in range(entradas)] + [{"txid": "fund_ana", "index": 0}],
+        [{"direccion": receptor, "cantidad": 1.5}, {"direccion": wallet.address, "cantidad": 0.1}],
+        fee=0.4,
+    )
+    tx.sign_inputs(wallet.private_key)
+    return tx
+
+
+def bloque(index=1, prev_hash="ab" * 32):
+    wallet = Wallet()
+    txs = [recompensa(index), transferencia(wallet, Wallet().address).to_dict()]
+    return Block(index=index, transactions=txs, prev_hash=prev_hash, nonce=12345,
+                 timestamp="2025-06-07 22:58:52")
+
+
+def test_transferencia_ida_y_vuelta():
+    tx = transferencia(Wallet(), "MINERO")
+    copia = Transaction.from_bytes(tx.to_bytes())
+    assert copia.to_dict() == tx.to_dict()
+    assert copia.txid == tx.txid
+
+
+def test_recompensa_ida_y_vuelta():
+    tx = recompensa(7)
+    assert decode_transaction(encode_transaction(tx)) == tx
+    decoded = decode_block_dict(Block(7, [tx], "cd" * 32).to_bytes())
+    assert decoded["transactions"] == [tx]
+
+
+def test_recompensas_de_distinta_altura_tienen_distinto_txid():
+    assert recompensa(1)["txid"] != recompensa(2)["txid"]
+
+
+def test_transaction_from_bytes_rechaza_recompensa():
+    with pytest.raises(ValueError):
+        Transaction.from_bytes(encode_transaction(recompensa(7)))
+
+
+def test_bloque_ida_y_vuelta():
+    original = bloque()
+    copia = Block.from_bytes(original.to_bytes())
+    assert copia.to_dict() == original.to_dict()
+    assert copia.hash == original.calculate_hash()
+    assert copia.has_valid_merkle_root()
+
+
+def test_cabecera_del_genesis_conserva_prev_hash():
+    genesis = bloque(index=0, prev_hash="0")
+    cabecera = decode_header(genesis.header())
+    assert cabecera == {"index": 0, "timestamp": genesis.timestamp, "prev_hash": "0",
+                        "merkle_root": genesis.merkle_root, "nonce": genesis.nonce}
+    assert Block.from_bytes(genesis.to_bytes()).prev_hash == "0"
+
+
+def test_bloque_perezoso_carga_las_transacciones_una_vez():
+    original = bloque()
+    cabecera = {**decode_header(original.header()), "hash": original.hash}
+    llamadas = []
+
+    def cargar():
+        llamadas.append(1)
+        return decode_block_dict(original.to_bytes())["transactions"]
+
+    perezoso = block_from_header(cabecera, cargar)
+    assert not perezoso.is_loaded
+    assert perezoso.calculate_hash() == original.hash  # la cabecera no necesita las transacciones
+    assert not llamadas
+    assert perezoso.transactions == original.transactions
+    assert perezoso.transactions == original.transactions
+    assert llamadas == [1]
+    assert perezoso.to_bytes() == original.to_bytes()
+
+
+@pytest.mark.parametrize("data", [b"", b"\x01", b"\x01\x00", b"\x02\x00", b"\x01\x07",
+                                  b"\x01\x00" + b"\xff" * 11])
+def test_transaccion_mal_formada(data):
+    with pytest.raises(ValueError):
+        Transaction.from_bytes(data)
+
+
+def test_transaccion_truncada_o_con_bytes_sobrantes():
+    data = transferencia(Wallet(), "MINERO").to_bytes()
+    for n in range(len(data)):
+        with pytest.raises(ValueError):
+            Transaction.from_bytes(data[:n])
+    with pytest.raises(ValueError):
+        Transaction.from_bytes(data + b"\x00")
+
+
+def test_bloque_truncado_o_con_bytes_sobrantes():
+    data = bloque().to_bytes()
+    for n in range(len(data)):
+        with pytest.raises(ValueError):
+            Block.from_bytes(data[:n])
+    with pytest.raises(ValueError):
+        Block.from_bytes(data + b"\x00")
+
+
+def test_cabecera_corta():
+    with pytest.raises(ValueError):
+        decode_header(bloque().header()[:-1])
+
+
+def test_longitud_de_transaccion_mayor_que_el_bloque():
+    data = bytearray(bloque().to_bytes())
+    data[1 + HEADER_SIZE + 1] = 0x7F  # longitud de la primera transacción
+    with pytest.raises(ValueError):
+        Block.from_bytes(bytes(data))
+    with pytest.raises(ValueError):
+        decode_transaction(bytes(data), 1 + HEADER_SIZE + 2, len(data) + 10)
@@ -0,0 +1,82 @@
+"""
+Pruebas del mempool (blockchain.mempool): conflictos entre transacciones pendientes, desalojo por
+comisión por byte al superar el tamaño máximo, plantilla de bloque y retiro de las confirmadas.
+"""
+
+from blockchain.mempool import Mempool
+from blockchain.transaction import Transaction
+
+
+def tx(index, fee, salidas=1, txid_entrada="aa" * 32):
+    """
+    Transacción sin firmar que gasta la salida index de txid_entrada.
+    """
+    return Transaction([{"txid": txid_entrada, "index": index}],
+                       [{"direccion": "beto", "cantidad": 1}] * salidas, fee)
+
+
+TAMANO = tx(0, 0).size()  # bytes de una transacción con una salida
+
+
+def test_se_conserva_la_primera_de_dos_transacciones_en_conflicto():
+    mempool = Mempool()
+    primera, segunda = tx(0, 0.1), tx(0, 0.9)
+    assert mempool.add(primera)
+    assert mempool.conflicts(segunda) == {primera.txid}
+    assert not mempool.add(segunda)
+    assert not mempool.add(primera)  # ya está
+    assert len(mempool) == 1
+    assert set(mempool.spent_outpoints) == {"aa" * 32 + ":0"}
+
+
+def test_las_transacciones_se_ordenan_por_comision_por_byte():
+    mempool = Mempool()
+    chica = tx(0, 0.5)
+    grande = tx(1, 0.6, salidas=10)  # más comisión, pero menos por byte
+    media = tx(2, 0.3)
+    for t in (chica, grande, media):
+        mempool.add(t)
+    assert mempool.transactions() == [chica, media, grande]
+
+
+def test_al_superar_el_tamano_se_desaloja_la_de_menor_comision_por_byte():
+    mempool = Mempool(max_bytes=3 * TAMANO)
+    txs = [tx(0, 0.3), tx(1, 0.1), tx(2, 0.2)]
+    for t in txs:
+        assert mempool.add(t)
+    assert mempool.add(tx(3, 0.4))
+    assert txs[1].txid not in mempool
+    assert mempool.size_bytes == 3 * TAMANO
+    # Una transacción que paga menos que todas las presentes es la que se desaloja.
+    assert not mempool.add(tx(4, 0.01))
+    assert len(mempool) == 3
+    # Al desalojar se libera la entrada: otra transacción puede gastarla.
+    assert mempool.add(tx(1, 0.5))
+
+
+def test_plantilla_elige_las_mas_rentables_que_caben():
+    mempool = Mempool()
+    chica = tx(0, 0.5)
+    grande = tx(1, 2, salidas=20)
+    media = tx(2, 0.3)
+    for t in (chica, grande, media):
+        mempool.add(t)
+    # La grande no cabe después de la chica; la media, que paga menos por byte, sí.
+    assert mempool.build_block_template(3 * TAMANO) == [chica, media]
+    assert mempool.build_block_template(10_000) == [chica, grande, media]
+    assert mempool.build_block_template(0) == []
+    assert len(mempool) == 3  # armar la plantilla no modifica el mempool
+
+
+def test_remove_confirmed_quita_las_incluidas_y_las_que_gastan_sus_entradas():
+    mempool = Mempool()
+    incluida, en_conflicto, otra = tx(0, 0.1), tx(1, 0.2), tx(2, 0.3)
+    for t in (incluida, en_conflicto, otra):
+        mempool.add(t)
+    # Otro nodo minó una transacción distinta que también gasta la salida 1.
+    minada = tx(1, 0.7, salidas=2)
+    recompensa = {"direccion": "MINERO", "tipo": "recompensa", "altura": 1, "cantidad": 3}
+    mempool.remove_confirmed([recompensa, incluida.to_dict(), minada])
+    assert mempool.transactions() == [otra]
+    assert mempool.size_bytes == otra.size()
+    assert mempool.remove(incluida.txid) is None
@@ -0,0 +1,135 @@
+"""
+Pruebas de las métricas de ejecución (utils.metrics): formato de texto de Prometheus, diccionario de
+dump(), métricas desactivadas que no cuentan, reset() y el servidor HTTP. Cada prueba usa un registro
+vacío propio, así que no ve las métricas del resto del proyecto.
+"""
+
+import urllib.error
+import urllib.request
+
+import pytest
+
+from utils import metrics
+
+
+@pytest.fixture(autouse=True)
+def registro(monkeypatch):
+    monkeypatch.setattr(metrics, "_registry", {})
+    monkeypatch.setattr(metrics, "_enabled", True)
+
+
+def test_render_en_formato_de_prometheus():
+    metrics.counter("prueba_hashes_total", "Hashes calculados").inc(3)
+    metrics.gauge("prueba_mempool", "Transacciones pendientes").set(2.5)
+    latencia = metrics.histogram("prueba_latencia_seconds", "Latencia", buckets=(0.5, 0.1, 1))
+    for valor in (0.05, 0.1, 0.7, 4):
+        latencia.observe(valor)
+
+    assert metrics.render() == (
+        "# HELP prueba_hashes_total Hashes calculados\n"
+        "# TYPE prueba_hashes_total counter\n"
+        "prueba_hashes_total 3\n"
+        "# HELP prueba_latencia_seconds Latencia\n"
+        "# TYPE prueba_latencia_seconds histogram\n"
+        'prueba_latencia_seconds_bucket{le="0.1"} 2\n'
+        'prueba_latencia_seconds_bucket{le="0.5"} 2\n'
+        'prueba_latencia_seconds_bucket{le="1"} 3\n'
+        'prueba_latencia_seconds_bucket{le="+Inf"} 4\n'
+        "prueba_latencia_seconds_sum 4.85\n"
+        "prueba_latencia_seconds_count 4\n"
+        "# HELP prueba_mempool Transacciones pendientes\n"
+        "# TYPE prueba_mempool gauge\n"
+        "prueba_mempool 2.5\n"
+    )
+
+
+def test_dump_devuelve_los_valores_actuales():
+    metrics.counter("prueba_total", "").inc()
+    metrics.histogram("prueba_seconds", "", buckets=(1,)).observe(0.5)
+    assert metrics.dump() == {
+        "prueba_seconds": {"count": 1, "sum": 0.5, "buckets": {"1": 1, "+Inf": 1}},
+        "prueba_total": 1,
+    }
+
+
+def test_desactivadas_no_cuentan():
+    contador = metrics.counter("prueba_total", "")
+    gauge = metrics.gauge("prueba_gauge", "")
+    histograma = metrics.histogram("prueba_seconds", "")
+    metrics.disable()
+    assert not metrics.enabled()
+    contador.inc()
+    gauge.set(5)
+    gauge.inc()
+    histograma.observe(1)
+    with histograma.time() as span:
+        pass
+    assert span is metrics._NULL_SPAN
+    assert metrics.dump()["prueba_total"] == 0
+    assert gauge.value == 0
+    assert histograma.count == 0
+
+    metrics.enable()
+    with histograma.time() as span:
+        pass
+    assert histograma.count == 1
+    assert histograma.sum == span.elapsed
+
+
+def test_gauge_con_funcion_se_evalua_al_exportar():
+    gauge = metrics.gauge("prueba_gauge", "")
+    gauge.set(4)
+    pendientes = [1, 2]
+    gauge.set_function(lambda: len(pendientes))
+    pendientes.append(3)
+    assert gauge.samples() == [("prueba_gauge", 3)]
+    gauge.set_function(lambda: 1 / 0)  # si la función falla se exporta el último valor fijado
+    assert gauge.samples() == [("prueba_gauge", 4)]
+
+
+def test_registrar_dos_veces_devuelve_la_misma_metrica():
+    assert metrics.counter("prueba_total", "") is metrics.counter("prueba_total", "otra ayuda")
+    with pytest.raises(ValueError):
+        metrics.gauge("prueba_total", "")
+
+
+def test_reset_pone_en_cero_aunque_esten_desactivadas():
+    contador = metrics.counter("prueba_total", "")
+    histograma = metrics.histogram("prueba_seconds", "")
+    contador.inc(5)
+    histograma.observe(2)
+    metrics.disable()
+    metrics.reset()
+    assert contador.value == 0
+    assert histograma.count == 0 and histograma.sum == 0
+    assert all(n == 0 for _, n in histograma.cumulative())
+
+
+def test_metric_es_abstracta():
+    with pytest.raises(TypeError):
+        metrics._Metric("prueba", "")
+
+    class SinReset(metrics._Metric):
+        def samples(self):
+            return []
+
+    with pytest.raises(TypeError):
+        SinReset("prueba", "")
+
+
+def test_serve_publica_las_metricas_por_http():
+    metrics.disable()
+    metrics.counter("prueba_total", "").inc()  # desactivadas: no cuenta
+    server = metrics.serve(port=0)
+    try:
+        assert metrics.enabled()
+        metrics.counter("prueba_total", "").inc()
+        url = "http://127.0.0.1:%d" % server.server_address[1]
+        with urllib.request.urlopen(url + "/metrics", timeout=5) as respuesta:
+            assert respuesta.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert respuesta.read().decode() == metrics.render()
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(url + "/otra", timeout=5)
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,67 @@
+"""
+Pruebas de la red P2P (blockchain.p2p): los mensajes mal formados de un nodo se rechazan con ValueError
+y cierran solo la conexión con ese nodo.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from blockchain.p2p import (FRAME, MSG_BLOCK, MSG_GETBLOCKS, MSG_HELLO, MSG_INV, MSG_TX, Nodo,
+                            decode_block_message, decode_control_message)
+from blockchain.system import SistemaBlockchain
+
+
+@pytest.mark.parametrize("payload, campos", [
+    (b"no es json", {"altura": int}),
+    (b"[1, 2]", {"altura": int}),
+    (b'{"altura": "3"}', {"altura": int}),
+    (b'{"altura": true}', {"altura": int}),
+    (b'{"desde": null}', {"desde": int}),
+    (b'{"tipo": "tx", "ids": 5}', {"tipo": str, "ids": list}),
+    (b'{"tipo": "tx", "ids": [[1]]}', {"tipo": str, "ids": list}),
+    (b'{"tipo": "otro", "ids": []}', {"tipo": str, "ids": list}),
+])
+def test_mensaje_de_control_mal_formado(payload, campos):
+    with pytest.raises(ValueError):
+        decode_control_message(payload, **campos)
+
+
+def test_mensaje_de_control_valido():
+    assert decode_control_message(b'{"tipo": "block", "ids": ["ab"]}', tipo=str, ids=list)["ids"] == ["ab"]
+
+
+@pytest.mark.parametrize("payload", [b"\xff" * 10, b"\x01", b'{"index": 1}', b'{"index": 1', b"[]"])
+def test_bloque_mal_formado(payload):
+    with pytest.raises(ValueError):
+        decode_block_message(payload)
+
+
+def test_mensajes_invalidos_cierran_solo_esa_conexion():
+    async def escenario():
+        sistema = SistemaBlockchain()
+        nodo = Nodo(sistema)
+        port = await nodo.start()
+        try:
+            malos = [(MSG_HELLO, b"[1]"), (MSG_GETBLOCKS, b'{"desde": "x"}'), (MSG_INV, b'{"tipo": 1}'),
+                     (MSG_TX, b"\x00\x01"), (MSG_BLOCK, b"\xff\xff")]
+            for kind, payload in malos:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.write(FRAME.pack(len(payload), kind) + payload)
+                await writer.drain()
+                await asyncio.wait_for(reader.read(), 5)  # el nodo cierra la conexión
+                writer.close()
+
+            # El nodo sigue atendiendo a los demás.
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            length, kind = FRAME.unpack(await reader.readexactly(FRAME.size))
+            hello = json.loads(await reader.readexactly(length))
+            writer.close()
+            return kind, hello
+        finally:
+            await nodo.close()
+
+    kind, hello = asyncio.run(escenario())
+    assert kind == MSG_HELLO
+    assert hello["altura"] == 0
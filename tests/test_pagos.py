@@ -0,0 +1,89 @@
+"""
+Pruebas de los pagos masivos (SistemaBlockchain.enviar_pagos): una sola transacción con una salida por
+pago válido, rechazo individual de los pagos inválidos y fallo de todos los pagos cuando la transacción
+no puede crearse.
+"""
+
+import pytest
+
+from blockchain.system import SistemaBlockchain
+
+
+@pytest.fixture
+def sistema():
+    sistema = SistemaBlockchain()
+    for nombre in ("ana", "beto", "caro", "dani"):
+        sistema.crear_usuario(nombre)
+    sistema.fund_usuario("ana", 20)
+    return sistema
+
+
+def saldo(sistema, nombre):
+    return sistema.obtener_saldo(sistema.usuarios[nombre].address)
+
+
+def test_una_transaccion_con_una_salida_por_pago(sistema):
+    resultados = sistema.enviar_pagos("ana", [("beto", 3), ("caro", 4), ("dani", 5)], fee=0.5)
+    txids = {r["txid"] for r in resultados}
+    assert len(txids) == 1 and None not in txids
+    assert [r["salida"] for r in resultados] == [0, 1, 2]
+    assert all(r["error"] is None for r in resultados)
+
+    tx = sistema.mempool.get(txids.pop())
+    for resultado in resultados:
+        salida = tx.outputs[resultado["salida"]]
+        assert salida == {"direccion": sistema.usuarios[resultado["receptor"]].address, "cantidad": resultado["monto"]}
+    assert tx.outputs[3] == {"direccion": sistema.usuarios["ana"].address, "cantidad": 7.5}  # cambio
+
+    assert sistema.minar_bloque() is not None
+    assert [saldo(sistema, n) for n in ("ana", "beto", "caro", "dani")] == [7.5, 3, 4, 5]
+
+
+def test_los_pagos_invalidos_se_rechazan_y_los_demas_se_incluyen(sistema):
+    resultados = sistema.enviar_pagos("ana", [("beto", 3), ("nadie", 1), ("caro", 0), ("dani", -2), ("caro", 4)],
+                                      fee=0.5)
+    assert [r["error"] for r in resultados] == [None, "receptor inexistente", "monto no positivo",
+                                                "monto no positivo", None]
+    assert [r["salida"] for r in resultados] == [0, None, None, None, 1]
+    assert resultados[0]["txid"] == resultados[4]["txid"] is not None
+    assert all(r["txid"] is None for r in resultados[1:4])
+
+    sistema.minar_bloque()
+    assert saldo(sistema, "beto") == 3
+    assert saldo(sistema, "caro") == 4
+
+
+def test_fondos_insuficientes_hacen_fallar_todos_los_pagos(sistema):
+    resultados = sistema.enviar_pagos("ana", [("beto", 10), ("caro", 10), ("nadie", 1)], fee=0.5)
+    assert [r["error"] for r in resultados] == ["fondos insuficientes", "fondos insuficientes",
+                                                "receptor inexistente"]
+    assert all(r["txid"] is None and r["salida"] is None for r in resultados)
+    assert len(sistema.mempool) == 0
+
+
+@pytest.mark.parametrize("remitente, pagos, error", [
+    ("nadie", [("beto", 1)], "remitente inexistente"),
+    ("ana", [("nadie", 1)], "receptor inexistente"),
+    ("ana", [], None),
+])
+def test_sin_pagos_validos_no_se_crea_la_transaccion(sistema, remitente, pagos, error):
+    resultados = sistema.enviar_pagos(remitente, pagos)
+    assert [r["error"] for r in resultados] == [error] * len(pagos)
+    assert len(sistema.mempool) == 0
+
+
+def test_transaccion_mayor_que_un_bloque_falla(sistema):
+    sistema.tamano_max_bloque = 200
+    resultados = sistema.enviar_pagos("ana", [("beto", 0.1)] * 20, fee=0.5)
+    assert {r["error"] for r in resultados} == {"transacción mayor que un bloque"}
+    assert len(sistema.mempool) == 0
+
+
+def test_los_utxos_pendientes_no_se_vuelven_a_gastar(sistema):
+    primera = sistema.enviar_pagos("ana", [("beto", 5)], fee=0.5)
+    # El cambio de la primera aún no está confirmado y su entrada ya está gastada en el mempool.
+    segunda = sistema.enviar_pagos("ana", [("caro", 5)], fee=0.5)
+    assert primera[0]["txid"] is not None
+    assert segunda[0]["error"] == "fondos insuficientes"
+    sistema.minar_bloque()
+    assert sistema.enviar_pagos("ana", [("caro", 5)], fee=0.5)[0]["txid"] is not None
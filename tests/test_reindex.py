@@ -0,0 +1,92 @@
+"""
+Pruebas del reindexado (blockchain.reindex): el conjunto UTXO reconstruido desde los bloques guardados
+coincide con el del sistema, y se informan las entradas que gastan salidas inexistentes y las firmas
+que no corresponden al dueño de la salida.
+"""
+
+import pytest
+
+from blockchain.encoding import transaction_id
+from blockchain.reindex import main, reindex
+from blockchain.storage import BlockStore
+from blockchain.system import RECOMPENSA_BLOQUE, SistemaBlockchain
+from blockchain.transaction import Transaction
+from blockchain.wallet import Wallet
+
+
+@pytest.fixture
+def carpeta(tmp_path):
+    sistema = SistemaBlockchain.desde_carpeta(str(tmp_path))
+    for nombre in ("ana", "beto", "caro"):
+        sistema.crear_usuario(nombre)
+    sistema.fund_usuario("ana", 50)
+    for receptor in ("beto", "caro", "beto"):
+        sistema.enviar_transaccion("ana", receptor, 3, fee=0.5)
+        sistema.minar_bloque()
+    sistema.fund_usuario("caro", 7)  # fondeo posterior al último bloque
+    sistema.guardar_estado(str(tmp_path))
+    sistema.cerrar_block_stores()
+    return tmp_path
+
+
+def anexar_bloque(carpeta, transacciones):
+    """
+    Agrega directamente al almacenamiento un bloque minado sin validar sus transacciones.
+    """
+    sistema = SistemaBlockchain.desde_carpeta(str(carpeta))
+    recompensa = {"direccion": "MINERO", "tipo": "recompensa", "altura": len(sistema.blockchain.chain),
+                  "cantidad": RECOMPENSA_BLOQUE + sum(tx.fee for tx in transacciones)}
+    recompensa["txid"] = transaction_id(recompensa)
+    bloque = sistema.blockchain.new_block([recompensa] + [tx.to_dict() for tx in transacciones])
+    assert sistema.blockchain.mine(bloque, workers=1)
+    sistema.cerrar_block_stores()
+    store = BlockStore(str(carpeta / "bloques"))
+    store.append(bloque)
+    store.close()
+
+
+def test_reindexado_coincide_con_el_conjunto_en_uso(carpeta):
+    resultado = reindex(str(carpeta), verify_signatures=True)
+    sistema = SistemaBlockchain.desde_carpeta(str(carpeta))
+    assert resultado.blocks == 4
+    assert resultado.consistent
+    assert resultado.utxo_manager.digest() == sistema.utxo_manager.digest()
+    sistema.cerrar_block_stores()
+
+
+def test_reindexado_informa_firmas_de_una_clave_ajena(carpeta):
+    sistema = SistemaBlockchain.desde_carpeta(str(carpeta))
+    utxo_id = next(iter(sistema.utxo_manager.get_utxos_for_address(sistema.usuarios["beto"].address)))
+    sistema.cerrar_block_stores()
+    txid, index = utxo_id.rsplit(":", 1)
+    ladron = Wallet()
+    robo = Transaction([{"txid": txid, "index": int(index)}], [{"direccion": ladron.address, "cantidad": 3}], 0)
+    robo.sign_inputs(ladron.private_key)
+    anexar_bloque(carpeta, [robo])
+
+    assert reindex(str(carpeta)).consistent  # sin verificar firmas no se detecta
+    resultado = reindex(str(carpeta), verify_signatures=True)
+    assert resultado.invalid_signatures == [(4, robo.txid)]
+    assert not resultado.consistent
+
+
+def test_reindexado_informa_entradas_inexistentes(carpeta):
+    wallet = Wallet()
+    tx = Transaction([{"txid": "cd" * 32, "index": 0}], [{"direccion": wallet.address, "cantidad": 1}], 0)
+    tx.sign_inputs(wallet.private_key)
+    anexar_bloque(carpeta, [tx])
+    resultado = reindex(str(carpeta), verify_signatures=True)
+    assert resultado.missing_inputs == [(4, "cd" * 32 + ":0")]
+    assert not resultado.consistent
+
+
+def test_main_repara_un_conjunto_que_no_coincide(carpeta, capsys):
+    sistema = SistemaBlockchain.desde_carpeta(str(carpeta))
+    sistema.utxo_manager.add_utxo("ef" * 32, 0, "intruso", 1000)
+    sistema.guardar_estado(str(carpeta))
+    sistema.cerrar_block_stores()
+
+    assert main([str(carpeta), "--workers", "1"]) == 1
+    assert main([str(carpeta), "--workers", "1", "--reparar"]) == 0
+    assert main([str(carpeta), "--workers", "1"]) == 0
+    assert "coincide con la cadena" in capsys.readouterr().out
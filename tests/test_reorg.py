@@ -0,0 +1,135 @@
+"""
+Pruebas de la reorganización de la cadena con datos para deshacer por bloque: desconectar un bloque
+devuelve el conjunto UTXO exactamente al estado anterior, una rama con más trabajo reemplaza a la
+actual y una rama inválida deja la cadena original. Los datos para deshacer de los bloques que ya no
+están en memoria se leen de undo.dat.
+"""
+
+import pytest
+
+from blockchain import system
+from blockchain.block import Block
+from blockchain.system import SistemaBlockchain
+
+
+def crear_sistema(bloques, carpeta=None):
+    sistema = SistemaBlockchain.desde_carpeta(str(carpeta)) if carpeta else SistemaBlockchain()
+    sistema.crear_usuario("ana")
+    sistema.crear_usuario("beto")
+    sistema.fund_usuario("ana", 100)
+    estados = [sistema.utxo_manager.digest()]
+    for _ in range(bloques):
+        assert sistema.enviar_transaccion("ana", "beto", 1, fee=0.5) is not None
+        assert sistema.minar_bloque() is not None
+        estados.append(sistema.utxo_manager.digest())
+    return sistema, estados
+
+
+def copia(bloques):
+    return [Block.from_bytes(b.to_bytes()) for b in bloques]
+
+
+def ramas(sistema, profundidad):
+    """
+    Deja en la cadena la rama original y devuelve (original, competidora con un bloque más, digest
+    del conjunto UTXO con la competidora).
+    """
+    original = copia(sistema.blockchain.chain[-profundidad:])
+    for _ in range(profundidad):
+        sistema.desconectar_bloque()
+    for _ in range(profundidad + 1):
+        sistema.enviar_transaccion("ana", "beto", 2, fee=0.5)
+        sistema.minar_bloque()
+    competidora = copia(sistema.blockchain.chain[-(profundidad + 1):])
+    digest = sistema.utxo_manager.digest()
+    for _ in range(profundidad + 1):
+        sistema.desconectar_bloque()
+    for bloque in original:
+        sistema.conectar_bloque(bloque)
+    return original, competidora, digest
+
+
+def test_desconectar_restaura_el_conjunto_utxo_y_el_mempool():
+    sistema, estados = crear_sistema(4)
+    ultimo = sistema.blockchain.get_last_block()
+    sistema.desconectar_bloque()
+    assert sistema.utxo_manager.digest() == estados[3]
+    assert ultimo.transactions[1]["txid"] in sistema.mempool
+    sistema.desconectar_bloque()
+    sistema.desconectar_bloque()
+    assert sistema.utxo_manager.digest() == estados[1]
+
+
+def test_no_se_desconecta_el_genesis():
+    sistema, _ = crear_sistema(0)
+    with pytest.raises(ValueError):
+        sistema.desconectar_bloque()
+
+
+def test_reorganiza_a_la_rama_con_mas_trabajo():
+    sistema, _ = crear_sistema(5)
+    _, competidora, digest = ramas(sistema, 2)
+    assert sistema.reorganizar(competidora)
+    assert sistema.blockchain.get_last_block().hash == competidora[-1].hash
+    assert sistema.utxo_manager.digest() == digest
+    # Las transacciones confirmadas en la nueva rama no quedan en el mempool.
+    assert not any(tx["txid"] in sistema.mempool for b in competidora for tx in b.transactions)
+
+
+def test_rama_con_menos_trabajo_no_cambia_la_cadena():
+    sistema, estados = crear_sistema(5)
+    _, competidora, _ = ramas(sistema, 2)
+    assert not sistema.reorganizar(competidora[:2])
+    assert sistema.utxo_manager.digest() == estados[-1]
+
+
+def test_rama_que_no_enlaza_se_rechaza():
+    sistema, _ = crear_sistema(2)
+    otro, _ = crear_sistema(3)
+    with pytest.raises(ValueError):
+        sistema.reorganizar(copia(otro.blockchain.chain[1:]))
+
+
+def test_rama_invalida_restaura_la_cadena_original():
+    sistema, estados = crear_sistema(5)
+    _, competidora, _ = ramas(sistema, 2)
+    punta = sistema.blockchain.get_last_block().hash
+    competidora[-1].transactions[0]["cantidad"] += 1  # recompensa inflada
+    competidora[-1].transactions[0]["txid"] = None
+    with pytest.raises(ValueError):
+        sistema.reorganizar(competidora)
+    assert sistema.blockchain.get_last_block().hash == punta
+    assert sistema.utxo_manager.digest() == estados[-1]
+
+
+def test_datos_para_deshacer_antiguos_se_leen_de_undo_dat(tmp_path, monkeypatch):
+    monkeypatch.setattr(system, "DESHACER_EN_MEMORIA", 3)
+    sistema, estados = crear_sistema(8, tmp_path)
+    sistema.guardar_estado(str(tmp_path))
+    assert len(sistema._undo) == 3
+    for _ in range(7):
+        sistema.desconectar_bloque()
+    assert sistema.utxo_manager.digest() == estados[1]
+    sistema.cerrar_block_stores()
+
+
+def test_datos_para_deshacer_sin_guardar_se_conservan(monkeypatch):
+    monkeypatch.setattr(system, "DESHACER_EN_MEMORIA", 3)
+    sistema, estados = crear_sistema(8)
+    assert len(sistema._undo) == 8
+    for _ in range(8):
+        sistema.desconectar_bloque()
+    assert sistema.utxo_manager.digest() == estados[0]
+
+
+def test_desconectar_despues_de_recargar(tmp_path):
+    sistema, estados = crear_sistema(4, tmp_path)
+    sistema.guardar_estado(str(tmp_path))
+    sistema.cerrar_block_stores()
+
+    recargado = SistemaBlockchain.desde_carpeta(str(tmp_path))
+    assert recargado.utxo_manager.digest() == estados[4]
+    for _ in range(3):
+        recargado.desconectar_bloque()
+    assert recargado.utxo_manager.digest() == estados[1]
+    recargado.cerrar_block_stores()
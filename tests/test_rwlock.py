@@ -0,0 +1,127 @@
+"""
+Pruebas del candado de lectores y escritor (utils.rwlock): lecturas concurrentes, exclusión de la
+escritura, reentrada del escritor, error al pasar de lectura a escritura y preferencia y orden de
+llegada de los escritores.
+"""
+
+import threading
+import time
+
+import pytest
+
+from utils.rwlock import RWLock
+
+
+def esperar(condicion, limite=5):
+    """
+    Espera hasta que condicion() sea verdadera, o falla pasado el límite en segundos.
+    """
+    fin = time.monotonic() + limite
+    while not condicion():
+        assert time.monotonic() < fin, "la condición no se cumplió a tiempo"
+        time.sleep(0.005)
+
+
+def iniciar(funcion):
+    hilo = threading.Thread(target=funcion, daemon=True)
+    hilo.start()
+    return hilo
+
+
+def test_varios_lectores_a_la_vez():
+    lock = RWLock()
+    barrera = threading.Barrier(3, timeout=5)
+
+    def leer():
+        with lock.read():
+            barrera.wait()  # solo se pasa si los tres hilos leen a la vez
+
+    hilos = [iniciar(leer) for _ in range(3)]
+    for hilo in hilos:
+        hilo.join(5)
+    assert not barrera.broken
+
+
+def test_la_escritura_excluye_a_los_lectores():
+    lock = RWLock()
+    leyo = threading.Event()
+
+    def leer():
+        with lock.read():
+            leyo.set()
+
+    with lock.write():
+        hilo = iniciar(leer)
+        assert not leyo.wait(0.1)
+    assert leyo.wait(5)
+    hilo.join(5)
+
+
+def test_el_escritor_puede_volver_a_escribir_y_leer():
+    lock = RWLock()
+    with lock.write():
+        with lock.write():
+            with lock.read():
+                pass
+        assert lock._writer == threading.get_ident()  # sigue escribiendo hasta la última liberación
+    escribio = threading.Event()
+
+    def escribir():
+        with lock.write():
+            escribio.set()
+
+    iniciar(escribir)
+    assert escribio.wait(5)
+
+
+def test_pasar_de_lectura_a_escritura_lanza_error():
+    lock = RWLock()
+    with lock.read():
+        with lock.read():  # la lectura sí es reentrante
+            with pytest.raises(RuntimeError):
+                lock.acquire_write()
+    with lock.write():  # el error no deja el candado tomado
+        pass
+
+
+def test_un_escritor_en_espera_tiene_preferencia_sobre_lectores_nuevos():
+    lock = RWLock()
+    orden = []
+
+    def escribir():
+        with lock.write():
+            orden.append("escritor")
+
+    def leer():
+        with lock.read():
+            orden.append("lector")
+
+    with lock.read():
+        escritor = iniciar(escribir)
+        esperar(lambda: lock._writers_waiting == 1)
+        lector = iniciar(leer)
+        time.sleep(0.05)
+        assert orden == []  # el lector nuevo espera al escritor, que espera a esta lectura
+    escritor.join(5)
+    lector.join(5)
+    assert orden == ["escritor", "lector"]
+
+
+def test_los_escritores_entran_en_orden_de_llegada():
+    lock = RWLock()
+    orden = []
+
+    def escritor(nombre):
+        def escribir():
+            with lock.write():
+                orden.append(nombre)
+        return escribir
+
+    with lock.write():
+        hilos = []
+        for i, nombre in enumerate("abcd", start=1):
+            hilos.append(iniciar(escritor(nombre)))
+            esperar(lambda: lock._writers_waiting == i)
+    for hilo in hilos:
+        hilo.join(5)
+    assert orden == list("abcd")
@@ -0,0 +1,151 @@
+"""
+Pruebas de los backends del conjunto UTXO (blockchain.utxo_store y blockchain.utxo_columnar): tras la
+misma secuencia de altas y bajas, cada backend responde igual que MemoryUTXOBackend a todas las consultas
+de UTXOManager; el backend SQLite descarta los lotes fallidos y conserva el conjunto al cerrarse y
+reabrirse, y el columnar suma las cantidades sin error de redondeo. Las pruebas del columnar se omiten
+si NumPy no está instalado.
+"""
+
+import random
+
+import pytest
+
+from blockchain.transaction import UTXOManager
+from blockchain.utxo_columnar import ColumnarUTXOBackend
+from blockchain.utxo_store import MemoryUTXOBackend, SQLiteUTXOBackend
+
+DIRECCIONES = ["ana", "beto", "caro", "dani", "eva"]
+
+
+def crear_backend(nombre, tmp_path):
+    if nombre == "sqlite":
+        return SQLiteUTXOBackend(str(tmp_path / "utxos.db"), cache_size=16)
+    if nombre == "columnar":
+        pytest.importorskip("numpy")
+        return ColumnarUTXOBackend(capacity=4)  # las columnas crecen durante la prueba
+    return MemoryUTXOBackend()
+
+
+@pytest.fixture(params=["sqlite", "columnar"])
+def manager(request, tmp_path):
+    manager = UTXOManager(crear_backend(request.param, tmp_path))
+    yield manager
+    manager.close()
+
+
+def aplicar_operaciones(manager, semilla=7, pasos=400):
+    """
+    Aplica una secuencia pseudoaleatoria de altas (con cantidades de hasta 8 decimales) y bajas,
+    incluidas bajas de outpoints que no existen.
+    """
+    rng = random.Random(semilla)
+    vivos = []
+    for paso in range(pasos):
+        if vivos and rng.random() < 0.4:
+            outpoint = vivos.pop(rng.randrange(len(vivos)))
+            txid, index = outpoint.rsplit(":", 1)
+            manager.remove_utxo(txid, int(index))
+        elif rng.random() < 0.05:
+            manager.remove_utxo("00" * 32, paso)
+        else:
+            txid = f"{paso:064x}"
+            manager.add_utxo(txid, 0, rng.choice(DIRECCIONES), round(rng.uniform(0.00000001, 50), 8))
+            vivos.append(f"{txid}:0")
+
+
+def assert_mismo_conjunto(manager, referencia):
+    assert len(manager) == len(referencia)
+    assert manager.digest() == referencia.digest()
+    for outpoint, utxo in referencia.backend.items():
+        assert manager.get_utxo(outpoint) == utxo
+    assert manager.get_utxo("ff" * 32 + ":0") is None
+    for direccion in DIRECCIONES + ["nadie"]:
+        assert manager.get_utxos_for_address(direccion) == referencia.get_utxos_for_address(direccion)
+        assert manager.get_balance(direccion) == pytest.approx(referencia.get_balance(direccion))
+        assert list(manager.get_sorted_utxos(direccion)) == list(referencia.get_sorted_utxos(direccion))
+    assert manager.get_balances() == pytest.approx(referencia.get_balances())
+    assert manager.get_balances(["ana", "nadie"]) == pytest.approx(referencia.get_balances(["ana", "nadie"]))
+    assert manager.total_supply() == pytest.approx(referencia.total_supply())
+    assert [d for d, _ in manager.richest(3)] == [d for d, _ in referencia.richest(3)]
+
+
+def test_responde_igual_que_el_backend_en_memoria(manager):
+    referencia = UTXOManager()
+    aplicar_operaciones(referencia)
+    aplicar_operaciones(manager)
+    assert_mismo_conjunto(manager, referencia)
+
+
+def test_cargar_un_conjunto_reemplaza_el_anterior(manager):
+    referencia = UTXOManager()
+    aplicar_operaciones(referencia)
+    manager.add_utxo("aa" * 32, 0, "intruso", 5)
+    manager.load_utxos({outpoint: dict(utxo) for outpoint, utxo in referencia.backend.items()})
+    assert_mismo_conjunto(manager, referencia)
+
+
+def test_conectar_transacciones_devuelve_gastados_y_faltantes(manager):
+    manager.add_utxo("aa" * 32, 0, "ana", 10)
+    transacciones = [
+        {"txid": "bb" * 32, "inputs": [{"txid": "aa" * 32, "index": 0}, {"txid": "cc" * 32, "index": 1}],
+         "outputs": [{"direccion": "beto", "cantidad": 4}, {"direccion": "ana", "cantidad": 5.5}]},
+        {"txid": "dd" * 32, "tipo": "recompensa", "cantidad": 3},
+    ]
+    gastados, faltantes = manager.connect_transactions(transacciones)
+    assert gastados == [("aa" * 32 + ":0", {"direccion": "ana", "cantidad": 10})]
+    assert faltantes == ["cc" * 32 + ":1"]
+    assert manager.get_balance("ana") == 5.5
+    assert manager.get_balance("beto") == 4
+
+
+def test_sqlite_descarta_un_lote_fallido(tmp_path):
+    manager = UTXOManager(SQLiteUTXOBackend(str(tmp_path / "utxos.db"), cache_size=4))
+    manager.add_utxo("aa" * 32, 0, "ana", 10)
+    digest = manager.digest()
+    with pytest.raises(RuntimeError):
+        with manager.batch():
+            manager.remove_utxo("aa" * 32, 0)
+            for i in range(10):  # más cambios que la caché: parte del lote ya está en la base
+                manager.add_utxo("bb" * 32, i, "beto", 1)
+            raise RuntimeError("bloque inválido")
+    assert manager.digest() == digest
+    assert manager.get_balance("beto") == 0
+    manager.close()
+
+
+def test_sqlite_conserva_el_conjunto_al_reabrir(tmp_path):
+    ruta = str(tmp_path / "utxos.db")
+    manager = UTXOManager(SQLiteUTXOBackend(ruta, cache_size=16))
+    aplicar_operaciones(manager)
+    digest = manager.digest()
+    manager.close()
+
+    reabierto = UTXOManager(SQLiteUTXOBackend(ruta))
+    assert reabierto.digest() == digest
+    referencia = UTXOManager()
+    aplicar_operaciones(referencia)
+    assert_mismo_conjunto(reabierto, referencia)
+    reabierto.close()
+
+
+def test_columnar_suma_sin_error_de_redondeo():
+    pytest.importorskip("numpy")
+    manager = UTXOManager(ColumnarUTXOBackend())
+    for i in range(10):
+        manager.add_utxo(f"{i:064x}", 0, "ana", 0.1)
+    manager.add_utxo("aa" * 32, 0, "beto", 0.2)
+    assert manager.get_balance("ana") == 1.0
+    assert manager.get_balances(["ana", "beto", "nadie"]) == {"ana": 1.0, "beto": 0.2, "nadie": 0}
+    assert manager.total_supply() == 1.2
+    manager.remove_utxo("aa" * 32, 0)
+    assert manager.get_balances() == {"ana": 1.0}  # las direcciones sin saldo no aparecen
+
+
+def test_columnar_richest_ordena_por_saldo():
+    pytest.importorskip("numpy")
+    manager = UTXOManager(ColumnarUTXOBackend())
+    for i, (direccion, cantidad) in enumerate([("ana", 5), ("beto", 7), ("caro", 1), ("ana", 4), ("dani", 0.5)]):
+        manager.add_utxo(f"{i:064x}", 0, direccion, cantidad)
+    assert manager.richest(2) == [("ana", 9.0), ("beto", 7.0)]
+    assert [d for d, _ in manager.richest(10)] == ["ana", "beto", "caro", "dani"]
+    assert manager.richest(0) == []
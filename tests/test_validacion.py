@@ -0,0 +1,153 @@
+"""
+Pruebas de las reglas de consenso de SistemaBlockchain: las transacciones que se aceptan en el
+mempool, las que se minan y los bloques recibidos de otros nodos pasan por las mismas reglas
+(_validar_transaccion), y un bloque inválido no modifica la cadena ni el conjunto UTXO.
+"""
+
+import pytest
+
+from blockchain.encoding import transaction_id
+from blockchain.system import RECOMPENSA_BLOQUE, SistemaBlockchain
+from blockchain.transaction import Transaction
+from blockchain.wallet import Wallet
+
+
+@pytest.fixture
+def sistema():
+    sistema = SistemaBlockchain()
+    for nombre in ("ana", "beto"):
+        sistema.crear_usuario(nombre)
+    sistema.fund_usuario("ana", 10)
+    return sistema
+
+
+def gasto(sistema, salidas, fee=0.5, entradas=(("fund_ana", 0),), clave=None):
+    tx = Transaction([{"txid": txid, "index": index} for txid, index in entradas],
+                     [{"direccion": sistema.usuarios[d].address if d in sistema.usuarios else d, "cantidad": c}
+                      for d, c in salidas], fee)
+    tx.sign_inputs(clave or sistema.usuarios["ana"].private_key)
+    return tx
+
+
+def bloque_minado(sistema, transacciones, cantidad=None, altura=None):
+    altura = len(sistema.blockchain.chain) if altura is None else altura
+    recompensa = {"direccion": "MINERO", "tipo": "recompensa", "altura": altura,
+                  "cantidad": RECOMPENSA_BLOQUE + sum(tx["fee"] for tx in transacciones) if cantidad is None
+                  else cantidad}
+    recompensa["txid"] = transaction_id(recompensa)
+    bloque = sistema.blockchain.new_block([recompensa] + transacciones)
+    assert sistema.blockchain.mine(bloque, workers=1)
+    return bloque
+
+
+def test_transaccion_valida_se_acepta(sistema):
+    tx = gasto(sistema, [("beto", 4), ("ana", 5.5)])
+    assert sistema.aceptar_transaccion(tx)
+    assert tx.txid in sistema.mempool
+
+
+@pytest.mark.parametrize("salidas, fee", [
+    ([("beto", 1000)], 0),  # crea monedas
+    ([("beto", 9), ("ana", 1)], 0.5),  # las salidas más la comisión superan las entradas
+    ([("beto", 0)], 0.5),
+    ([("beto", -1), ("ana", 5)], 0.5),
+    ([("beto", float("nan"))], 0.5),
+    ([("beto", 1)], -0.5),
+])
+def test_transaccion_que_no_conserva_el_valor_se_rechaza(sistema, salidas, fee):
+    tx = gasto(sistema, salidas, fee)
+    assert not sistema.aceptar_transaccion(tx)
+    assert tx.txid not in sistema.mempool
+    assert sistema.minar_bloque([tx]) is None
+    assert len(sistema.blockchain.chain) == 1
+
+
+def test_entrada_repetida_en_la_transaccion_se_rechaza(sistema):
+    tx = gasto(sistema, [("beto", 15)], entradas=[("fund_ana", 0), ("fund_ana", 0)])
+    assert not sistema.aceptar_transaccion(tx)
+
+
+def test_entrada_inexistente_se_rechaza(sistema):
+    tx = gasto(sistema, [("beto", 1)], entradas=[("ab" * 32, 0)])
+    assert not sistema.aceptar_transaccion(tx)
+
+
+def test_transaccion_sin_entradas_se_rechaza(sistema):
+    assert not sistema.aceptar_transaccion(Transaction([], [{"direccion": "x", "cantidad": 1}], 0))
+
+
+def test_txid_que_no_corresponde_al_contenido_se_rechaza(sistema):
+    tx = gasto(sistema, [("beto", 4)])
+    tx.outputs[0]["cantidad"] = 9  # se altera después de calcular el txid
+    assert not sistema.aceptar_transaccion(tx)
+
+
+def test_clave_publica_ajena_se_rechaza(sistema):
+    ladron = Wallet()
+    tx = gasto(sistema, [(ladron.address, 9)], clave=ladron.private_key)
+    assert not sistema.aceptar_transaccion(tx)
+
+
+def test_firma_de_otro_mensaje_se_rechaza(sistema):
+    tx = gasto(sistema, [("beto", 4)])
+    copia = Transaction([dict(tx.inputs[0])], [{"direccion": Wallet().address, "cantidad": 9}], 0.5)
+    assert not sistema.aceptar_transaccion(copia)
+
+
+def test_nodo_sin_wallets_verifica_con_la_clave_de_la_entrada(sistema):
+    nodo = SistemaBlockchain()
+    nodo.utxo_manager.add_utxo("fund_ana", 0, sistema.usuarios["ana"].address, 10)
+    tx = gasto(sistema, [("beto", 4)])
+    assert nodo.aceptar_transaccion(Transaction.from_bytes(tx.to_bytes()))
+    assert nodo.minar_bloque() is not None
+
+
+def test_minar_descarta_la_segunda_de_dos_transacciones_en_conflicto(sistema):
+    primera = gasto(sistema, [("beto", 4)])
+    segunda = gasto(sistema, [("beto", 5)])
+    bloque = sistema.minar_bloque([primera, segunda])
+    assert [tx["txid"] for tx in bloque.transactions[1:]] == [primera.txid]
+
+
+def test_bloque_valido_se_conecta(sistema):
+    tx = gasto(sistema, [("beto", 4), ("ana", 5.5)])
+    # Una transacción puede gastar una salida creada antes en el mismo bloque.
+    beto = Transaction([{"txid": tx.txid, "index": 0}], [{"direccion": "MINERO", "cantidad": 3}], 1)
+    beto.sign_inputs(sistema.usuarios["beto"].private_key)
+    bloque = bloque_minado(sistema, [tx.to_dict(), beto.to_dict()])
+    sistema.conectar_bloque(bloque)
+    assert sistema.blockchain.get_last_block().hash == bloque.hash
+    assert sistema.obtener_saldo(sistema.usuarios["ana"].address) == 5.5
+    assert sistema.obtener_saldo(sistema.usuarios["beto"].address) == 0
+
+
+@pytest.mark.parametrize("caso, motivo", [
+    ("crea monedas", "gasta más de lo que tienen sus entradas"),
+    ("gasto doble", "gasta dos veces la salida"),
+    ("recompensa inflada", "no es 3 más las comisiones"),
+    ("recompensa de otra altura", "la recompensa es de la altura"),
+    ("sin recompensa", "no empieza con la recompensa"),
+    ("clave ajena", "sin la clave pública de su dueño"),
+])
+def test_bloque_invalido_se_rechaza_sin_cambiar_el_estado(sistema, caso, motivo):
+    valida = gasto(sistema, [("beto", 4), ("ana", 5.5)]).to_dict()
+    if caso == "crea monedas":
+        bloque = bloque_minado(sistema, [gasto(sistema, [("beto", 1000)], 0).to_dict()])
+    elif caso == "gasto doble":
+        bloque = bloque_minado(sistema, [valida, gasto(sistema, [("beto", 9)]).to_dict()])
+    elif caso == "recompensa inflada":
+        bloque = bloque_minado(sistema, [valida], cantidad=50)
+    elif caso == "recompensa de otra altura":
+        bloque = bloque_minado(sistema, [valida], altura=7)
+    elif caso == "sin recompensa":
+        bloque = sistema.blockchain.new_block([valida])
+        assert sistema.blockchain.mine(bloque, workers=1)
+    else:
+        ladron = Wallet()
+        bloque = bloque_minado(sistema, [gasto(sistema, [(ladron.address, 9)], clave=ladron.private_key).to_dict()])
+
+    digest = sistema.utxo_manager.digest()
+    with pytest.raises(ValueError, match=motivo):
+        sistema.conectar_bloque(bloque)
+    assert len(sistema.blockchain.chain) == 1
+    assert sistema.utxo_manager.digest() == digest
@@ -0,0 +1,46 @@
+"""
+archivos.py
+
+Escritura atómica de archivos: el contenido se escribe en un temporal del mismo directorio, se
+sincroniza con el disco y se renombra sobre el destino. Un lector (u otro proceso tras una caída) ve
+el archivo anterior completo o el nuevo completo, nunca uno a medio escribir, y dos escrituras
+simultáneas no mezclan su contenido: gana la última en renombrar.
+"""
+
+import json
+import os
+import tempfile
+
+
+def escribir_atomico(path, data):
+    """
+    Reemplaza el contenido de un archivo de forma atómica.
+
+    Args:
+        path (str): Ruta del archivo.
+        data (bytes): Contenido completo.
+    """
+    directorio = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directorio)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def guardar_json(path, datos, indent=4):
+    """
+    Guarda datos en un archivo JSON de forma atómica.
+
+    Args:
+        path (str): Ruta del archivo.
+        datos: Objeto serializable en JSON.
+        indent (int | None): Sangría del JSON.
+    """
+    escribir_atomico(path, json.dumps(datos, indent=indent).encode())
@@ -1,22 +1,236 @@
+"""
+logger.py
+
+Registro de eventos del sistema sin E/S en el hilo que llama.
+
+Las funciones log_* solo encolan el registro: un hilo en segundo plano (QueueListener) le da formato y
+lo escribe en logs/ejecucion.log y en la consola. El mensaje se formatea de forma diferida, como en
+logging: log_info("Bloque minado: #%d", altura) no construye el texto si el nivel de la categoría lo
+descarta, y cuando se escribe, el texto se arma en el hilo de fondo.
+
+Cada evento pertenece a una categoría ("transacciones", "mineria", "red", ...) con su propio nivel,
+y las categorías de alto volumen tienen un límite de mensajes por segundo para cada plantilla de
+mensaje; los que exceden el límite se descartan y se informa cuántos fueron en el siguiente mensaje
+que se escribe.
+
+La configuración se aplica en el primer registro (no al importar el módulo) o al llamar a configurar().
+También se puede ajustar con variables de entorno:
+
+    BLOCKCHAIN_LOG_NIVEL=INFO                   nivel general
+    BLOCKCHAIN_LOG_NIVELES=mineria=DEBUG,red=WARNING
+    BLOCKCHAIN_LOG_JSON=1                       una línea JSON compacta por evento
+"""
+
+import atexit
+import json
 import logging
-from pathlib import Path
+import logging.handlers
+import os
+import queue
+import threading
+import time
+
+RAIZ = "blockchain"
+ARCHIVO = os.path.join("logs", "ejecucion.log")
+FORMATO = "%(asctime)s - %(levelname)s - %(message)s"
+LIMITES = {"transacciones": (100, 1.0), "red": (100, 1.0)}  # categoría -> (mensajes, segundos)
+
+_logger = logging.getLogger(RAIZ)
+_categorias = {}
+_listener = None
+_config_lock = threading.Lock()
+
+
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que encola el registro sin formatearlo; el formato se aplica en el hilo de fondo.
+    Por eso los argumentos deben ser valores que no cambien después de registrarlos.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Limita los mensajes por categoría y plantilla a un máximo por ventana de tiempo.
+
+    Atributos:
+        limites (dict): Categoría -> (mensajes por ventana, duración de la ventana en segundos).
+    """
+
+    def __init__(self, limites):
+        super().__init__()
+        self.limites = dict(limites)
+        self._ventanas = {}  # (logger, plantilla) -> [inicio, mensajes, suprimidos]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        limite = self.limites.get(record.name.rpartition(".")[2])
+        if limite is None:
+            return True
+        maximo, periodo = limite
+        clave = (record.name, record.msg)
+        ahora = time.monotonic()
+        with self._lock:
+            ventana = self._ventanas.get(clave)
+            if ventana is None or ahora - ventana[0] >= periodo:
+                if ventana is not None and ventana[2]:
+                    record.suprimidos = ventana[2]
+                self._ventanas[clave] = [ahora, 1, 0]
+                return True
+            if ventana[1] < maximo:
+                ventana[1] += 1
+                return True
+            ventana[2] += 1
+            return False
+
+
+class TextFormatter(logging.Formatter):
+    """
+    Formato de texto de siempre, con el número de mensajes suprimidos por el límite si los hubo.
+    """
+
+    def format(self, record):
+        texto = super().format(record)
+        suprimidos = getattr(record, "suprimidos", 0)
+        if suprimidos:
+            texto += f" ({suprimidos} mensajes similares suprimidos)"
+        return texto
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Una línea JSON compacta por evento: ts (epoch), nivel, categoria, mensaje y, si aplica, suprimidos
+    y excepcion.
+    """
+
+    def format(self, record):
+        evento = {
+            "ts": round(record.created, 6),
+            "nivel": record.levelname,
+            "categoria": record.name.rpartition(".")[2] if record.name != RAIZ else "general",
+            "mensaje": record.getMessage(),
+        }
+        suprimidos = getattr(record, "suprimidos", 0)
+        if suprimidos:
+            evento["suprimidos"] = suprimidos
+        if record.exc_info:
+            evento["excepcion"] = self.formatException(record.exc_info)
+        return json.dumps(evento, ensure_ascii=False, separators=(",", ":"))
+
+
+def _niveles_de_entorno():
+    niveles = {}
+    for parte in os.environ.get("BLOCKCHAIN_LOG_NIVELES", "").split(","):
+        if "=" in parte:
+            categoria, nivel = parte.split("=", 1)
+            niveles[categoria.strip()] = nivel.strip().upper()
+    return niveles
+
+
+def configurar(nivel=None, niveles=None, formato_json=None, archivo=ARCHIVO, consola=True, limites=None):
+    """
+    Configura (o reconfigura) el registro. Los eventos ya encolados se escriben antes del cambio.
+
+    Args:
+        nivel (str | int, opcional): Nivel general. Por defecto, BLOCKCHAIN_LOG_NIVEL o INFO.
+        niveles (dict, opcional): Categoría -> nivel. Se combina con BLOCKCHAIN_LOG_NIVELES.
+        formato_json (bool, opcional): Si es True, escribe líneas JSON. Por defecto, BLOCKCHAIN_LOG_JSON.
+        archivo (str | None): Archivo de registro. None no escribe a disco.
+        consola (bool): Si es True, también escribe en la consola (stderr).
+        limites (dict, opcional): Categoría -> (mensajes, segundos). Por defecto, LIMITES.
+    """
+    with _config_lock:
+        _configurar(nivel, niveles, formato_json, archivo, consola, limites)
+
+
+def _configurar(nivel=None, niveles=None, formato_json=None, archivo=ARCHIVO, consola=True, limites=None):
+    """
+    Cuerpo de configurar; se llama con _config_lock tomado.
+    """
+    global _listener
+    detener()
+    if nivel is None:
+        nivel = os.environ.get("BLOCKCHAIN_LOG_NIVEL", "INFO").upper()
+    if formato_json is None:
+        formato_json = os.environ.get("BLOCKCHAIN_LOG_JSON", "") not in ("", "0")
+
+    formatter = JSONFormatter() if formato_json else TextFormatter(FORMATO)
+    handlers = []
+    if archivo:
+        os.makedirs(os.path.dirname(archivo) or ".", exist_ok=True)
+        handlers.append(logging.FileHandler(archivo, encoding="utf-8"))
+    if consola:
+        handlers.append(logging.StreamHandler())
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    cola = queue.SimpleQueue()
+    queue_handler = _LazyQueueHandler(cola)
+    queue_handler.addFilter(RateLimitFilter(LIMITES if limites is None else limites))
+    for handler in list(_logger.handlers):
+        _logger.removeHandler(handler)
+    _logger.addHandler(queue_handler)
+    _logger.propagate = False
+    _logger.setLevel(nivel)
+
+    for logger in _categorias.values():
+        logger.setLevel(logging.NOTSET)
+    for categoria, nivel_categoria in {**_niveles_de_entorno(), **(niveles or {})}.items():
+        _categoria(categoria).setLevel(nivel_categoria)
+
+    _listener = logging.handlers.QueueListener(cola, *handlers)
+    _listener.start()
+
+
+def detener():
+    """
+    Escribe los eventos pendientes y detiene el hilo de fondo. Se llama automáticamente al salir.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(detener)
+
+
+def _categoria(categoria):
+    logger = _categorias.get(categoria)
+    if logger is None:
+        logger = _categorias[categoria] = _logger if categoria == "general" else _logger.getChild(categoria)
+    return logger
+
+
+def _log(nivel, mensaje, args, categoria):
+    if _listener is None:
+        # Se vuelve a comprobar con el candado tomado: si varios hilos registran a la vez su primer
+        # evento, solo uno configura el registro.
+        with _config_lock:
+            if _listener is None:
+                _configurar()
+    logger = _categoria(categoria)
+    if logger.isEnabledFor(nivel):
+        # Se arma el registro directamente: Logger.log buscaría el archivo y la línea de origen
+        # recorriendo la pila, que es la parte más cara de registrar y no se usa en el formato.
+        logger.handle(logger.makeRecord(logger.name, nivel, "", 0, mensaje, args, None))
+
+
+def log_debug(mensaje, *args, categoria="general"):
+    _log(logging.DEBUG, mensaje, args, categoria)
+
 
-Path("logs").mkdir(parents=True, exist_ok=True)
+def log_info(mensaje, *args, categoria="general"):
+    _log(logging.INFO, mensaje, args, categoria)
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("logs/ejecucion.log"),
-        logging.StreamHandler()
-    ]
-)
 
-def log_info(mensaje):
-    logging.info(mensaje)
+def log_warning(mensaje, *args, categoria="general"):
+    _log(logging.WARNING, mensaje, args, categoria)
 
-def log_error(mensaje):
-    logging.error(mensaje)
 
-def log_warning(mensaje):
-    logging.warning(mensaje)
+def log_error(mensaje, *args, categoria="general"):
+    _log(logging.ERROR, mensaje, args, categoria)
@@ -0,0 +1,389 @@
+"""
+metrics.py
+
+Métricas de ejecución: contadores, gauges e histogramas que se exportan en el formato de texto de
+Prometheus (por HTTP con serve() o como texto con render()) y como diccionario con dump().
+
+Las métricas están desactivadas por defecto. Mientras lo estén, cada operación solo consulta una
+bandera y retorna, y time() devuelve un span nulo compartido, así que instrumentar una ruta crítica
+no agrega asignaciones ni bloqueos. Se activan con enable() o con la variable de entorno
+BLOCKCHAIN_METRICS=1.
+
+Uso:
+    from utils import metrics
+
+    FIRMAS = metrics.counter("firmas_total", "Firmas creadas")
+    LATENCIA = metrics.histogram("firma_seconds", "Duración de una firma")
+
+    with LATENCIA.time():
+        ...
+    FIRMAS.inc()
+"""
+
+import abc
+import bisect
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_enabled = os.environ.get("BLOCKCHAIN_METRICS", "") not in ("", "0")
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def enable():
+    """
+    Activa la recolección de métricas.
+    """
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    """
+    Desactiva la recolección de métricas. Los valores acumulados se conservan.
+    """
+    global _enabled
+    _enabled = False
+
+
+def enabled():
+    """
+    bool: True si las métricas están activas.
+    """
+    return _enabled
+
+
+class _NullSpan:
+    """
+    Span que no mide nada; se comparte entre todas las llamadas con las métricas desactivadas.
+    """
+
+    __slots__ = ()
+    elapsed = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """
+    Mide la duración de un bloque with y la registra en un histograma al salir.
+
+    Atributos:
+        elapsed (float): Segundos transcurridos (disponible al salir del bloque).
+    """
+
+    __slots__ = ("_histogram", "_start", "elapsed")
+
+    def __init__(self, histogram):
+        self._histogram = histogram
+        self.elapsed = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self._start
+        self._histogram.observe(self.elapsed)
+        return False
+
+
+class _Metric(abc.ABC):
+    """
+    Base de las métricas registradas: nombre, ayuda y tipo de Prometheus (kind).
+    """
+
+    kind = None
+
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self._lock = threading.Lock()
+
+    @abc.abstractmethod
+    def samples(self):
+        """
+        Devuelve las muestras de la métrica como pares (nombre con etiquetas, valor).
+        """
+
+    @abc.abstractmethod
+    def reset(self):
+        """
+        Vuelve la métrica a su valor inicial, aunque las métricas estén desactivadas. La llama reset()
+        del módulo con el candado de la métrica ya tomado, así que no debe volver a tomarlo.
+        """
+
+
+class Counter(_Metric):
+    """
+    Contador que solo aumenta (por ejemplo, hashes calculados).
+    """
+
+    kind = "counter"
+
+    def __init__(self, name, help):
+        super().__init__(name, help)
+        self.value = 0
+
+    def inc(self, amount=1):
+        """
+        Suma amount al contador si las métricas están activas.
+        """
+        if _enabled:
+            with self._lock:
+                self.value += amount
+
+    def samples(self):
+        return [(self.name, self.value)]
+
+    def reset(self):
+        self.value = 0
+
+
+class Gauge(_Metric):
+    """
+    Valor que sube y baja (por ejemplo, transacciones en el mempool). Puede tomar su valor de una
+    función que se evalúa solo al exportar, sin costo en las rutas que lo modifican.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name, help):
+        super().__init__(name, help)
+        self.value = 0
+        self._function = None
+
+    def set(self, value):
+        if _enabled:
+            self.value = value
+
+    def inc(self, amount=1):
+        if _enabled:
+            with self._lock:
+                self.value += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def set_function(self, function):
+        """
+        Hace que el valor del gauge se calcule con function() al exportar.
+
+        Args:
+            function (callable | None): Función sin argumentos. None vuelve a usar el valor fijado con set().
+        """
+        self._function = function
+
+    def samples(self):
+        value = self.value
+        if self._function is not None:
+            try:
+                value = self._function()
+            except Exception:
+                pass
+        return [(self.name, value)]
+
+    def reset(self):
+        self.value = 0
+
+
+class Histogram(_Metric):
+    """
+    Distribución de observaciones (por ejemplo, duraciones en segundos) en cubetas acumuladas.
+
+    Atributos:
+        buckets (tuple): Límites superiores de las cubetas, en orden creciente.
+        count (int): Observaciones registradas.
+        sum (float): Suma de las observaciones.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = tuple(sorted(buckets))
+        self.reset()
+
+    def observe(self, value):
+        """
+        Registra una observación si las métricas están activas.
+        """
+        if _enabled:
+            i = bisect.bisect_left(self.buckets, value)
+            with self._lock:
+                self._counts[i] += 1
+                self.count += 1
+                self.sum += value
+
+    def time(self):
+        """
+        Devuelve un context manager que registra la duración del bloque with. Con las métricas
+        desactivadas devuelve un span nulo compartido.
+        """
+        if _enabled:
+            return _Span(self)
+        return _NULL_SPAN
+
+    def cumulative(self):
+        """
+        Devuelve pares (límite, observaciones menores o iguales al límite), terminando en +Inf.
+        """
+        total = 0
+        result = []
+        for bound, n in zip(self.buckets + (float("inf"),), self._counts):
+            total += n
+            result.append((bound, total))
+        return result
+
+    def samples(self):
+        samples = [(f'{self.name}_bucket{{le="{_format(bound)}"}}', n) for bound, n in self.cumulative()]
+        samples.append((f"{self.name}_sum", self.sum))
+        samples.append((f"{self.name}_count", self.count))
+        return samples
+
+    def reset(self):
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+
+def _register(cls, name, help, **kwargs):
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, help, **kwargs)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"La métrica '{name}' ya está registrada como {metric.kind}")
+        return metric
+
+
+def counter(name, help):
+    """
+    Devuelve el contador registrado con ese nombre, creándolo si no existe.
+
+    Raises:
+        ValueError: Si el nombre ya está registrado con otro tipo de métrica.
+    """
+    return _register(Counter, name, help)
+
+
+def gauge(name, help):
+    """
+    Devuelve el gauge registrado con ese nombre, creándolo si no existe.
+
+    Raises:
+        ValueError: Si el nombre ya está registrado con otro tipo de métrica.
+    """
+    return _register(Gauge, name, help)
+
+
+def histogram(name, help, buckets=DEFAULT_BUCKETS):
+    """
+    Devuelve el histograma registrado con ese nombre, creándolo si no existe.
+
+    Raises:
+        ValueError: Si el nombre ya está registrado con otro tipo de métrica.
+    """
+    return _register(Histogram, name, help, buckets=buckets)
+
+
+def reset():
+    """
+    Pone en cero todas las métricas registradas.
+    """
+    for metric in list(_registry.values()):
+        with metric._lock:
+            metric.reset()
+
+
+def _format(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render():
+    """
+    Exporta todas las métricas en el formato de texto de Prometheus (versión 0.0.4).
+
+    Returns:
+        str: Texto con las líneas HELP, TYPE y las muestras de cada métrica.
+    """
+    lines = []
+    for name in sorted(_registry):
+        metric = _registry[name]
+        lines.append(f"# HELP {name} {metric.help}")
+        lines.append(f"# TYPE {name} {metric.kind}")
+        for sample, value in metric.samples():
+            lines.append(f"{sample} {_format(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def dump():
+    """
+    Devuelve los valores actuales de todas las métricas.
+
+    Returns:
+        dict: Nombre -> valor para contadores y gauges; para histogramas, un dict con count, sum y
+        buckets (límite -> observaciones acumuladas).
+    """
+    result = {}
+    for name, metric in sorted(_registry.items()):
+        if isinstance(metric, Histogram):
+            result[name] = {
+                "count": metric.count,
+                "sum": metric.sum,
+                "buckets": {_format(bound): n for bound, n in metric.cumulative()},
+            }
+        else:
+            result[name] = metric.samples()[0][1]
+    return result
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port=9100, host="127.0.0.1"):
+    """
+    Activa las métricas y las publica en http://host:port/metrics desde un hilo en segundo plano.
+
+    Args:
+        port (int): Puerto. 0 elige uno libre.
+        host (str): Dirección en la que escuchar. Por defecto solo la local.
+
+    Returns:
+        ThreadingHTTPServer: Servidor en ejecución (server.server_address tiene el puerto real;
+        server.shutdown() lo detiene).
+    """
+    enable()
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
@@ -0,0 +1,31 @@
+"""
+procesos.py
+
+Contexto de multiprocessing con el que se crean los procesos worker del proyecto (minería paralela,
+verificación de firmas, validación de la cadena y generación de wallets).
+
+Los procesos no se crean con fork: el proceso principal ya tiene otros hilos en marcha (el hilo de
+fondo del registro de eventos, las sesiones de la interfaz, la minería en segundo plano) y fork copia
+en el hijo los candados que esos hilos tengan tomados en ese momento, que nadie liberará, así que el
+worker puede bloquearse. Con forkserver (o spawn, donde forkserver no existe) los workers parten de
+un proceso sin esos hilos. Como contrapartida, el script principal debe proteger su código con
+`if __name__ == "__main__":`.
+"""
+
+import multiprocessing
+
+
+def contexto_procesos():
+    """
+    Devuelve el contexto de multiprocessing para crear workers: forkserver si la plataforma lo admite
+    y spawn si no. El servidor de forkserver importa de antemano los módulos que ejecutan los workers,
+    así que cada worker nuevo no vuelve a importarlos (minar un bloque arranca sus workers cada vez).
+
+    Returns:
+        multiprocessing.context.BaseContext: Contexto de procesos.
+    """
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    contexto = multiprocessing.get_context("forkserver")
+    contexto.set_forkserver_preload(["blockchain.mining", "blockchain.verification", "blockchain.blockchain"])
+    return contexto
@@ -0,0 +1,121 @@
+"""
+rwlock.py
+
+Candado de lectores y escritor: varios hilos pueden leer a la vez, mientras que una escritura
+excluye a todos los demás. Da preferencia a los escritores (un lector nuevo espera si hay un escritor
+esperando), para que una lectura continua no impida escribir, y los escritores entran en orden de
+llegada, para que un hilo que escribe en bucle no deje esperando indefinidamente a los demás.
+
+El hilo que escribe puede volver a tomar el candado para escribir o para leer (por ejemplo, un método
+que escribe y llama a otro que lee). Un hilo que solo lee no puede pasar a escribir sin soltar antes
+la lectura: se lanza RuntimeError en lugar de bloquearse para siempre.
+"""
+
+import threading
+from contextlib import contextmanager
+
+
+class RWLock:
+    """
+    Candado de lectores y escritor con preferencia por los escritores.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._write_depth = 0
+        self._writers_waiting = 0
+        self._next_ticket = 0  # turno del próximo escritor que llegue
+        self._serving = 0  # turno del escritor que puede entrar
+        self._abandoned = set()  # turnos de escritores que dejaron de esperar
+        self._local = threading.local()
+
+    def acquire_read(self):
+        reads = getattr(self._local, "reads", 0)
+        with self._cond:
+            # Un hilo que ya lee o escribe entra sin esperar: si esperara a un escritor en cola,
+            # ese escritor lo estaría esperando a él.
+            if not reads and self._writer != threading.get_ident():
+                while self._writer is not None or self._writers_waiting:
+                    self._cond.wait()
+            self._readers += 1
+        self._local.reads = reads + 1
+
+    def release_read(self):
+        with self._cond:
+            self._readers -= 1
+            self._local.reads -= 1
+            if not self._readers:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        """
+        Raises:
+            RuntimeError: Si el hilo tiene el candado para leer y no para escribir.
+        """
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._write_depth += 1
+                return
+            if getattr(self._local, "reads", 0):
+                raise RuntimeError("No se puede pasar de lectura a escritura sin soltar la lectura")
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            self._writers_waiting += 1
+            try:
+                while self._writer is not None or self._readers or ticket != self._serving:
+                    self._cond.wait()
+            except BaseException:
+                # Un escritor que deja de esperar (por ejemplo, por KeyboardInterrupt) cede su turno.
+                if ticket == self._serving:
+                    self._advance()
+                    self._cond.notify_all()
+                else:
+                    self._abandoned.add(ticket)
+                raise
+            finally:
+                self._writers_waiting -= 1
+            self._writer = me
+            self._advance()
+            self._write_depth = 1
+
+    def _advance(self):
+        """
+        Pasa al turno siguiente, saltando los abandonados. Se llama con self._cond tomado, cuando el
+        escritor del turno actual entra o lo abandona.
+        """
+        self._serving += 1
+        while self._serving in self._abandoned:
+            self._abandoned.remove(self._serving)
+            self._serving += 1
+
+    def release_write(self):
+        with self._cond:
+            self._write_depth -= 1
+            if not self._write_depth:
+                self._writer = None
+                self._cond.notify_all()
+
+    @contextmanager
+    def read(self):
+        """
+        Context manager para leer.
+        """
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        """
+        Context manager para escribir.
+        """
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()